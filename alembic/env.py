@@ -18,10 +18,17 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
-from app.database import Base
+from app.database import Base, DATABASE_URL
+import app.models.table  # noqa: F401
+import app.models.reservation  # noqa: F401
+import app.models.analytics  # noqa: F401
 
 target_metadata = Base.metadata
 
+# URL из окружения приоритетнее значения в alembic.ini
+if DATABASE_URL:
+    config.set_main_option("sqlalchemy.url", DATABASE_URL)
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
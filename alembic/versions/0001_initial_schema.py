@@ -0,0 +1,53 @@
+"""initial schema
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Базы, созданные через Base.metadata.create_all, уже содержат эти таблицы
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('tables'):
+        op.create_table(
+            'tables',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(), nullable=True),
+            sa.Column('seats', sa.Integer(), nullable=True),
+            sa.Column('location', sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('name'),
+        )
+        op.create_index('ix_tables_id', 'tables', ['id'])
+    if not inspector.has_table('reservations'):
+        op.create_table(
+            'reservations',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('customer_name', sa.String(), nullable=True),
+            sa.Column('table_id', sa.Integer(), nullable=True),
+            sa.Column('reservation_time', sa.DateTime(), nullable=True),
+            sa.Column('duration_minutes', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['table_id'], ['tables.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_reservations_id', 'reservations', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reservations_id', table_name='reservations')
+    op.drop_table('reservations')
+    op.drop_index('ix_tables_id', table_name='tables')
+    op.drop_table('tables')
@@ -0,0 +1,30 @@
+"""indexes for keyset pagination and list filters
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_reservations_time_id', 'reservations', ['reservation_time', 'id'])
+    op.create_index('ix_tables_location_id', 'tables', ['location', 'id'])
+    op.create_index('ix_tables_seats_id', 'tables', ['seats', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tables_seats_id', table_name='tables')
+    op.drop_index('ix_tables_location_id', table_name='tables')
+    op.drop_index('ix_reservations_time_id', table_name='reservations')
@@ -0,0 +1,135 @@
+"""monthly partitions for reservations and archive table
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Секции создаются на столько месяцев вперед; дальше — python -m app.maintenance partitions
+MONTHS_AHEAD = 3
+
+OVERLAP_EXCLUSION = "EXCLUDE USING gist (table_id WITH =, tsrange(reservation_time, end_time) WITH &&)"
+INDEXES = (
+    ('ix_reservations_id', ['id']),
+    ('ix_reservations_table_time', ['table_id', 'reservation_time', 'end_time']),
+    ('ix_reservations_time_id', ['reservation_time', 'id']),
+)
+COLUMNS = "id, customer_name, table_id, reservation_time, duration_minutes, end_time"
+
+
+def next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def create_partitions(first: date, last: date) -> None:
+    month = date(first.year, first.month, 1)
+    while month <= last:
+        name = f"reservations_p{month:%Y%m}"
+        op.execute(
+            f"CREATE TABLE {name} PARTITION OF reservations "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+        )
+        # Ограничение исключения на секционированной таблице с && не поддерживается:
+        # оно задается в каждой секции
+        op.execute(f"ALTER TABLE {name} ADD CONSTRAINT {name}_no_overlap {OVERLAP_EXCLUSION}")
+        month = next_month(month)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'reservations_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('customer_name', sa.String(), nullable=True),
+        sa.Column('table_id', sa.Integer(), nullable=True),
+        sa.Column('reservation_time', sa.DateTime(), nullable=True),
+        sa.Column('duration_minutes', sa.Integer(), nullable=True),
+        sa.Column('end_time', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    # Таблица пересоздается секционированной по месяцам reservation_time.
+    # Последовательность id переживает пересоздание: id броней не меняются
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence('reservations', 'id')")).scalar()
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+    op.execute("ALTER TABLE reservations DROP CONSTRAINT IF EXISTS reservations_no_overlap")
+    for name, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute("ALTER TABLE reservations RENAME TO reservations_unpartitioned")
+    op.execute("ALTER TABLE reservations_unpartitioned RENAME CONSTRAINT reservations_pkey TO reservations_unpartitioned_pkey")
+
+    # Ключ секционирования обязан входить в первичный ключ
+    op.execute(
+        "CREATE TABLE reservations ("
+        f"id integer NOT NULL DEFAULT nextval('{sequence}'), "
+        "customer_name varchar, "
+        "table_id integer REFERENCES tables (id), "
+        "reservation_time timestamp NOT NULL, "
+        "duration_minutes integer, "
+        "end_time timestamp, "
+        "PRIMARY KEY (id, reservation_time)"
+        ") PARTITION BY RANGE (reservation_time)"
+    )
+    op.execute("CREATE TABLE reservations_default PARTITION OF reservations DEFAULT")
+    first = bind.execute(sa.text("SELECT min(reservation_time) FROM reservations_unpartitioned")).scalar()
+    today = date.today()
+    last = today
+    for _ in range(MONTHS_AHEAD):
+        last = next_month(last)
+    create_partitions(min(first.date(), today) if first else today, last)
+    for name, columns in INDEXES:
+        op.create_index(name, 'reservations', columns)
+
+    op.execute(
+        f"INSERT INTO reservations ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM reservations_unpartitioned WHERE reservation_time IS NOT NULL"
+    )
+    op.execute("DROP TABLE reservations_unpartitioned")
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY reservations.id")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence('reservations', 'id')")).scalar()
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+        op.execute("ALTER TABLE reservations RENAME TO reservations_partitioned")
+        op.execute("ALTER TABLE reservations_partitioned RENAME CONSTRAINT reservations_pkey TO reservations_partitioned_pkey")
+        for name, _ in INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {name}")
+        op.execute(
+            "CREATE TABLE reservations ("
+            f"id integer PRIMARY KEY DEFAULT nextval('{sequence}'), "
+            "customer_name varchar, "
+            "table_id integer REFERENCES tables (id), "
+            "reservation_time timestamp, "
+            "duration_minutes integer, "
+            "end_time timestamp"
+            ")"
+        )
+        op.execute(f"INSERT INTO reservations ({COLUMNS}) SELECT {COLUMNS} FROM reservations_partitioned")
+        # Секции удаляются вместе с родительской таблицей
+        op.execute("DROP TABLE reservations_partitioned")
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY reservations.id")
+        for name, columns in INDEXES:
+            op.create_index(name, 'reservations', columns)
+        op.execute(f"ALTER TABLE reservations ADD CONSTRAINT reservations_no_overlap {OVERLAP_EXCLUSION}")
+
+    op.drop_table('reservations_archive')
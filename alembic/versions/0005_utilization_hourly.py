@@ -0,0 +1,36 @@
+"""hourly utilization aggregates
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Заполняется после миграции: python -m app.maintenance analytics-rebuild
+    op.create_table(
+        'utilization_hourly',
+        sa.Column('table_id', sa.Integer(), nullable=False),
+        sa.Column('hour_start', sa.DateTime(), nullable=False),
+        sa.Column('occupied_seconds', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('table_id', 'hour_start'),
+    )
+    # Отчеты за период читают диапазон часов по всем столам
+    op.create_index('ix_utilization_hourly_hour_start', 'utilization_hourly', ['hour_start'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_utilization_hourly_hour_start', table_name='utilization_hourly')
+    op.drop_table('utilization_hourly')
@@ -0,0 +1,27 @@
+"""index for best-fit table assignment
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Без расположения подбор идет по ix_tables_seats_id
+    op.create_index('ix_tables_location_seats_id', 'tables', ['location', 'seats', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tables_location_seats_id', table_name='tables')
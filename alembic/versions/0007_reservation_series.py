@@ -0,0 +1,47 @@
+"""recurring reservation series
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'reservation_series',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('customer_name', sa.String(), nullable=True),
+        sa.Column('table_id', sa.Integer(), nullable=True),
+        sa.Column('reservation_time', sa.DateTime(), nullable=True),
+        sa.Column('duration_minutes', sa.Integer(), nullable=True),
+        sa.Column('frequency', sa.String(), nullable=True),
+        sa.Column('interval', sa.Integer(), nullable=True),
+        sa.Column('occurrence_count', sa.Integer(), nullable=True),
+        sa.Column('start_epoch', sa.BigInteger(), nullable=True),
+        sa.Column('end_epoch', sa.BigInteger(), nullable=True),
+        sa.Column('period_seconds', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['table_id'], ['tables.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_reservation_series_id', 'reservation_series', ['id'])
+    op.create_index(
+        'ix_reservation_series_table_range', 'reservation_series', ['table_id', 'start_epoch', 'end_epoch']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reservation_series_table_range', table_name='reservation_series')
+    op.drop_index('ix_reservation_series_id', table_name='reservation_series')
+    op.drop_table('reservation_series')
@@ -0,0 +1,43 @@
+"""overlap exclusion on the default reservations partition
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OVERLAP_EXCLUSION = "EXCLUDE USING gist (table_id WITH =, tsrange(reservation_time, end_time) WITH &&)"
+
+
+def is_partitioned(bind) -> bool:
+    return bool(bind.execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'reservations')"
+    )).scalar())
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or not is_partitioned(bind):
+        return
+    # Брони месяцев без секции попадают в reservations_default; 0004 оставляла ее без ограничения
+    op.execute("ALTER TABLE reservations_default DROP CONSTRAINT IF EXISTS reservations_default_no_overlap")
+    op.execute(f"ALTER TABLE reservations_default ADD CONSTRAINT reservations_default_no_overlap {OVERLAP_EXCLUSION}")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or not is_partitioned(bind):
+        return
+    op.execute("ALTER TABLE reservations_default DROP CONSTRAINT IF EXISTS reservations_default_no_overlap")
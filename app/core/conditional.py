@@ -0,0 +1,113 @@
+"""
+Условные GET для столов и броней: слабые ETag и Last-Modified по счетчикам версий.
+
+Обработчики записи увеличивают версию коллекции после commit; чтение берет
+версию до запроса к базе, поэтому ETag никогда не оказывается новее данных.
+Совпавший If-None-Match получает 304 без запроса к базе и сериализации.
+
+Версии живут в памяти процесса, и в ETag входит метка процесса: ETag разных
+воркеров не совпадают (в худшем случае — полный ответ). Об изменениях,
+сделанных другими воркерами, процесс узнает из шины событий (on_event), поэтому
+при нескольких воркерах условные запросы требуют EVENTS_BACKEND=postgres;
+иначе gunicorn.conf.py выключает их (CONDITIONAL_GET=0). Счетчики разных
+процессов не сравнимы, поэтому If-Modified-Since не проверяется: Last-Modified
+отдается только как подсказка.
+
+Реплика может отставать от версии: ответ, прочитанный с реплики в течение
+READ_YOUR_WRITES_SECONDS после изменения коллекции, отдается без ETag.
+
+Настройки окружения:
+    CONDITIONAL_GET            — ETag и 304 (1; 0 выключает)
+    TABLES_CACHE_CONTROL       — Cache-Control для столов ("public, max-age=60")
+    RESERVATIONS_CACHE_CONTROL — Cache-Control для броней ("private, no-cache")
+"""
+import os
+import threading
+import time
+from email.utils import formatdate
+from typing import Optional, Tuple
+from fastapi import Request, Response
+from app.database import READ_YOUR_WRITES_SECONDS
+
+CONDITIONAL_GET = os.getenv("CONDITIONAL_GET", "1").lower() in ("1", "true", "yes")
+TABLES_CACHE_CONTROL = os.getenv("TABLES_CACHE_CONTROL", "public, max-age=60")
+RESERVATIONS_CACHE_CONTROL = os.getenv("RESERVATIONS_CACHE_CONTROL", "private, no-cache")
+
+class ResourceVersions:
+    """
+    Счетчик версий и время последнего изменения для каждой коллекции.
+    bump вызывается из потоков пула, поэтому изменения идут под блокировкой.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        # Метка процесса: после fork и перезапуска воркера счетчики начинаются заново
+        self._token = f"{os.getpid():x}.{time.time_ns():x}"
+        self._started = time.time()
+        self._versions = {}
+        self._modified = {}
+
+    def bump(self, *resources: str):
+        now = time.time()
+        with self._lock:
+            for resource in resources:
+                self._versions[resource] = self._versions.get(resource, 0) + 1
+                self._modified[resource] = now
+
+    def current(self, resource: str) -> Tuple[str, float]:
+        version = self._versions.get(resource, 0)
+        return f'W/"{self._token}.{version}"', self._modified.get(resource, self._started)
+
+versions = ResourceVersions()
+os.register_at_fork(after_in_child=versions.reset)
+
+def on_event(event: dict):
+    """
+    Слушатель шины событий: изменения из других воркеров (и своего) меняют версии.
+    """
+    kind = event.get("type", "")
+    if kind == "table_deleted":
+        versions.bump("tables", "reservations")
+    elif kind.startswith("table_"):
+        versions.bump("tables")
+    else:
+        versions.bump("reservations")
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    # Слабое сравнение: префикс W/ не учитывается
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:]
+    return any(
+        tag.strip().removeprefix("W/") == opaque
+        for tag in header.split(",")
+    )
+
+def conditional_get(
+    request: Request, response: Response, resource: str, cache_control: str, replica: bool = False
+) -> Optional[Response]:
+    """
+    Ответ 304, если If-None-Match совпадает с текущей версией; иначе None,
+    а заголовки кэширования выставляются на response.
+    """
+    if not CONDITIONAL_GET:
+        return None
+    etag, modified = versions.current(resource)
+    if replica and time.time() - modified < READ_YOUR_WRITES_SECONDS:
+        # Реплика могла еще не получить изменение: ответ без валидатора
+        response.headers["Cache-Control"] = "no-store"
+        return None
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(modified, usegmt=True),
+        "Cache-Control": cache_control,
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
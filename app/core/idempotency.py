@@ -0,0 +1,220 @@
+"""
+Заголовок Idempotency-Key для записи броней.
+
+Первый ответ на запрос с ключом (статус, заголовки, тело) сохраняется в
+ограниченном хранилище с TTL; повтор с тем же ключом получает сохраненный ответ,
+не доходя до обработчика и базы. Одновременный дубликат ждет завершения
+первого запроса. Повтор ключа с другим телом запроса отклоняется (422).
+
+Ключ действует в пределах клиента (как в ограничении частоты: X-API-Key или
+адрес), поэтому чужой клиент с тем же ключом не получит сохраненный ответ.
+
+Хранилище живет в памяти процесса: при нескольких воркерах повтор, попавший
+в другой воркер, выполнится заново (двойную бронь по-прежнему исключает
+проверка пересечений).
+
+Настройки окружения:
+    IDEMPOTENCY_TTL_SECONDS — время хранения ответа (86400)
+    IDEMPOTENCY_MAX_KEYS    — предел числа ключей, вытесняются самые старые (10000)
+    IDEMPOTENCY_MAX_BYTES   — предел общего объема сохраненных тел (64 МБ)
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+from app.core.rate_limit import client_id
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+IDEMPOTENCY_MAX_BYTES = int(os.getenv("IDEMPOTENCY_MAX_BYTES", str(64 * 1024 * 1024)))
+MAX_KEY_LENGTH = 255
+# Большие ответы не сохраняются: один ответ не вытесняет из хранилища остальные
+MAX_STORED_BODY = 64 * 1024
+# Заголовки ответа, которые воспроизводятся при повторе
+STORED_HEADERS = {b"content-type", b"location"}
+
+class StoredResponse:
+    __slots__ = ("fingerprint", "status", "headers", "body", "expires")
+
+    def __init__(self, fingerprint: str, status: int, headers: list, body: bytes, expires: float):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.expires = expires
+
+class IdempotencyStore:
+    """
+    LRU с TTL для сохраненных ответов и словарь выполняющихся запросов.
+    Объем ограничен и числом ключей, и суммарным размером тел.
+    Используется только из цикла событий, поэтому блокировки не нужны.
+    """
+
+    def __init__(
+        self,
+        ttl: float = IDEMPOTENCY_TTL_SECONDS,
+        max_keys: int = IDEMPOTENCY_MAX_KEYS,
+        max_bytes: int = IDEMPOTENCY_MAX_BYTES,
+    ):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.max_bytes = max_bytes
+        self.stored_bytes = 0
+        self._responses: "OrderedDict[tuple, StoredResponse]" = OrderedDict()
+        self._in_flight = {}
+
+    def _remove(self, key: tuple):
+        self.stored_bytes -= len(self._responses.pop(key).body)
+
+    def get(self, key: tuple) -> Optional[StoredResponse]:
+        stored = self._responses.get(key)
+        if stored is None:
+            return None
+        if stored.expires < time.monotonic():
+            self._remove(key)
+            return None
+        self._responses.move_to_end(key)
+        return stored
+
+    def put(self, key: tuple, stored: StoredResponse):
+        if key in self._responses:
+            self._remove(key)
+        self._responses[key] = stored
+        self.stored_bytes += len(stored.body)
+        while len(self._responses) > self.max_keys or self.stored_bytes > self.max_bytes:
+            self._remove(next(iter(self._responses)))
+
+    def begin(self, key: tuple) -> Optional[asyncio.Future]:
+        """
+        Отмечает запрос выполняющимся. Если такой уже выполняется, возвращает его future.
+        """
+        running = self._in_flight.get(key)
+        if running is not None:
+            return running
+        self._in_flight[key] = asyncio.get_running_loop().create_future()
+        return None
+
+    def finish(self, key: tuple, stored: Optional[StoredResponse]):
+        running = self._in_flight.pop(key, None)
+        if stored is not None:
+            self.put(key, stored)
+        if running is not None and not running.done():
+            running.set_result(stored)
+
+    def clear(self):
+        self._responses.clear()
+        self.stored_bytes = 0
+        self._in_flight.clear()
+
+idempotency_store = IdempotencyStore()
+
+def _error(status: int, detail: str) -> Tuple[int, list, bytes]:
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode()
+    return status, [(b"content-type", b"application/json")], body
+
+async def _send_response(send, status: int, headers: list, body: bytes, replayed: bool = False):
+    headers = list(headers) + [(b"content-length", str(len(body)).encode())]
+    if replayed:
+        headers.append((REPLAYED_HEADER.lower().encode(), b"true"))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+class IdempotencyMiddleware:
+    """
+    ASGI-middleware для маршрутов routes: последовательности (метод, регулярное выражение пути).
+    Запросы без заголовка Idempotency-Key проходят без изменений.
+    """
+
+    def __init__(self, app, routes: Sequence[Tuple[str, str]], store: IdempotencyStore = None):
+        self.app = app
+        self.routes = [(method, re.compile(pattern)) for method, pattern in routes]
+        self.store = store or idempotency_store
+
+    def _applies(self, scope) -> bool:
+        return any(
+            scope["method"] == method and pattern.fullmatch(scope["path"])
+            for method, pattern in self.routes
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._applies(scope):
+            return await self.app(scope, receive, send)
+        key_value = None
+        for name, value in scope["headers"]:
+            if name == b"idempotency-key":
+                key_value = value.decode("latin-1")
+                break
+        if key_value is None:
+            return await self.app(scope, receive, send)
+        if not key_value or len(key_value) > MAX_KEY_LENGTH:
+            return await _send_response(send, *_error(400, f"Неверный заголовок {IDEMPOTENCY_HEADER}"))
+
+        store = self.store
+        # Тело читается заранее: по нему проверяется, что ключ не переиспользован для другого запроса
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        key = (client_id(scope), scope["method"], scope["path"], key_value)
+
+        while True:
+            stored = store.get(key)
+            if stored is not None:
+                if stored.fingerprint != fingerprint:
+                    return await _send_response(send, *_error(
+                        422, f"{IDEMPOTENCY_HEADER} уже использован с другим телом запроса"
+                    ))
+                return await _send_response(send, stored.status, stored.headers, stored.body, replayed=True)
+            running = store.begin(key)
+            if running is None:
+                break
+            # Дубликат ждет первый запрос; если ответ не сохранился (ошибка 5xx), выполняется сам
+            await asyncio.shield(running)
+
+        await self._execute(scope, receive, body, send, store, key, fingerprint)
+
+    async def _execute(self, scope, receive, body: bytes, send, store: IdempotencyStore, key: tuple, fingerprint: str):
+        sent = False
+
+        async def replay_receive():
+            # Сначала прочитанное тело, дальше — исходный канал (сообщение об отключении клиента)
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status = None
+        headers = []
+        response_body = []
+
+        async def send_wrapper(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() in STORED_HEADERS]
+            elif message["type"] == "http.response.body":
+                response_body.append(message.get("body", b""))
+            await send(message)
+
+        stored = None
+        try:
+            await self.app(scope, replay_receive, send_wrapper)
+            content = b"".join(response_body)
+            # Ошибки сервера не сохраняются: повтор должен иметь шанс выполниться
+            if status is not None and status < 500 and len(content) <= MAX_STORED_BODY:
+                stored = StoredResponse(fingerprint, status, headers, content, time.monotonic() + store.ttl)
+        finally:
+            store.finish(key, stored)
@@ -1,35 +1,249 @@
+"""
+Логирование через очередь: обработчик на потоке запроса только кладет запись
+в очередь, форматирование и запись в файл выполняет фоновый QueueListener.
+
+Настройки окружения:
+    LOG_LEVEL        — уровень корневого логгера (INFO)
+    LOG_FORMAT       — text или json (JSON Lines)
+    LOG_FILE         — путь к файлу логов (logs/app.log)
+    LOG_QUEUE_SIZE   — размер очереди; при переполнении записи отбрасываются
+    LOG_SAMPLING     — доля сохраняемых записей: "app.health=0.01,app.x=0.5"
+    LOG_RATE_LIMITS  — не более N записей за период: "app.health=1/60"
+Записи уровня WARNING и выше не сэмплируются и не ограничиваются.
+"""
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
+import random
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_FILE = os.getenv("LOG_FILE", "logs/app.log")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+LOG_RATE_LIMITS = os.getenv("LOG_RATE_LIMITS", "app.health=1/60")
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Стандартные атрибуты LogRecord; остальные попадают в JSON как extra-поля
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+class JsonFormatter(logging.Formatter):
+    """
+    Одна запись — одна строка JSON.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+def _parse_rules(spec: str) -> Dict[str, str]:
+    rules = {}
+    for item in spec.split(","):
+        name, sep, value = item.strip().partition("=")
+        if sep and name:
+            rules[name.strip()] = value.strip()
+    return rules
+
+class _PerLoggerFilter(logging.Filter):
+    """
+    Правило ищется по имени логгера и его родителям: "app.health" действует
+    и на "app.health.db". Результат поиска кэшируется по имени.
+    """
+
+    def __init__(self, rules: dict):
+        super().__init__()
+        self.rules = rules
+        self._resolved = {}
+
+    def rule_for(self, name: str):
+        try:
+            return self._resolved[name]
+        except KeyError:
+            pass
+        rule, current = None, name
+        while current:
+            if current in self.rules:
+                rule = self.rules[current]
+                break
+            current = current.rpartition(".")[0]
+        self._resolved[name] = (current, rule)
+        return current, rule
+
+class SamplingFilter(_PerLoggerFilter):
+    """
+    Пропускает заданную долю записей логгера.
+    """
+
+    def __init__(self, rates: Dict[str, float], rng: Optional[random.Random] = None):
+        super().__init__(rates)
+        self.random = (rng or random.Random()).random
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rule_for(record.name)[1]
+        return rate is None or self.random() < rate
+
+class RateLimitFilter(_PerLoggerFilter):
+    """
+    Не более count записей логгера за period секунд (фиксированное окно).
+    Число подавленных записей доступно в suppressed.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[int, float]], clock=time.monotonic):
+        super().__init__(limits)
+        self.clock = clock
+        self.suppressed = {}
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        key, limit = self.rule_for(record.name)
+        if limit is None:
+            return True
+        count, period = limit
+        now = self.clock()
+        with self._lock:
+            started, used = self._windows.get(key, (now, 0))
+            if now - started >= period:
+                started, used = now, 0
+            if used >= count:
+                self.suppressed[key] = self.suppressed.get(key, 0) + 1
+                return False
+            self._windows[key] = (started, used + 1)
+        return True
 
-# Создаем директорию для логов, если её нет
-log_dir = Path("logs")
-log_dir.mkdir(exist_ok=True)
-
-# Настройка формата логов
-log_format = logging.Formatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
-
-# Настройка корневого логгера
-root_logger = logging.getLogger()
-root_logger.setLevel(logging.INFO)
-
-# Консольный обработчик
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setFormatter(log_format)
-root_logger.addHandler(console_handler)
-
-# Файловый обработчик
-file_handler = RotatingFileHandler(
-    "logs/app.log",
-    maxBytes=10 * 1024 * 1024,  # 10 MB
-    backupCount=5,
-    encoding="utf-8"
-)
-file_handler.setFormatter(log_format)
-root_logger.addHandler(file_handler)
+def parse_sampling(spec: str) -> Dict[str, float]:
+    return {name: float(value) for name, value in _parse_rules(spec).items()}
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[int, float]]:
+    limits = {}
+    for name, value in _parse_rules(spec).items():
+        count, _, period = value.partition("/")
+        limits[name] = (int(count), float(period or 1))
+    return limits
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler, который не блокирует запрос при переполненной очереди,
+    а отбрасывает запись и считает такие случаи.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Подставляем аргументы сразу: они могут измениться после возврата из вызова.
+        # Полное форматирование (время, JSON) остается фоновому потоку.
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def make_formatter(fmt: str = LOG_FORMAT) -> logging.Formatter:
+    return JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+
+def build_pipeline(handlers, filters=(), queue_size: int = LOG_QUEUE_SIZE):
+    """
+    Создает обработчик-очередь для логгеров и слушателя, который передает
+    записи целевым обработчикам в фоновом потоке. Слушатель не запущен.
+    """
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    for log_filter in filters:
+        queue_handler.addFilter(log_filter)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    return queue_handler, listener
+
+_queue_handler = None
+_listener = None
+
+def setup_logging():
+    """
+    Подключает очередь к корневому логгеру и запускает слушателя. Повторный вызов ничего не делает.
+    """
+    global _queue_handler, _listener
+    if _listener is not None:
+        return
+
+    formatter = make_formatter()
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(formatter)
+    handlers = [console_handler]
+    if LOG_FILE:
+        # Создаем директорию для логов, если её нет
+        Path(LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            LOG_FILE,
+            maxBytes=10 * 1024 * 1024,  # 10 MB
+            backupCount=5,
+            encoding="utf-8"
+        )
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    filters = [
+        SamplingFilter(parse_sampling(LOG_SAMPLING)),
+        RateLimitFilter(parse_rate_limits(LOG_RATE_LIMITS)),
+    ]
+    _queue_handler, _listener = build_pipeline(handlers, filters)
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(LOG_LEVEL)
+    root_logger.addHandler(_queue_handler)
+    _listener.start()
+
+def shutdown_logging():
+    """
+    Дожидается записи всех записей из очереди и закрывает обработчики.
+    """
+    global _queue_handler, _listener
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.flush()
+        handler.close()
+    _queue_handler = _listener = None
+
+# Обработчики создаются в setup_logging (lifespan приложения), а не при импорте
+atexit.register(shutdown_logging)
 
 # Логгер для базы данных
 db_logger = logging.getLogger("sqlalchemy.engine")
@@ -37,4 +251,7 @@ db_logger.setLevel(logging.WARNING)
 
 # Логгер для приложения
 app_logger = logging.getLogger("app")
-app_logger.setLevel(logging.INFO) 
\ No newline at end of file
+app_logger.setLevel(logging.INFO)
+
+# Проверки здоровья вызываются часто и по умолчанию ограничены LOG_RATE_LIMITS
+health_logger = logging.getLogger("app.health")
@@ -0,0 +1,364 @@
+"""
+Метрики в текстовом формате Prometheus без внешних зависимостей.
+
+Значения хранятся по потокам: запись не берет блокировок, чтение при экспорте
+суммирует срезы всех потоков. Для нескольких воркеров задается METRICS_DIR:
+каждый процесс периодически сохраняет снимок в {pid}.json, а /api/metrics
+объединяет снимки всех воркеров.
+"""
+import json
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+class _Sharded:
+    """
+    Словарь значений на каждый поток; суммирование — только при чтении.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def shard(self) -> dict:
+        try:
+            return self._local.data
+        except AttributeError:
+            data = self._local.data = {}
+            with self._lock:
+                self._shards.append(data)
+            return data
+
+    def snapshots(self) -> list:
+        with self._lock:
+            shards = list(self._shards)
+        # dict.copy выполняется под GIL целиком и не конфликтует с записью
+        return [shard.copy() for shard in shards]
+
+    def clear(self):
+        with self._lock:
+            for shard in self._shards:
+                shard.clear()
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = _Sharded()
+
+    def inc(self, labels: Tuple = (), value: float = 1):
+        shard = self._values.shard()
+        shard[labels] = shard.get(labels, 0) + value
+
+    def collect(self) -> Dict[Tuple, float]:
+        result = {}
+        for shard in self._values.snapshots():
+            for labels, value in shard.items():
+                result[labels] = result.get(labels, 0) + value
+        return result
+
+    def reset(self):
+        self._values.clear()
+
+class Gauge(Counter):
+    """
+    Значение, которое может уменьшаться. Если задан callback, значения
+    вычисляются в момент экспорта.
+    """
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Iterable[Tuple[Tuple, float]]]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def dec(self, labels: Tuple = (), value: float = 1):
+        self.inc(labels, -value)
+
+    def collect(self) -> Dict[Tuple, float]:
+        if self.callback is not None:
+            return dict(self.callback())
+        return super().collect()
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=HTTP_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = _Sharded()
+
+    def observe(self, labels: Tuple, value: float):
+        shard = self._values.shard()
+        state = shard.get(labels)
+        if state is None:
+            # Счетчики по корзинам (последняя — +Inf), сумма и количество
+            state = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def collect(self) -> Dict[Tuple, list]:
+        result = {}
+        for shard in self._values.snapshots():
+            for labels, state in shard.items():
+                total = result.get(labels)
+                if total is None:
+                    result[labels] = list(state)
+                else:
+                    for i, value in enumerate(state):
+                        total[i] += value
+        return result
+
+    def reset(self):
+        self._values.clear()
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def snapshot(self) -> dict:
+        return {
+            metric.name: {
+                "type": metric.type,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", ())),
+                "values": [[list(labels), value] for labels, value in metric.collect().items()],
+            }
+            for metric in self.metrics
+        }
+
+    def reset(self):
+        for metric in self.metrics:
+            if getattr(metric, "callback", None) is None:
+                metric.reset()
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "Количество HTTP-запросов", ("method", "route", "status")
+))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Длительность HTTP-запросов", ("method", "route")
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Запросы в обработке"
+))
+DB_STATEMENTS = REGISTRY.register(Counter(
+    "db_statements_total", "Количество SQL-запросов", ("operation",)
+))
+DB_LATENCY = REGISTRY.register(Histogram(
+    "db_statement_duration_seconds", "Длительность SQL-запросов", ("operation",), buckets=DB_BUCKETS
+))
+RESERVATION_CONFLICTS = REGISTRY.register(Counter(
+    "reservation_conflicts_total", "Отказы в бронировании из-за пересечения", ("operation",)
+))
+HTTP_REJECTED = REGISTRY.register(Counter(
+    "http_rejected_total", "Запросы, отклоненные ограничением нагрузки", ("reason",)
+))
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") else "OTHER"
+
+# Храним движки, а не пулы: dispose() заменяет engine.pool новым
+_engines = {}
+_instrumented = weakref.WeakSet()
+
+def _pool_stats():
+    for name, engine in _engines.items():
+        pool = engine.pool
+        # У пулов SQLite (StaticPool, SingletonThreadPool) этих счетчиков нет
+        for state in ("checkedout", "overflow", "size"):
+            method = getattr(pool, state, None)
+            if callable(method):
+                yield (name, state), method()
+
+DB_POOL = REGISTRY.register(Gauge(
+    "db_pool_connections", "Состояние пула соединений: checkedout, overflow, size",
+    ("engine", "state"), callback=_pool_stats
+))
+
+def instrument_engine(engine, name: str = "primary"):
+    """
+    Подключает счетчики SQL и метрики пула к синхронному движку SQLAlchemy
+    (для AsyncEngine передается engine.sync_engine). Повторный вызов ничего не делает.
+    """
+    if engine in _instrumented:
+        return
+    _instrumented.add(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_start"].pop()
+        labels = (_operation(statement),)
+        DB_STATEMENTS.inc(labels)
+        DB_LATENCY.observe(labels, elapsed)
+
+    _engines[name] = engine
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: количество и длительность запросов по шаблону маршрута.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            # Шаблон пути, а не сам путь: число рядов не растет с числом ID
+            path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.inc((method, path, str(status_code)))
+            HTTP_LATENCY.observe((method, path), time.perf_counter() - start)
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def write_snapshot():
+    if not METRICS_DIR:
+        return
+    directory = Path(METRICS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / f"{os.getpid()}.json"
+    tmp = directory / f".{os.getpid()}.json.tmp"
+    tmp.write_text(json.dumps(REGISTRY.snapshot()), encoding="utf-8")
+    os.replace(tmp, target)
+
+def _merge(snapshots: Iterable[Tuple[bool, dict]]) -> dict:
+    """
+    Складывает снимки процессов. Gauge умерших воркеров отбрасываются,
+    счетчики и гистограммы остаются: они накопительные.
+    """
+    merged = {}
+    for alive, snapshot in snapshots:
+        for name, metric in snapshot.items():
+            if metric["type"] == "gauge" and not alive:
+                continue
+            target = merged.setdefault(name, {**metric, "values": {}})
+            for labels, value in metric["values"]:
+                key = tuple(labels)
+                current = target["values"].get(key)
+                if current is None:
+                    target["values"][key] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):
+                    for i, v in enumerate(value):
+                        current[i] += v
+                else:
+                    target["values"][key] = current + value
+    return merged
+
+def collect_all() -> dict:
+    if not METRICS_DIR:
+        return _merge([(True, REGISTRY.snapshot())])
+    write_snapshot()
+    snapshots = []
+    for path in Path(METRICS_DIR).glob("*.json"):
+        try:
+            snapshots.append((_pid_alive(int(path.stem)), json.loads(path.read_text(encoding="utf-8"))))
+        except (ValueError, OSError):
+            continue
+    return _merge(snapshots)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def render(metrics: dict) -> str:
+    lines = []
+    for name, metric in metrics.items():
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labelnames"]
+        for labels, value in sorted(metric["values"].items()):
+            if metric["type"] == "histogram":
+                cumulative = 0
+                for bound, count in zip(list(metric["buckets"]) + ["+Inf"], value[:-2]):
+                    cumulative += count
+                    le = 'le="{}"'.format(bound)
+                    lines.append(f"{name}_bucket{_format_labels(names, labels, (le,))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(names, labels)} {value[-2]}")
+                lines.append(f"{name}_count{_format_labels(names, labels)} {value[-1]}")
+            else:
+                lines.append(f"{name}{_format_labels(names, labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+_flusher = None
+
+def start_flusher():
+    """
+    Фоновая запись снимка для агрегации между воркерами (только при METRICS_DIR).
+    """
+    global _flusher
+    if not METRICS_DIR or _flusher is not None:
+        return
+
+    def loop():
+        while True:
+            time.sleep(METRICS_FLUSH_INTERVAL)
+            try:
+                write_snapshot()
+            except OSError:
+                pass
+
+    _flusher = threading.Thread(target=loop, name="metrics-flusher", daemon=True)
+    _flusher.start()
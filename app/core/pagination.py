@@ -0,0 +1,53 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+# Курсор следующей страницы передается в заголовке, тело ответа остается списком
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(*values) -> str:
+    payload = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(token: str, types: tuple) -> tuple:
+    """
+    Разбирает курсор, приводя значения к типам ключа сортировки.
+    """
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if len(raw) != len(types):
+            raise ValueError
+        return tuple(
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for t, v in zip(types, raw)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Неверный курсор пагинации"
+        )
+
+def keyset_page(query, columns: tuple, types: tuple, cursor: str, limit: int):
+    """
+    Страница по ключу сортировки columns: WHERE (columns) > (cursor) ORDER BY columns LIMIT limit + 1.
+    Стоимость страницы не зависит от ее номера, в отличие от OFFSET.
+    """
+    if cursor:
+        query = query.filter(tuple_(*columns) > tuple_(*decode_cursor(cursor, types)))
+    return query.order_by(*columns).limit(limit + 1)
+
+def finish_page(rows: list, limit: int, key, response: Response) -> list:
+    """
+    Отрезает лишнюю строку и, если она была, выставляет курсор следующей страницы.
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(rows[-1]))
+    return rows
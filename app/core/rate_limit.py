@@ -0,0 +1,211 @@
+"""
+Ограничение нагрузки на базу: token bucket на клиента и предел одновременных записей.
+
+Лишние запросы сразу получают 429 (превышен лимит клиента) или 503 (занято
+максимальное число записей) с заголовком Retry-After, а не ждут соединения
+из пула. Клиент определяется по заголовку X-API-Key, без него — по адресу.
+Ключ сам приложением не проверяется: его должен проверять шлюз перед API,
+иначе новый ключ на каждый запрос обходит лимит. За балансировщиком адрес
+берется из заголовка FORWARDED_FOR_HEADER, но только если соединение пришло
+от прокси из TRUSTED_PROXIES: иначе все клиенты делили бы корзину балансировщика.
+Состояние живет в памяти процесса; при нескольких воркерах лимиты действуют
+в каждом воркере отдельно.
+
+Настройки окружения:
+    RATE_LIMITS       — правила "МЕТОД /префикс=N/период" через запятую; первое
+                        совпавшее правило задает корзину: до N запросов подряд,
+                        N за период в секундах в среднем. "off" — без ограничения,
+                        "*" вместо метода — любой метод
+    RATE_LIMIT_MAX_CLIENTS — предел числа корзин, вытесняются самые старые (10000)
+    WRITE_CONCURRENCY — предел одновременных записей (DB_POOL_SIZE + DB_MAX_OVERFLOW; 0 отключает)
+    TRUSTED_PROXIES   — адреса или сети доверенных прокси через запятую (по умолчанию нет)
+    FORWARDED_FOR_HEADER — заголовок с цепочкой адресов от прокси (X-Forwarded-For)
+"""
+import ipaddress
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+from app.core.metrics import HTTP_REJECTED
+from app.database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+RATE_LIMITS = os.getenv(
+    "RATE_LIMITS",
+    "* /api/health=off,* /api/metrics=off,"
+    "POST /api=30/60,PUT /api=30/60,DELETE /api=30/60,* /api=100/1",
+)
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+WRITE_CONCURRENCY = int(os.getenv("WRITE_CONCURRENCY", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(item.strip(), strict=False)
+    for item in os.getenv("TRUSTED_PROXIES", "").split(",") if item.strip()
+]
+FORWARDED_FOR_HEADER = os.getenv("FORWARDED_FOR_HEADER", "X-Forwarded-For").lower().encode("latin-1")
+# Записи, занимающие соединение на время транзакции
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+WRITE_PREFIXES = ("/api/reservations", "/api/tables")
+
+class Rule:
+    __slots__ = ("method", "prefix", "capacity", "rate")
+
+    def __init__(self, method: str, prefix: str, capacity: int = 0, period: float = 1):
+        self.method = method
+        self.prefix = prefix
+        # capacity == 0 — маршрут без ограничения
+        self.capacity = capacity
+        self.rate = capacity / period if capacity else 0
+
+    def matches(self, method: str, path: str) -> bool:
+        return (self.method == "*" or self.method == method) and path.startswith(self.prefix)
+
+def parse_rules(spec: str) -> List[Rule]:
+    rules = []
+    for item in spec.split(","):
+        route, sep, value = item.strip().rpartition("=")
+        method, _, prefix = route.strip().partition(" ")
+        if not sep or not prefix:
+            continue
+        value = value.strip()
+        if value == "off":
+            rules.append(Rule(method.upper(), prefix.strip()))
+            continue
+        count, _, period = value.partition("/")
+        rules.append(Rule(method.upper(), prefix.strip(), int(count), float(period or 1)))
+    return rules
+
+class RateLimiter:
+    """
+    Корзины хранятся в LRU по ключу (номер правила, клиент): проверка — O(1),
+    память ограничена max_clients. Используется только из цикла событий.
+    """
+
+    def __init__(
+        self,
+        rules: List[Rule],
+        max_clients: int = RATE_LIMIT_MAX_CLIENTS,
+        write_concurrency: int = WRITE_CONCURRENCY,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rules = rules
+        self.max_clients = max_clients
+        self.write_concurrency = write_concurrency
+        self.clock = clock
+        self.writes_in_flight = 0
+        self._buckets: "OrderedDict[tuple, list]" = OrderedDict()
+
+    def rule_for(self, method: str, path: str) -> Optional[Tuple[int, Rule]]:
+        for index, rule in enumerate(self.rules):
+            if rule.matches(method, path):
+                return index, rule
+        return None
+
+    def acquire(self, method: str, path: str, client: str) -> float:
+        """
+        Списывает токен; возвращает 0 или число секунд до появления токена.
+        """
+        found = self.rule_for(method, path)
+        if found is None or not found[1].capacity:
+            return 0
+        index, rule = found
+        now = self.clock()
+        key = (index, client)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(rule.capacity), now]
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(rule.capacity, bucket[0] + (now - bucket[1]) * rule.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0
+        return (1 - bucket[0]) / rule.rate
+
+    def reset(self):
+        self._buckets.clear()
+        self.writes_in_flight = 0
+
+rate_limiter = RateLimiter(parse_rules(RATE_LIMITS))
+
+def is_write(method: str, path: str) -> bool:
+    return method in WRITE_METHODS and path.startswith(WRITE_PREFIXES)
+
+def is_trusted(address: str, proxies) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in proxies)
+
+def client_address(scope, proxies=TRUSTED_PROXIES, header: bytes = FORWARDED_FOR_HEADER) -> str:
+    """
+    Адрес клиента; за доверенными прокси — из их заголовка. Цепочка читается
+    справа налево до первого адреса не из прокси: левее него значения мог
+    подставить сам клиент.
+    """
+    client = scope.get("client")
+    address = client[0] if client else "unknown"
+    if not proxies or not is_trusted(address, proxies):
+        return address
+    forwarded = []
+    for name, value in scope["headers"]:
+        if name == header:
+            forwarded.extend(hop.strip() for hop in value.decode("latin-1").split(","))
+    for hop in reversed(forwarded):
+        if hop and not is_trusted(hop, proxies):
+            return hop
+    return address
+
+def client_id(scope) -> str:
+    for name, value in scope["headers"]:
+        if name == b"x-api-key" and value:
+            return "key:" + value.decode("latin-1")
+    return client_address(scope)
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class AdmissionMiddleware:
+    """
+    ASGI-middleware: сначала лимит клиента, затем предел одновременных записей.
+    """
+
+    def __init__(self, app, limiter: RateLimiter = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        limiter = self.limiter
+        method, path = scope["method"], scope["path"]
+
+        retry_after = limiter.acquire(method, path, client_id(scope))
+        if retry_after:
+            HTTP_REJECTED.inc(("rate_limit",))
+            return await _reject(send, 429, "Слишком много запросов", retry_after)
+
+        if not limiter.write_concurrency or not is_write(method, path):
+            return await self.app(scope, receive, send)
+        if limiter.writes_in_flight >= limiter.write_concurrency:
+            HTTP_REJECTED.inc(("write_concurrency",))
+            return await _reject(send, 503, "Сервис перегружен, повторите запрос позже", 1)
+        limiter.writes_in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.writes_in_flight -= 1
@@ -0,0 +1,28 @@
+"""
+Чтение своих записей при репликах: успешный запрос на запись ставит клиенту
+cookie read_primary на READ_YOUR_WRITES_SECONDS, и пока она действует,
+get_read_db отдает сессию основной базы вместо реплики.
+"""
+from app.database import READ_PRIMARY_COOKIE, READ_YOUR_WRITES_SECONDS, get_replica_engines
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+def read_primary_cookie() -> bytes:
+    return (
+        f"{READ_PRIMARY_COOKIE}=1; Max-Age={READ_YOUR_WRITES_SECONDS}; Path=/api; HttpOnly; SameSite=Lax"
+    ).encode()
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS or not get_replica_engines():
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", read_primary_cookie())]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
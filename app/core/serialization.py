@@ -0,0 +1,27 @@
+"""
+Быстрая сериализация списков: строки выбираются кортежами колонок и
+сериализуются orjson одним вызовом, без построения Pydantic-моделей.
+"""
+from typing import Optional, Sequence
+import orjson
+from fastapi import Response
+
+# Время в базе хранится в UTC без зоны; в ответе оно помечается суффиксом Z,
+# как при сериализации моделей с datetime в UTC
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+def column_names(columns: Sequence) -> tuple:
+    return tuple(column.key for column in columns)
+
+def rows_response(rows: Sequence, names: Sequence[str], response: Optional[Response] = None) -> Response:
+    """
+    Готовый JSON-ответ из кортежей колонок. Заголовки, выставленные обработчиком
+    на response (например, курсор пагинации), переносятся в ответ.
+    """
+    body = orjson.dumps([dict(zip(names, row)) for row in rows], option=ORJSON_OPTIONS)
+    result = Response(content=body, media_type="application/json")
+    if response is not None:
+        for key, value in response.headers.items():
+            if key != "content-length":
+                result.headers[key] = value
+    return result
@@ -1,5 +1,12 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import itertools
+import logging
+import time
+from typing import Union
+from fastapi import Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 import os
 from dotenv import load_dotenv
 
@@ -7,6 +14,220 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+# Реплики для чтения (через запятую); GET столов и броней читают из них
+REPLICA_DATABASE_URLS = [url.strip() for url in os.getenv("REPLICA_DATABASE_URLS", "").split(",") if url.strip()]
+# Сколько секунд после записи клиент читает с основной базы: допустимое отставание реплик
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+READ_PRIMARY_COOKIE = "read_primary"
+
+# Асинхронный режим (DB_ASYNC=1): сессии AsyncSession поверх asyncpg/aiosqlite
+DB_ASYNC = os.getenv("DB_ASYNC", "0").lower() in ("1", "true", "yes")
+
+def to_async_url(url: str) -> str:
+    """
+    Подставляет асинхронный драйвер в URL синхронной базы.
+    """
+    for prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
+
+# Настройки пула; для SQLite размер и переполнение не задаются: там свой пул
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1").lower() in ("1", "true", "yes")
+# Доля занятых соединений, при которой пишется предупреждение
+DB_POOL_WARN_RATIO = float(os.getenv("DB_POOL_WARN_RATIO", "0.9"))
+
+pool_logger = logging.getLogger("app.database.pool")
+
+def pool_options(url: str) -> dict:
+    """
+    Параметры пула соединений из окружения для create_engine / create_async_engine.
+    """
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    return options
+
+def pool_status(pool) -> dict:
+    """
+    Заполненность пула: занятые соединения относительно size + max_overflow.
+    """
+    status = {"pool": type(pool).__name__}
+    if not callable(getattr(pool, "checkedout", None)):
+        return status
+    size = pool.size()
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    checked_out = pool.checkedout()
+    status.update(size=size, checked_out=checked_out, overflow=pool.overflow())
+    if max_overflow >= 0:
+        capacity = size + max_overflow
+        status.update(capacity=capacity, saturation=round(checked_out / capacity, 3) if capacity else 0.0)
+    return status
+
+def watch_pool_saturation(sync_engine, interval: float = 60.0):
+    """
+    Предупреждение в лог, когда занято DB_POOL_WARN_RATIO пула (не чаще interval секунд).
+    """
+    last_warning = [0.0]
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        status = pool_status(sync_engine.pool)
+        saturation = status.get("saturation")
+        if saturation is None or saturation < DB_POOL_WARN_RATIO:
+            return
+        now = time.monotonic()
+        if now - last_warning[0] >= interval:
+            last_warning[0] = now
+            pool_logger.warning(
+                "Пул соединений заполнен на %d%%: занято %s из %s",
+                saturation * 100, status["checked_out"], status["capacity"]
+            )
+
+# Движки создаются при первом обращении, а не при импорте: импорт приложения
+# (в том числе в мастер-процессе gunicorn до fork) не открывает соединений
+_engine = None
+_async_engine = None
+_replica_engines = None
+_replica_cycle = None
+
+SessionLocal = sessionmaker(autoflush=False, autocommit=False)
+# Объекты остаются загруженными после commit: сериализация ответа не должна ходить в базу
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+# Сессии реплик привязываются к движку при создании (реплики чередуются)
+ReplicaSessionLocal = sessionmaker(autoflush=False, autocommit=False, info={"replica": True})
+AsyncReplicaSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, info={"replica": True})
 Base = declarative_base()
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        _engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL))
+        watch_pool_saturation(_engine)
+        SessionLocal.configure(bind=_engine)
+    return _engine
+
+def get_async_engine():
+    """
+    Асинхронный движок; None, если DB_ASYNC не включен.
+    """
+    global _async_engine
+    if _async_engine is None and DB_ASYNC:
+        url = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+        _async_engine = create_async_engine(url, **pool_options(url))
+        watch_pool_saturation(_async_engine.sync_engine)
+        AsyncSessionLocal.configure(bind=_async_engine)
+    return _async_engine
+
+def get_replica_engines() -> list:
+    """
+    Движки реплик (асинхронные при DB_ASYNC); пустой список, если реплики не заданы.
+    """
+    global _replica_engines, _replica_cycle
+    if _replica_engines is None:
+        _replica_engines = []
+        for url in REPLICA_DATABASE_URLS:
+            if DB_ASYNC:
+                url = to_async_url(url)
+                replica = create_async_engine(url, **pool_options(url))
+                watch_pool_saturation(replica.sync_engine)
+            else:
+                replica = create_engine(url, **pool_options(url))
+                watch_pool_saturation(replica)
+            _replica_engines.append(replica)
+        _replica_cycle = itertools.cycle(_replica_engines)
+    return _replica_engines
+
+def _sync_engines():
+    engines = [_engine, _async_engine and _async_engine.sync_engine]
+    for replica in _replica_engines or ():
+        engines.append(replica.sync_engine if DB_ASYNC else replica)
+    return [current for current in engines if current is not None]
+
+def reset_after_fork():
+    """
+    Отказывается от соединений, унаследованных от родительского процесса, не закрывая их.
+    """
+    for current in _sync_engines():
+        current.dispose(close=False)
+
+async def dispose_engines():
+    if _engine is not None:
+        _engine.dispose()
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    for replica in _replica_engines or ():
+        if DB_ASYNC:
+            await replica.dispose()
+        else:
+            replica.dispose()
+
+def get_sync_db():
+    if _engine is None:
+        get_engine()
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    if _async_engine is None:
+        get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+get_db = get_async_db if DB_ASYNC else get_sync_db
+
+# Тип сессии, которую обработчики получают из get_db
+DbSession = Union[Session, AsyncSession]
+
+def reads_from_primary(request: Request) -> bool:
+    return not get_replica_engines() or READ_PRIMARY_COOKIE in request.cookies
+
+# Чтение с реплики: сессия основной базы из get_db открывается лениво и без
+# обращения не берет соединение; при отсутствии реплик и в течение
+# READ_YOUR_WRITES_SECONDS после записи клиента чтение идет с основной базы
+
+def get_sync_read_db(request: Request, db: Session = Depends(get_db)):
+    if reads_from_primary(request):
+        yield db
+        return
+    replica = ReplicaSessionLocal(bind=next(_replica_cycle))
+    try:
+        yield replica
+    finally:
+        replica.close()
+
+async def get_async_read_db(request: Request, db: AsyncSession = Depends(get_db)):
+    if reads_from_primary(request):
+        yield db
+        return
+    async with AsyncReplicaSessionLocal(bind=next(_replica_cycle)) as replica:
+        yield replica
+
+get_read_db = get_async_read_db if DB_ASYNC else get_sync_read_db
+
+def is_replica(db: DbSession) -> bool:
+    return db.info.get("replica", False)
+
+async def run_db(db, fn, *args, **kwargs):
+    """
+    Выполняет синхронную функцию fn(session, ...) с обеими разновидностями сессий.
+    AsyncSession исполняет ее без потоков через run_sync, обычная Session — в пуле потоков.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
@@ -1,11 +1,42 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import tables, reservations
-from app.database import Base, engine
-from app.core.logger import app_logger
+from fastapi.responses import PlainTextResponse
+from app.routers import tables, reservations, series, availability, occupancy, analytics, events, health
+from app.database import DB_ASYNC, dispose_engines, get_async_engine, get_engine, get_replica_engines
+from app.core import metrics
+from app.core.conditional import on_event as bump_versions
+from app.core.idempotency import IdempotencyMiddleware, REPLAYED_HEADER
+from app.core.rate_limit import AdmissionMiddleware
+from app.core.read_your_writes import ReadYourWritesMiddleware
+from app.core.logger import app_logger, setup_logging, shutdown_logging
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.services.events import broadcaster
+from app.services.occupancy_cache import on_event as invalidate_occupancy
 
-# Создание таблиц в базе данных
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Логи, движки и фоновые потоки создаются в каждом воркере после fork;
+    # схема базы создается миграциями Alembic, а не при импорте
+    setup_logging()
+    app_logger.info("Starting Restaurant Booking API")
+    metrics.instrument_engine(get_engine())
+    async_engine = get_async_engine()
+    if async_engine is not None:
+        metrics.instrument_engine(async_engine.sync_engine, name="async")
+    for number, replica in enumerate(get_replica_engines()):
+        metrics.instrument_engine(replica.sync_engine if DB_ASYNC else replica, name=f"replica{number}")
+    metrics.start_flusher()
+    # Версии для ETag и кэш занятости следят и за записями в других воркерах
+    broadcaster.add_listener(bump_versions)
+    broadcaster.add_listener(invalidate_occupancy)
+    await broadcaster.start()
+    yield
+    await broadcaster.stop()
+    app_logger.info("Shutting down Restaurant Booking API")
+    metrics.write_snapshot()
+    await dispose_engines()
+    shutdown_logging()
 
 app = FastAPI(
     title="Restaurant Booking API",
@@ -13,9 +44,30 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    lifespan=lifespan
+)
+
+# Idempotency-Key для создания и изменения броней; внутри CORS, чтобы повторы
+# получали те же CORS-заголовки
+app.add_middleware(
+    IdempotencyMiddleware,
+    routes=[
+        ("POST", r"/api/reservations/?"),
+        ("POST", r"/api/reservations/auto/?"),
+        ("POST", r"/api/reservations/series/?"),
+        ("PUT", r"/api/reservations/\d+/?"),
+    ],
 )
 
+# После записи клиент читает с основной базы (при заданных репликах); снаружи
+# Idempotency-Key, чтобы cookie получали и повторы
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Лимиты клиентов и предел одновременных записей: отказ до чтения тела и
+# обращения к базе; внутри CORS, чтобы 429/503 были видны браузерным клиентам
+app.add_middleware(AdmissionMiddleware)
+
 # Настройка CORS
 app.add_middleware(
     CORSMiddleware,
@@ -23,24 +75,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, REPLAYED_HEADER, "Retry-After"],
 )
 
+# Метрики запросов; SQL и пул — через события движков (подключаются в lifespan)
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Подключение роутеров
 app.include_router(tables.router, prefix="/api")
 app.include_router(reservations.router, prefix="/api")
+app.include_router(series.router, prefix="/api")
+app.include_router(availability.router, prefix="/api")
+app.include_router(occupancy.router, prefix="/api")
+app.include_router(analytics.router, prefix="/api")
+app.include_router(events.router, prefix="/api")
+app.include_router(health.router, prefix="/api")
 
-@app.on_event("startup")
-async def startup_event():
-    app_logger.info("Starting Restaurant Booking API")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    app_logger.info("Shutting down Restaurant Booking API")
-
-@app.get("/api/health", tags=["Health"])
-async def health_check():
+@app.get("/api/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def get_metrics():
     """
-    Проверка работоспособности API
+    Метрики в текстовом формате Prometheus
     """
-    app_logger.info("Health check requested")
-    return {"status": "ok"}
+    return PlainTextResponse(
+        metrics.render(metrics.collect_all()),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
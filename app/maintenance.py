@@ -0,0 +1,69 @@
+"""
+Команды обслуживания базы броней.
+
+    python -m app.maintenance partitions [--months-ahead 3]
+    python -m app.maintenance archive [--older-than-days 180] [--batch-size 10000]
+    python -m app.maintenance analytics-rebuild
+
+partitions создает месячные секции заранее (запускать по расписанию, например
+раз в сутки). archive переносит прошедшие брони старше горизонта в
+reservations_archive (по id они находятся и там) и удаляет опустевшие старые секции;
+о переносе воркеры API узнают событием шины (EVENTS_BACKEND=postgres), без нее
+их нужно перезапустить, иначе ETag и кэш занятости останутся прежними.
+analytics-rebuild заново считает часовые агрегаты занятости по броням и архиву
+(после миграции 0005 и при расхождениях); на время пересчета записи броней
+лучше остановить.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from app.database import SessionLocal, get_engine
+import app.models.table  # noqa: F401
+from app.services.analytics_service import rebuild_utilization
+from app.services.archive_service import (
+    ARCHIVE_BATCH_SIZE,
+    archive_reservations,
+    drop_empty_partitions,
+    ensure_partitions,
+)
+from app.services.events import EVENTS_BACKEND
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "180"))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    partitions = commands.add_parser("partitions", help="Создать месячные секции")
+    partitions.add_argument("--months-ahead", type=int, default=3)
+
+    archive = commands.add_parser("archive", help="Перенести прошедшие брони в архив")
+    archive.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    archive.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+
+    commands.add_parser("analytics-rebuild", help="Пересчитать агрегаты занятости")
+    args = parser.parse_args(argv)
+
+    get_engine()
+    with SessionLocal() as db:
+        if args.command == "partitions":
+            created = ensure_partitions(db, args.months_ahead)
+            print(f"Создано секций: {len(created)} {' '.join(created)}".rstrip())
+        elif args.command == "analytics-rebuild":
+            rows = rebuild_utilization(db)
+            print(f"Строк агрегатов: {rows}")
+        else:
+            cutoff = datetime.utcnow() - timedelta(days=args.older_than_days)
+            moved = archive_reservations(db, cutoff, args.batch_size)
+            dropped = drop_empty_partitions(db, cutoff.date())
+            print(f"Перенесено броней: {moved}; удалено секций: {len(dropped)}")
+            if moved and EVENTS_BACKEND != "postgres":
+                print(
+                    "Внимание: шина событий между процессами не настроена (EVENTS_BACKEND), "
+                    "перезапустите воркеры API, чтобы сбросить ETag и кэш занятости",
+                    file=sys.stderr,
+                )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, DateTime, Integer
+from app.database import Base
+
+class UtilizationHourly(Base):
+    """
+    Занятость стола по часам: секунды броней, попавшие в час [hour_start, hour_start + 1 ч).
+    Поддерживается записями броней, полностью пересчитывается командой
+    python -m app.maintenance analytics-rebuild.
+    """
+    __tablename__ = "utilization_hourly"
+
+    table_id = Column(Integer, primary_key=True)
+    # Начало часа в UTC: день и час суток
+    hour_start = Column(DateTime, primary_key=True, index=True)
+    occupied_seconds = Column(Integer, nullable=False, default=0)
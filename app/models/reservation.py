@@ -1,14 +1,82 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from datetime import timedelta
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey, DateTime, Index, event
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class Reservation(Base):
     __tablename__ = "reservations"
+    __table_args__ = (
+        # Обслуживает проверку пересечений: table_id = ? AND reservation_time < ? AND end_time > ?
+        Index("ix_reservations_table_time", "table_id", "reservation_time", "end_time"),
+        # Keyset-пагинация списка броней по (reservation_time, id)
+        Index("ix_reservations_time_id", "reservation_time", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     customer_name = Column(String)
     table_id = Column(Integer, ForeignKey("tables.id"))
     reservation_time = Column(DateTime)
     duration_minutes = Column(Integer)
+    # Хранится явно (reservation_time + duration_minutes), чтобы условие пересечения было индексируемым
+    end_time = Column(DateTime)
 
     table = relationship("Table")
+
+@event.listens_for(Reservation, "before_insert")
+@event.listens_for(Reservation, "before_update")
+def set_end_time(mapper, connection, target):
+    if target.reservation_time is not None and target.duration_minutes is not None:
+        target.end_time = target.reservation_time + timedelta(minutes=target.duration_minutes)
+
+class ReservationArchive(Base):
+    """
+    Прошедшие брони, перенесенные из reservations командой обслуживания
+    (python -m app.maintenance archive). Внешнего ключа на стол нет: стол
+    могут удалить после переноса его броней.
+    """
+    __tablename__ = "reservations_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    customer_name = Column(String)
+    table_id = Column(Integer)
+    reservation_time = Column(DateTime)
+    duration_minutes = Column(Integer)
+    end_time = Column(DateTime)
+    archived_at = Column(DateTime)
+
+class ReservationSeries(Base):
+    """
+    Повторяющаяся бронь, хранится одной строкой: повторение k (0 <= k < occurrence_count)
+    начинается в reservation_time + k * (interval дней или недель).
+    Повторения вычисляются при чтении и проверках (app/services/recurrence.py).
+    """
+    __tablename__ = "reservation_series"
+    __table_args__ = (
+        # Серии стола, пересекающиеся с интервалом: table_id = ? AND start_epoch < ? AND end_epoch > ?
+        Index("ix_reservation_series_table_range", "table_id", "start_epoch", "end_epoch"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    customer_name = Column(String)
+    table_id = Column(Integer, ForeignKey("tables.id"))
+    # Начало первого повторения (UTC)
+    reservation_time = Column(DateTime)
+    duration_minutes = Column(Integer)
+    # daily или weekly, каждые interval дней или недель
+    frequency = Column(String)
+    interval = Column(Integer)
+    occurrence_count = Column(Integer)
+    # Хранятся явно для целочисленной проверки пересечений в SQL: секунды эпохи
+    # начала первого повторения и конца последнего, шаг повторения в секундах
+    start_epoch = Column(BigInteger)
+    end_epoch = Column(BigInteger)
+    period_seconds = Column(Integer)
+
+@event.listens_for(ReservationSeries, "before_insert")
+@event.listens_for(ReservationSeries, "before_update")
+def set_series_bounds(mapper, connection, target):
+    from app.services.recurrence import series_bounds
+    for name, value in series_bounds(
+        target.reservation_time, target.duration_minutes, target.frequency, target.interval, target.occurrence_count
+    ).items():
+        setattr(target, name, value)
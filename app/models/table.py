@@ -1,8 +1,15 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from app.database import Base
 
 class Table(Base):
     __tablename__ = "tables"
+    __table_args__ = (
+        # Фильтры списка столов с keyset-пагинацией по id
+        Index("ix_tables_location_id", "location", "id"),
+        Index("ix_tables_seats_id", "seats", "id"),
+        # Подбор наименьшего подходящего стола в расположении
+        Index("ix_tables_location_seats_id", "location", "seats", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True)
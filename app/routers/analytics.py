@@ -0,0 +1,53 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from app.database import DbSession, get_read_db, run_db
+from app.schemas.analytics import UtilizationReport
+from app.services.analytics_service import utilization_report
+
+# Ограничение периода отчета
+MAX_RANGE_DAYS = 366
+DEFAULT_RANGE_DAYS = 30
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Analytics"]
+)
+
+@router.get(
+    "/utilization",
+    response_model=UtilizationReport,
+    summary="Занятость столов",
+    description="Доля времени под бронями по столам, расположениям, часам суток или дням (UTC). "
+                "Считается по часовым агрегатам, которые обновляются при записи броней"
+)
+async def get_utilization(
+    date_from: Optional[date] = Query(None, alias="from", description="Первый день (по умолчанию 30 дней назад)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Последний день включительно (по умолчанию сегодня)"),
+    group_by: Literal["table", "location", "hour", "day"] = Query("table", description="Группировка"),
+    db: DbSession = Depends(get_read_db)
+):
+    date_to = date_to or datetime.now(timezone.utc).date()
+    date_from = date_from or date_to - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Начало периода позже конца"
+        )
+    if (date_to - date_from).days >= MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Период не может быть длиннее {MAX_RANGE_DAYS} дней"
+        )
+    return await run_db(db, _get_utilization, date_from, date_to, group_by)
+
+def _get_utilization(db: Session, date_from: date, date_to: date, group_by: str):
+    start = datetime.combine(date_from, time())
+    end = datetime.combine(date_to + timedelta(days=1), time())
+    return {
+        "from": date_from,
+        "to": date_to,
+        "group_by": group_by,
+        "buckets": utilization_report(db, start, end, group_by),
+    }
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import DbSession, get_db, run_db
+from app.schemas.availability import AvailabilityCheck, TableAvailability
+from app.schemas.error import ErrorResponse
+from app.services.availability_service import find_free_slots
+from app.services.intervals import to_utc_naive
+from app.services.occupancy_cache import occupancy_cache
+from app.services.reservation_service import is_table_available, is_table_available_async
+
+# Ограничение окна поиска, чтобы один запрос не выгружал всю историю броней
+MAX_WINDOW = timedelta(days=14)
+
+router = APIRouter(
+    prefix="/availability",
+    tags=["Availability"],
+    responses={
+        400: {"model": ErrorResponse, "description": "Неверные данные"}
+    }
+)
+
+@router.get(
+    "/",
+    response_model=list[TableAvailability],
+    summary="Найти свободные столы",
+    description="Возвращает свободные промежутки всех столов, вмещающих компанию, в указанном окне"
+)
+async def get_availability(
+    party_size: int = Query(..., description="Количество гостей", gt=0, le=20),
+    window_start: datetime = Query(..., alias="from", description="Начало окна поиска"),
+    window_end: datetime = Query(..., alias="to", description="Конец окна поиска"),
+    slot_minutes: int = Query(30, description="Минимальная длительность свободного промежутка", ge=30, le=240),
+    location: Optional[str] = Query(None, description="Расположение стола"),
+    db: DbSession = Depends(get_db)
+):
+    window_start, window_end = to_utc_naive(window_start), to_utc_naive(window_end)
+    if window_end <= window_start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Конец окна должен быть позже начала"
+        )
+    if window_end - window_start > MAX_WINDOW:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Окно поиска не может превышать {MAX_WINDOW.days} дней"
+        )
+    return await run_db(db, find_free_slots, party_size, window_start, window_end, slot_minutes, location)
+
+@router.get(
+    "/check",
+    response_model=AvailabilityCheck,
+    summary="Проверить, свободен ли стол",
+    description="Отвечает из кэша занятости по дням; при промахе загружает брони и серии стола за день"
+)
+async def check_availability(
+    table_id: int = Query(..., description="ID стола", gt=0),
+    reservation_time: datetime = Query(..., description="Время бронирования"),
+    duration_minutes: int = Query(..., description="Длительность бронирования в минутах", ge=30, le=240),
+    db: DbSession = Depends(get_db)
+):
+    if isinstance(db, AsyncSession) and not occupancy_cache.enabled:
+        # Без кэша проверка — один запрос; в асинхронном режиме он выполняется в цикле событий
+        available = await is_table_available_async(db, table_id, to_utc_naive(reservation_time), duration_minutes)
+        return {"table_id": table_id, "available": available}
+    return await run_db(db, _check_availability, table_id, reservation_time, duration_minutes)
+
+def _check_availability(db, table_id: int, reservation_time: datetime, duration_minutes: int):
+    end_time = reservation_time + timedelta(minutes=duration_minutes)
+    if occupancy_cache.enabled:
+        available = occupancy_cache.is_free(db, table_id, reservation_time, end_time)
+    else:
+        available = is_table_available(db, table_id, to_utc_naive(reservation_time), duration_minutes)
+    return {"table_id": table_id, "available": available}
+
+@router.get(
+    "/cache",
+    summary="Статистика кэша занятости",
+    description="Попадания, промахи, вытеснения и объем кэша занятости столов по дням"
+)
+async def get_cache_stats():
+    return occupancy_cache.stats()
@@ -0,0 +1,57 @@
+import asyncio
+import os
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from app.services.events import Subscription, broadcaster
+
+# Комментарий-пинг не дает прокси закрыть простаивающее соединение
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+SSE_RETRY_MS = 3000
+
+router = APIRouter(
+    prefix="/events",
+    tags=["Events"]
+)
+
+async def event_stream(subscription: Subscription):
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n".encode()
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if message is None:
+                # Клиент отстал или сервер останавливается: переподключиться и перечитать состояние
+                yield b"event: reset\ndata: {}\n\n"
+                return
+            yield b"event: reservation\ndata: " + message + b"\n\n"
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+@router.get(
+    "/reservations",
+    summary="Поток изменений броней",
+    description="Server-Sent Events: создание, изменение и удаление броней. "
+                "Фильтр по столу или расположению. Событие reset означает, что клиент "
+                "не успевал читать и должен переподключиться",
+    response_class=StreamingResponse,
+    responses={503: {"description": "Достигнут предел подписчиков"}}
+)
+async def stream_reservation_events(
+    table_id: Optional[int] = Query(None, description="ID стола", gt=0),
+    location: Optional[str] = Query(None, description="Расположение стола")
+):
+    subscription = broadcaster.subscribe(table_id, location)
+    if subscription is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Слишком много подписчиков, повторите позже"
+        )
+    return StreamingResponse(
+        event_stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
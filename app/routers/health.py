@@ -0,0 +1,58 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.core.logger import health_logger
+from app.database import get_async_engine, get_engine, get_replica_engines, pool_status
+from app.services.health_service import DatabaseProbe
+
+router = APIRouter(
+    prefix="/health",
+    tags=["Health"]
+)
+
+database_probe = DatabaseProbe(get_engine, get_async_engine)
+
+def pools_status() -> dict:
+    pools = {"primary": pool_status(get_engine().pool)}
+    async_engine = get_async_engine()
+    if async_engine is not None:
+        pools["async"] = pool_status(async_engine.pool)
+    for number, replica in enumerate(get_replica_engines()):
+        pools[f"replica{number}"] = pool_status(replica.pool)
+    return pools
+
+@router.get("", summary="Проверка работоспособности API")
+async def health_check():
+    """
+    Проверка работоспособности API
+    """
+    health_logger.info("Health check requested")
+    return {"status": "ok"}
+
+@router.get("/live", summary="Проверка живости процесса")
+async def liveness():
+    """
+    Процесс отвечает на запросы; база не проверяется
+    """
+    return {"status": "ok"}
+
+@router.get(
+    "/ready",
+    summary="Готовность принимать трафик",
+    responses={503: {"description": "База данных недоступна"}}
+)
+async def readiness():
+    """
+    Проверяет доступность базы (результат кэшируется на HEALTH_CACHE_TTL секунд)
+    и сообщает заполненность пула соединений
+    """
+    database = await database_probe.check()
+    body = {
+        "status": "ok" if database["ok"] else "unavailable",
+        "database": database,
+        "pools": pools_status(),
+    }
+    if not database["ok"]:
+        if not database["cached"]:
+            health_logger.warning("Readiness check failed: %s", database["error"])
+        return JSONResponse(status_code=503, content=body)
+    return body
@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Response
+from app.database import DbSession, get_db, run_db
+from app.schemas.occupancy import FloorOccupancy
+from app.services.floor_service import floor_snapshot
+from app.services.intervals import to_utc_naive
+
+router = APIRouter(
+    prefix="/occupancy",
+    tags=["Occupancy"]
+)
+
+@router.get(
+    "/",
+    response_model=FloorOccupancy,
+    summary="Занятость зала",
+    description="Все столы по расположениям с текущей или ближайшей бронью или повторением серии. "
+                "Одинаковые снимки в пределах секунды отдаются из кэша"
+)
+async def get_occupancy(
+    at: Optional[datetime] = Query(None, description="Момент снимка (по умолчанию сейчас)"),
+    horizon_hours: int = Query(24, description="Насколько вперед искать ближайшую бронь, часов", gt=0, le=168),
+    db: DbSession = Depends(get_db)
+):
+    moment = to_utc_naive(at) if at is not None else datetime.now(timezone.utc).replace(tzinfo=None)
+    body = await run_db(db, floor_snapshot, moment, timedelta(hours=horizon_hours))
+    return Response(content=body, media_type="application/json")
@@ -1,10 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import delete, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from app.core.conditional import RESERVATIONS_CACHE_CONTROL, conditional_get, versions
+from app.core.metrics import RESERVATION_CONFLICTS
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, finish_page, keyset_page
+from app.core.serialization import column_names, rows_response
+from app.database import DbSession, get_db, get_read_db, is_replica, run_db
 from app.models.reservation import Reservation
-from app.schemas.reservation import ReservationCreate, ReservationOut, ReservationUpdate
+from app.models.table import Table
+from app.schemas.reservation import (
+    BulkImportResult,
+    ReservationAutoCreate,
+    ReservationCreate,
+    ReservationOut,
+    ReservationUpdate,
+)
 from app.schemas.error import ErrorResponse
-from app.services.reservation_service import is_table_available
+from app.services.analytics_service import record_occupancy
+from app.services.archive_service import find_archived
+from app.services.bulk_service import bulk_create_reservations
+from app.services.events import queue_event, reservation_payload, run_and_publish
+from app.services.intervals import to_utc_naive
+from app.services.occupancy_cache import occupancy_cache
+from app.services.reservation_service import (
+    best_fit_tables,
+    conflict_clause,
+    returned_location,
+    lock_table_row,
+)
+
+# Ограничение размера пакета для POST /reservations/bulk
+MAX_BULK_ITEMS = 100_000
+# Повторы подбора стола для POST /reservations/auto после гонки с параллельной записью
+AUTO_ASSIGN_ATTEMPTS = 3
 
 router = APIRouter(
     prefix="/reservations",
@@ -16,35 +48,109 @@ router = APIRouter(
     }
 )
 
-def get_db():
-    db = SessionLocal()
+# Обработчики асинхронные; работа с базой вынесена в синхронные функции _*,
+# которые run_db выполняет через AsyncSession.run_sync или в пуле потоков
+
+def raise_conflict(operation: str, detail: str = "Стол уже забронирован на указанное время"):
+    RESERVATION_CONFLICTS.inc((operation,))
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=detail
+    )
+
+def raise_reservation_not_found(reservation_id: int):
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Бронирование с ID {reservation_id} не найдено"
+    )
+
+# Ограничение исключения в PostgreSQL отклоняет пересечение, проскочившее мимо проверки
+
+def commit_or_conflict(db: Session, operation: str):
     try:
-        yield db
-    finally:
-        db.close()
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise_conflict(operation)
+
+def execute_or_conflict(db: Session, statement, operation: str):
+    try:
+        return db.execute(statement)
+    except IntegrityError:
+        db.rollback()
+        raise_conflict(operation)
 
 @router.get(
     "/",
     response_model=list[ReservationOut],
     summary="Получить список всех бронирований",
-    description="Возвращает список всех бронирований в ресторане"
+    description="Возвращает страницу бронирований, упорядоченных по времени. "
+                "Курсор следующей страницы передается в заголовке X-Next-Cursor"
+)
+async def get_reservations(
+    request: Request,
+    response: Response,
+    table_id: Optional[int] = Query(None, description="ID стола", gt=0),
+    time_from: Optional[datetime] = Query(None, alias="from", description="Начало не раньше"),
+    time_to: Optional[datetime] = Query(None, alias="to", description="Начало раньше"),
+    cursor: Optional[str] = Query(None, description="Курсор из заголовка X-Next-Cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, description="Размер страницы", gt=0, le=MAX_PAGE_SIZE),
+    db: DbSession = Depends(get_read_db)
+):
+    not_modified = conditional_get(request, response, "reservations", RESERVATIONS_CACHE_CONTROL, is_replica(db))
+    if not_modified:
+        return not_modified
+    return await run_db(db, _get_reservations, response, table_id, time_from, time_to, cursor, limit)
+
+# Колонки списка в порядке полей ReservationOut: строки сериализуются без моделей
+LIST_COLUMNS = (
+    Reservation.customer_name,
+    Reservation.table_id,
+    Reservation.reservation_time,
+    Reservation.duration_minutes,
+    Reservation.id,
 )
-def get_reservations(db: Session = Depends(get_db)):
-    return db.query(Reservation).all()
+LIST_FIELDS = column_names(LIST_COLUMNS)
+# Запись брони возвращает поля ответа и расположение стола для события (RETURNING)
+RETURNING_COLUMNS = (*LIST_COLUMNS, returned_location())
+INSERT_FIELDS = ("customer_name", "table_id", "reservation_time", "duration_minutes", "end_time")
+# Поля, изменение которых требует проверки пересечений
+SCHEDULE_FIELDS = {"table_id", "reservation_time", "duration_minutes"}
+
+def _get_reservations(db: Session, response, table_id, time_from, time_to, cursor, limit):
+    query = db.query(*LIST_COLUMNS)
+    if table_id is not None:
+        query = query.filter(Reservation.table_id == table_id)
+    if time_from is not None:
+        query = query.filter(Reservation.reservation_time >= to_utc_naive(time_from))
+    if time_to is not None:
+        query = query.filter(Reservation.reservation_time < to_utc_naive(time_to))
+
+    query = keyset_page(
+        query, (Reservation.reservation_time, Reservation.id), (datetime, int), cursor, limit
+    )
+    rows = finish_page(query.all(), limit, lambda r: (r.reservation_time, r.id), response)
+    return rows_response(rows, LIST_FIELDS, response)
 
 @router.get(
     "/{reservation_id}",
     response_model=ReservationOut,
     summary="Получить информацию о бронировании",
-    description="Возвращает подробную информацию о конкретном бронировании"
+    description="Возвращает подробную информацию о конкретном бронировании, в том числе перенесенном в архив"
 )
-def get_reservation(reservation_id: int, db: Session = Depends(get_db)):
+async def get_reservation(reservation_id: int, request: Request, response: Response, db: DbSession = Depends(get_read_db)):
+    not_modified = conditional_get(request, response, "reservations", RESERVATIONS_CACHE_CONTROL, is_replica(db))
+    if not_modified:
+        return not_modified
+    return await run_db(db, _get_reservation, reservation_id)
+
+def _get_reservation(db: Session, reservation_id: int):
     reservation = db.query(Reservation).filter(Reservation.id == reservation_id).first()
     if not reservation:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Бронирование с ID {reservation_id} не найдено"
-        )
+        # Прошедшие брони переносятся в архив; он читается только при промахе
+        reservation = find_archived(db, reservation_id)
+    if not reservation:
+        raise_reservation_not_found(reservation_id)
     return reservation
 
 @router.post(
@@ -54,18 +160,162 @@ def get_reservation(reservation_id: int, db: Session = Depends(get_db)):
     summary="Создать новое бронирование",
     description="Создает новое бронирование стола"
 )
-def create_reservation(reservation: ReservationCreate, db: Session = Depends(get_db)):
-    if not is_table_available(db, reservation.table_id, reservation.reservation_time, reservation.duration_minutes):
+async def create_reservation(reservation: ReservationCreate, db: DbSession = Depends(get_db)):
+    return await run_and_publish(db, _create_reservation, reservation)
+
+def _create_reservation(db: Session, reservation: ReservationCreate):
+    # Одна вставка с RETURNING: строка выбирается из стола (нет стола — нет строки),
+    # пересечение исключает NOT EXISTS в том же запросе. Параллельные записи
+    # стола ждут друг друга на FOR UPDATE его строки до вставки; в SQLite —
+    # на блокировке записи
+    start = to_utc_naive(reservation.reservation_time)
+    end = start + timedelta(minutes=reservation.duration_minutes)
+    lock_table_row(db, reservation.table_id)
+    statement = insert_for_table(
+        reservation.customer_name, reservation.table_id, start, reservation.duration_minutes, end
+    )
+    row = execute_or_conflict(db, statement, "create").first()
+    if row is None:
+        # Причина отказа выясняется только в этом случае
+        if db.get(Table, reservation.table_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Стол с ID {reservation.table_id} не найден"
+            )
+        raise_conflict("create")
+    return finish_create(db, row, end)
+
+def insert_for_table(customer_name: str, table_id: int, start: datetime, duration_minutes: int, end: datetime):
+    source = select(
+        literal(customer_name),
+        Table.id,
+        literal(start),
+        literal(duration_minutes),
+        literal(end),
+    ).where(
+        Table.id == table_id,
+        ~conflict_clause(table_id, start, duration_minutes),
+    )
+    return (
+        insert(Reservation.__table__)
+        .from_select(INSERT_FIELDS, source)
+        .returning(*RETURNING_COLUMNS)
+    )
+
+def finish_create(db: Session, row, end: datetime):
+    record_occupancy(db, [(row.table_id, row.reservation_time, end, 1)])
+    db.commit()
+    versions.bump("reservations")
+    occupancy_cache.invalidate(row.table_id, row.reservation_time, end)
+    queue_event(db, {
+        "type": "created",
+        "table_id": row.table_id,
+        "location": row.location,
+        "reservation": reservation_payload(row),
+    })
+    return row
+
+@router.post(
+    "/auto",
+    response_model=ReservationOut,
+    status_code=status.HTTP_201_CREATED,
+    summary="Забронировать подходящий стол",
+    description="Выбирает наименьший свободный стол, вмещающий компанию "
+                "(при указании расположения — только в нем), и бронирует его одним запросом"
+)
+async def create_reservation_auto(reservation: ReservationAutoCreate, db: DbSession = Depends(get_db)):
+    return await run_and_publish(db, _create_reservation_auto, reservation)
+
+def _create_reservation_auto(db: Session, reservation: ReservationAutoCreate):
+    # Наименьший свободный стол выбирается без блокировок, затем блокируется
+    # и бронируется той же вставкой, что и POST /reservations. Если стол заняли
+    # между выбором и блокировкой, вставка не вернет строку, и подбор повторяется
+    start = to_utc_naive(reservation.reservation_time)
+    end = start + timedelta(minutes=reservation.duration_minutes)
+    candidate = best_fit_tables(
+        reservation.party_size, start, reservation.duration_minutes, reservation.location
+    ).limit(1)
+    row = None
+    for _ in range(AUTO_ASSIGN_ATTEMPTS):
+        table_id = db.scalar(candidate)
+        if table_id is None:
+            break
+        lock_table_row(db, table_id)
+        statement = insert_for_table(
+            reservation.customer_name, table_id, start, reservation.duration_minutes, end
+        )
+        row = execute_or_conflict(db, statement, "auto").first()
+        if row is not None:
+            break
+    if row is None:
+        fitting = select(Table.id).where(Table.seats >= reservation.party_size)
+        if reservation.location is not None:
+            fitting = fitting.where(Table.location == reservation.location)
+        if db.scalar(fitting.limit(1)) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Нет столов на {reservation.party_size} гостей"
+            )
+        raise_conflict("auto", "Нет свободного стола на указанное время")
+    return finish_create(db, row, end)
+
+@router.post(
+    "/bulk",
+    response_model=BulkImportResult,
+    summary="Пакетно создать бронирования",
+    description="Принимает JSON-массив или NDJSON (application/x-ndjson) бронирований. "
+                "Конфликты ищутся внутри пакета и с уже сохраненными бронями; "
+                "принятые элементы создаются, по каждому элементу возвращается результат"
+)
+async def create_reservations_bulk(request: Request, db: DbSession = Depends(get_db)):
+    items = parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    return await run_and_publish(db, _create_reservations_bulk, items)
+
+def parse_bulk_body(body: bytes, content_type: str) -> list:
+    try:
+        if "ndjson" in content_type or "jsonlines" in content_type:
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+    except ValueError:
+        items = None
+    if not isinstance(items, list):
         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Стол уже забронирован на указанное время"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Тело запроса должно быть JSON-массивом или NDJSON"
         )
-    
-    new_res = Reservation(**reservation.dict())
-    db.add(new_res)
-    db.commit()
-    db.refresh(new_res)
-    return new_res
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Пакет не может содержать больше {MAX_BULK_ITEMS} элементов"
+        )
+    return items
+
+def _create_reservations_bulk(db: Session, items: list):
+    results, created_intervals = bulk_create_reservations(db, items)
+    created_per_table = {}
+    for table_id, _, _ in created_intervals:
+        created_per_table[table_id] = created_per_table.get(table_id, 0) + 1
+    # Столы уже загружены блокировкой в bulk_create_reservations: get не ходит в базу
+    locations = {table_id: db.get(Table, table_id).location for table_id in created_per_table}
+    record_occupancy(db, [(table_id, start, end, 1) for table_id, start, end in created_intervals])
+    commit_or_conflict(db, "bulk")
+    versions.bump("reservations")
+    for table_id, start, end in created_intervals:
+        occupancy_cache.invalidate(table_id, start, end)
+    # Одно событие на стол, а не на каждую из возможных сотен тысяч броней
+    for table_id, count in created_per_table.items():
+        queue_event(db, {
+            "type": "bulk_created",
+            "table_id": table_id,
+            "location": locations[table_id],
+            "count": count,
+        })
+    created = sum(1 for result in results if result["status"] == "created")
+    conflicts = sum(1 for result in results if result["status"] == "conflict")
+    if conflicts:
+        RESERVATION_CONFLICTS.inc(("bulk",), conflicts)
+    return {"created": created, "rejected": len(results) - created, "items": results}
 
 @router.put(
     "/{reservation_id}",
@@ -73,32 +323,81 @@ def create_reservation(reservation: ReservationCreate, db: Session = Depends(get
     summary="Обновить информацию о бронировании",
     description="Обновляет информацию о существующем бронировании"
 )
-def update_reservation(reservation_id: int, reservation_update: ReservationUpdate, db: Session = Depends(get_db)):
-    db_reservation = db.query(Reservation).filter(Reservation.id == reservation_id).first()
-    if not db_reservation:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Бронирование с ID {reservation_id} не найдено"
-        )
-    
+async def update_reservation(reservation_id: int, reservation_update: ReservationUpdate, db: DbSession = Depends(get_db)):
+    return await run_and_publish(db, _update_reservation, reservation_id, reservation_update)
+
+def _update_reservation(db: Session, reservation_id: int, reservation_update: ReservationUpdate):
     update_data = reservation_update.dict(exclude_unset=True)
-    if 'table_id' in update_data or 'reservation_time' in update_data or 'duration_minutes' in update_data:
-        table_id = update_data.get('table_id', db_reservation.table_id)
-        reservation_time = update_data.get('reservation_time', db_reservation.reservation_time)
-        duration_minutes = update_data.get('duration_minutes', db_reservation.duration_minutes)
-        
-        if not is_table_available(db, table_id, reservation_time, duration_minutes, exclude_reservation_id=reservation_id):
+    if not update_data:
+        return _get_reservation(db, reservation_id)
+    if update_data.get("reservation_time") is not None:
+        update_data["reservation_time"] = to_utc_naive(update_data["reservation_time"])
+
+    statement = update(Reservation).where(Reservation.id == reservation_id)
+    previous = None
+    if SCHEDULE_FIELDS & update_data.keys():
+        # Прежний интервал нужен для проверки пересечений нового, события и кэша
+        previous = db.execute(
+            select(
+                Reservation.table_id,
+                Reservation.reservation_time,
+                Reservation.duration_minutes,
+                Reservation.end_time,
+                Table.location,
+            )
+            .outerjoin(Table, Table.id == Reservation.table_id)
+            .where(Reservation.id == reservation_id)
+        ).first()
+        if previous is None:
+            raise_reservation_not_found(reservation_id)
+        table_id = update_data.get("table_id", previous.table_id)
+        start = update_data.get("reservation_time", previous.reservation_time)
+        duration = update_data.get("duration_minutes", previous.duration_minutes)
+        update_data["end_time"] = start + timedelta(minutes=duration)
+        lock_table_row(db, table_id)
+        statement = statement.where(
+            # Строка не менялась после чтения, иначе проверка ниже устарела
+            Reservation.table_id == previous.table_id,
+            Reservation.reservation_time == previous.reservation_time,
+            Reservation.duration_minutes == previous.duration_minutes,
+            select(Table.id).where(Table.id == table_id).exists(),
+            ~conflict_clause(table_id, start, duration, exclude_reservation_id=reservation_id),
+        )
+
+    statement = (
+        statement.values(**update_data)
+        .returning(*RETURNING_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    row = execute_or_conflict(db, statement, "update").first()
+    if row is None:
+        if previous is None:
+            raise_reservation_not_found(reservation_id)
+        if db.get(Table, table_id) is None:
             raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="Стол уже забронирован на указанное время"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Стол с ID {table_id} не найден"
             )
-    
-    for field, value in update_data.items():
-        setattr(db_reservation, field, value)
-    
+        raise_conflict("update")
+    if previous is not None:
+        record_occupancy(db, [
+            (previous.table_id, previous.reservation_time, previous.end_time, -1),
+            (row.table_id, row.reservation_time, update_data["end_time"], 1),
+        ])
     db.commit()
-    db.refresh(db_reservation)
-    return db_reservation
+    versions.bump("reservations")
+    if previous is not None:
+        occupancy_cache.invalidate(previous.table_id, previous.reservation_time, previous.end_time)
+        occupancy_cache.invalidate(row.table_id, row.reservation_time, update_data["end_time"])
+    queue_event(db, {
+        "type": "updated",
+        "table_id": row.table_id,
+        "location": row.location,
+        "previous_table_id": previous.table_id if previous else row.table_id,
+        "previous_location": previous.location if previous else row.location,
+        "reservation": reservation_payload(row),
+    })
+    return row
 
 @router.delete(
     "/{reservation_id}",
@@ -106,13 +405,26 @@ def update_reservation(reservation_id: int, reservation_update: ReservationUpdat
     summary="Удалить бронирование",
     description="Удаляет бронирование из системы"
 )
-def delete_reservation(reservation_id: int, db: Session = Depends(get_db)):
-    reservation = db.query(Reservation).filter(Reservation.id == reservation_id).first()
-    if not reservation:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Бронирование с ID {reservation_id} не найдено"
-        )
-    
-    db.delete(reservation)
+async def delete_reservation(reservation_id: int, db: DbSession = Depends(get_db)):
+    await run_and_publish(db, _delete_reservation, reservation_id)
+
+def _delete_reservation(db: Session, reservation_id: int):
+    row = db.execute(
+        delete(Reservation)
+        .where(Reservation.id == reservation_id)
+        .returning(Reservation.table_id, Reservation.reservation_time, Reservation.end_time, returned_location())
+        # Загруженный в сессию объект помечается удаленным без дополнительного запроса
+        .execution_options(synchronize_session="evaluate")
+    ).first()
+    if row is None:
+        raise_reservation_not_found(reservation_id)
+    record_occupancy(db, [(row.table_id, row.reservation_time, row.end_time, -1)])
     db.commit()
+    versions.bump("reservations")
+    occupancy_cache.invalidate(row.table_id, row.reservation_time, row.end_time)
+    queue_event(db, {
+        "type": "deleted",
+        "table_id": row.table_id,
+        "location": row.location,
+        "reservation": {"id": reservation_id},
+    })
@@ -0,0 +1,278 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+from app.core.conditional import versions
+from app.core.metrics import RESERVATION_CONFLICTS
+from app.database import DbSession, get_db, get_read_db, run_db
+from app.models.reservation import ReservationSeries
+from app.models.table import Table
+from app.schemas.error import ErrorResponse
+from app.schemas.series import Occurrence, SeriesConflictResponse, SeriesCreate, SeriesOut, SeriesUpdate
+from app.services.analytics_service import record_occupancy
+from app.services.events import queue_event, run_and_publish
+from app.services.intervals import to_utc_naive
+from app.services.occupancy_cache import occupancy_cache
+from app.services.recurrence import MAX_OCCURRENCES, count_until, last_start, occurrences, series_bounds
+from app.services.reservation_service import lock_table, returned_location
+from app.services.series_service import SeriesConflictError, find_series_conflicts
+
+router = APIRouter(
+    prefix="/reservations/series",
+    tags=["Reservation series"],
+    responses={
+        404: {"model": ErrorResponse, "description": "Серия или стол не найдены"},
+        400: {"model": ErrorResponse, "description": "Неверные данные"},
+        409: {"model": SeriesConflictResponse, "description": "Повторения пересекаются с бронями"}
+    }
+)
+
+SERIES_COLUMNS = (
+    ReservationSeries.id,
+    ReservationSeries.customer_name,
+    ReservationSeries.table_id,
+    ReservationSeries.reservation_time,
+    ReservationSeries.duration_minutes,
+    ReservationSeries.frequency,
+    ReservationSeries.interval,
+    ReservationSeries.occurrence_count,
+    ReservationSeries.period_seconds,
+    returned_location("reservation_series"),
+)
+# Поля, изменение которых меняет повторения
+SCHEDULE_FIELDS = ("table_id", "reservation_time", "duration_minutes", "frequency", "interval", "occurrence_count")
+
+def series_payload(series) -> dict:
+    return {
+        "id": series.id,
+        "customer_name": series.customer_name,
+        "table_id": series.table_id,
+        "reservation_time": series.reservation_time,
+        "duration_minutes": series.duration_minutes,
+        "frequency": series.frequency,
+        "interval": series.interval,
+        "count": series.occurrence_count,
+        "until": last_start(series).date(),
+    }
+
+def raise_series_not_found(series_id: int):
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Серия с ID {series_id} не найдена"
+    )
+
+def conflict_response(error: SeriesConflictError) -> JSONResponse:
+    RESERVATION_CONFLICTS.inc(("series",))
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content=jsonable_encoder(SeriesConflictResponse(
+            detail="Повторения серии пересекаются с бронями стола",
+            conflicts=error.conflicts,
+        ))
+    )
+
+def resolve_count(values: dict, until):
+    if until is not None:
+        values["occurrence_count"] = count_until(
+            values["reservation_time"], values["frequency"], values["interval"], until
+        )
+    if not 0 < values["occurrence_count"] <= MAX_OCCURRENCES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Серия должна содержать от 1 до {MAX_OCCURRENCES} повторений"
+        )
+
+def check_schedule(db: Session, values: dict, exclude_series_id: int = None):
+    # Блокировка стола упорядочивает запись серии с другими записями стола;
+    # повторения проверяются одним запросом по диапазону серии
+    if lock_table(db, values["table_id"]) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Стол с ID {values['table_id']} не найден"
+        )
+    bounds = series_bounds(
+        values["reservation_time"], values["duration_minutes"], values["frequency"],
+        values["interval"], values["occurrence_count"]
+    )
+    values.update(bounds)
+    planned = list(occurrences(ReservationSeries(**values)))
+    conflicts = find_series_conflicts(db, values["table_id"], planned, exclude_series_id)
+    if conflicts:
+        raise SeriesConflictError(conflicts)
+
+def occurrence_changes(series, sign: int) -> list:
+    return [(series.table_id, start, end, sign) for _, start, end in occurrences(series)]
+
+# Путь без завершающей косой черты: иначе /reservations/series совпал бы
+# с /reservations/{reservation_id} (405) до перенаправления на версию со слешем
+@router.post(
+    "",
+    response_model=SeriesOut,
+    status_code=status.HTTP_201_CREATED,
+    summary="Создать серию бронирований",
+    description="Повторяющаяся бронь стола (каждые N дней или недель) до даты или заданное число раз. "
+                "Все повторения проверяются разом; при пересечениях возвращается 409 со списком повторений"
+)
+async def create_series(series: SeriesCreate, db: DbSession = Depends(get_db)):
+    try:
+        return await run_and_publish(db, _create_series, series)
+    except SeriesConflictError as error:
+        return conflict_response(error)
+
+def _create_series(db: Session, series: SeriesCreate):
+    values = {
+        "customer_name": series.customer_name,
+        "table_id": series.table_id,
+        "reservation_time": to_utc_naive(series.reservation_time),
+        "duration_minutes": series.duration_minutes,
+        "frequency": series.frequency,
+        "interval": series.interval,
+        "occurrence_count": series.count,
+    }
+    resolve_count(values, series.until)
+    check_schedule(db, values)
+    row = db.execute(insert(ReservationSeries).values(**values).returning(*SERIES_COLUMNS)).one()
+    record_occupancy(db, occurrence_changes(row, 1))
+    db.commit()
+    versions.bump("reservations")
+    occupancy_cache.invalidate_table(row.table_id)
+    payload = series_payload(row)
+    queue_event(db, {
+        "type": "series_created",
+        "table_id": row.table_id,
+        "location": row.location,
+        "series": payload,
+    })
+    return payload
+
+@router.get(
+    "/{series_id}",
+    response_model=SeriesOut,
+    summary="Получить серию бронирований"
+)
+async def get_series(series_id: int, db: DbSession = Depends(get_read_db)):
+    return await run_db(db, _get_series, series_id)
+
+def _get_series(db: Session, series_id: int):
+    series = db.get(ReservationSeries, series_id)
+    if series is None:
+        raise_series_not_found(series_id)
+    return series_payload(series)
+
+@router.get(
+    "/{series_id}/occurrences",
+    response_model=list[Occurrence],
+    summary="Повторения серии",
+    description="Повторения, пересекающиеся с окном [from, to); вычисляются при запросе, без хранения"
+)
+async def get_series_occurrences(
+    series_id: int,
+    time_from: Optional[datetime] = Query(None, alias="from", description="Начало окна"),
+    time_to: Optional[datetime] = Query(None, alias="to", description="Конец окна"),
+    db: DbSession = Depends(get_read_db)
+):
+    return await run_db(db, _get_series_occurrences, series_id, time_from, time_to)
+
+def _get_series_occurrences(db: Session, series_id: int, time_from, time_to):
+    series = db.get(ReservationSeries, series_id)
+    if series is None:
+        raise_series_not_found(series_id)
+    return [
+        {"index": index, "start": start, "end": end}
+        for index, start, end in occurrences(series, to_utc_naive(time_from), to_utc_naive(time_to))
+    ]
+
+@router.put(
+    "/{series_id}",
+    response_model=SeriesOut,
+    summary="Изменить серию бронирований",
+    description="Изменение расписания заново проверяет все повторения серии"
+)
+async def update_series(series_id: int, series_update: SeriesUpdate, db: DbSession = Depends(get_db)):
+    try:
+        return await run_and_publish(db, _update_series, series_id, series_update)
+    except SeriesConflictError as error:
+        return conflict_response(error)
+
+def _update_series(db: Session, series_id: int, series_update: SeriesUpdate):
+    update_data = series_update.dict(exclude_unset=True)
+    previous = db.get(ReservationSeries, series_id, with_for_update=True)
+    if previous is None:
+        raise_series_not_found(series_id)
+    if not update_data:
+        return series_payload(previous)
+    until = update_data.pop("until", None)
+    if update_data.get("count") is not None:
+        update_data["occurrence_count"] = update_data.pop("count")
+    if update_data.get("reservation_time") is not None:
+        update_data["reservation_time"] = to_utc_naive(update_data["reservation_time"])
+    values = {
+        field: update_data.get(field) if update_data.get(field) is not None else getattr(previous, field)
+        for field in ("customer_name", *SCHEDULE_FIELDS)
+    }
+    resolve_count(values, until)
+    rescheduled = any(values[field] != getattr(previous, field) for field in SCHEDULE_FIELDS)
+    # Объект в сессии устаревает после UPDATE и перечитывается после commit
+    previous_table_id = previous.table_id
+    if rescheduled:
+        check_schedule(db, values, exclude_series_id=series_id)
+        removed = occurrence_changes(previous, -1)
+    row = db.execute(
+        update(ReservationSeries)
+        .where(ReservationSeries.id == series_id)
+        .values(**values)
+        .returning(*SERIES_COLUMNS)
+        .execution_options(synchronize_session=False)
+    ).one()
+    previous_location = row.location
+    if rescheduled:
+        record_occupancy(db, removed + occurrence_changes(row, 1))
+        if previous_table_id != row.table_id:
+            previous_location = db.scalar(select(Table.location).where(Table.id == previous_table_id))
+    db.commit()
+    versions.bump("reservations")
+    if rescheduled:
+        occupancy_cache.invalidate_table(previous_table_id)
+        occupancy_cache.invalidate_table(row.table_id)
+    payload = series_payload(row)
+    queue_event(db, {
+        "type": "series_updated",
+        "table_id": row.table_id,
+        "location": row.location,
+        "previous_table_id": previous_table_id,
+        "previous_location": previous_location,
+        "series": payload,
+    })
+    return payload
+
+@router.delete(
+    "/{series_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Удалить серию бронирований",
+    description="Удаляет серию со всеми повторениями"
+)
+async def delete_series(series_id: int, db: DbSession = Depends(get_db)):
+    await run_and_publish(db, _delete_series, series_id)
+
+def _delete_series(db: Session, series_id: int):
+    row = db.execute(
+        delete(ReservationSeries)
+        .where(ReservationSeries.id == series_id)
+        .returning(*SERIES_COLUMNS)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        raise_series_not_found(series_id)
+    record_occupancy(db, occurrence_changes(row, -1))
+    db.commit()
+    versions.bump("reservations")
+    occupancy_cache.invalidate_table(row.table_id)
+    queue_event(db, {
+        "type": "series_deleted",
+        "table_id": row.table_id,
+        "location": row.location,
+        "series": {"id": series_id},
+    })
@@ -1,9 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date, datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from app.core.conditional import TABLES_CACHE_CONTROL, conditional_get, versions
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, finish_page, keyset_page
+from app.core.serialization import column_names, rows_response
+from app.database import DbSession, get_db, get_read_db, is_replica, run_db
 from app.models.table import Table
+from app.schemas.schedule import TableSchedule
 from app.schemas.table import TableCreate, TableOut, TableUpdate
 from app.schemas.error import ErrorResponse
+from app.services.events import queue_event, run_and_publish
+from app.services.occupancy_cache import occupancy_cache
+from app.services.schedule_service import table_schedule
+
+# Ограничение диапазона расписания (недельный вид и запас)
+MAX_SCHEDULE_DAYS = 14
 
 router = APIRouter(
     prefix="/tables",
@@ -15,21 +29,53 @@ router = APIRouter(
     }
 )
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def raise_table_not_found(table_id: int):
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Стол с ID {table_id} не найден"
+    )
+
+def raise_name_conflict(name: str):
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Стол с названием '{name}' уже существует"
+    )
 
 @router.get(
     "/",
     response_model=list[TableOut],
     summary="Получить список всех столов",
-    description="Возвращает список всех доступных столов в ресторане"
+    description="Возвращает страницу столов ресторана. "
+                "Курсор следующей страницы передается в заголовке X-Next-Cursor"
 )
-def get_tables(db: Session = Depends(get_db)):
-    return db.query(Table).all()
+async def get_tables(
+    request: Request,
+    response: Response,
+    location: Optional[str] = Query(None, description="Расположение стола"),
+    min_seats: Optional[int] = Query(None, description="Минимальное количество мест", gt=0),
+    cursor: Optional[str] = Query(None, description="Курсор из заголовка X-Next-Cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, description="Размер страницы", gt=0, le=MAX_PAGE_SIZE),
+    db: DbSession = Depends(get_read_db)
+):
+    not_modified = conditional_get(request, response, "tables", TABLES_CACHE_CONTROL, is_replica(db))
+    if not_modified:
+        return not_modified
+    return await run_db(db, _get_tables, response, location, min_seats, cursor, limit)
+
+# Колонки списка в порядке полей TableOut: строки сериализуются без моделей
+LIST_COLUMNS = (Table.name, Table.seats, Table.location, Table.id)
+LIST_FIELDS = column_names(LIST_COLUMNS)
+
+def _get_tables(db: Session, response, location, min_seats, cursor, limit):
+    query = db.query(*LIST_COLUMNS)
+    if location is not None:
+        query = query.filter(Table.location == location)
+    if min_seats is not None:
+        query = query.filter(Table.seats >= min_seats)
+
+    query = keyset_page(query, (Table.id,), (int,), cursor, limit)
+    rows = finish_page(query.all(), limit, lambda t: (t.id,), response)
+    return rows_response(rows, LIST_FIELDS, response)
 
 @router.get(
     "/{table_id}",
@@ -37,14 +83,42 @@ def get_tables(db: Session = Depends(get_db)):
     summary="Получить информацию о столе",
     description="Возвращает подробную информацию о конкретном столе"
 )
-def get_table(table_id: int, db: Session = Depends(get_db)):
+async def get_table(table_id: int, request: Request, response: Response, db: DbSession = Depends(get_read_db)):
+    not_modified = conditional_get(request, response, "tables", TABLES_CACHE_CONTROL, is_replica(db))
+    if not_modified:
+        return not_modified
+    return await run_db(db, _get_table, table_id)
+
+def _get_table(db: Session, table_id: int):
     table = db.query(Table).filter(Table.id == table_id).first()
     if not table:
+        raise_table_not_found(table_id)
+    return table
+
+@router.get(
+    "/{table_id}/schedule",
+    response_model=TableSchedule,
+    summary="Расписание стола",
+    description="Брони и свободные промежутки стола по дням (UTC) одним запросом. "
+                "Промежутки короче 30 минут не возвращаются"
+)
+async def get_table_schedule(
+    table_id: int,
+    day: Optional[date] = Query(None, alias="date", description="Первый день (по умолчанию сегодня, UTC)"),
+    days: int = Query(1, description="Количество дней", gt=0, le=MAX_SCHEDULE_DAYS),
+    db: DbSession = Depends(get_read_db)
+):
+    first_day = day or datetime.now(timezone.utc).date()
+    return await run_db(db, _get_table_schedule, table_id, first_day, days)
+
+def _get_table_schedule(db: Session, table_id: int, first_day: date, days: int):
+    schedule = table_schedule(db, table_id, first_day, days)
+    if schedule is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Стол с ID {table_id} не найден"
         )
-    return table
+    return schedule
 
 @router.post(
     "/",
@@ -53,19 +127,20 @@ def get_table(table_id: int, db: Session = Depends(get_db)):
     summary="Создать новый стол",
     description="Создает новый стол в ресторане"
 )
-def create_table(table: TableCreate, db: Session = Depends(get_db)):
-    existing_table = db.query(Table).filter(Table.name == table.name).first()
-    if existing_table:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=f"Стол с названием '{table.name}' уже существует"
-        )
-    
-    new_table = Table(**table.dict())
-    db.add(new_table)
+async def create_table(table: TableCreate, db: DbSession = Depends(get_db)):
+    return await run_and_publish(db, _create_table, table)
+
+def _create_table(db: Session, table: TableCreate):
+    # Уникальность названия проверяет сама база: одна вставка с RETURNING
+    try:
+        row = db.execute(insert(Table).values(**table.dict()).returning(*LIST_COLUMNS)).one()
+    except IntegrityError:
+        db.rollback()
+        raise_name_conflict(table.name)
     db.commit()
-    db.refresh(new_table)
-    return new_table
+    versions.bump("tables")
+    queue_event(db, {"type": "table_created", "table_id": row.id, "location": row.location})
+    return row
 
 @router.put(
     "/{table_id}",
@@ -73,21 +148,30 @@ def create_table(table: TableCreate, db: Session = Depends(get_db)):
     summary="Обновить информацию о столе",
     description="Обновляет информацию о существующем столе"
 )
-def update_table(table_id: int, table_update: TableUpdate, db: Session = Depends(get_db)):
-    db_table = db.query(Table).filter(Table.id == table_id).first()
-    if not db_table:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Стол с ID {table_id} не найден"
-        )
-    
+async def update_table(table_id: int, table_update: TableUpdate, db: DbSession = Depends(get_db)):
+    return await run_and_publish(db, _update_table, table_id, table_update)
+
+def _update_table(db: Session, table_id: int, table_update: TableUpdate):
     update_data = table_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_table, field, value)
-    
+    if not update_data:
+        return _get_table(db, table_id)
+    try:
+        row = db.execute(
+            update(Table)
+            .where(Table.id == table_id)
+            .values(**update_data)
+            .returning(*LIST_COLUMNS)
+            .execution_options(synchronize_session=False)
+        ).first()
+    except IntegrityError:
+        db.rollback()
+        raise_name_conflict(update_data.get("name"))
+    if row is None:
+        raise_table_not_found(table_id)
     db.commit()
-    db.refresh(db_table)
-    return db_table
+    versions.bump("tables")
+    queue_event(db, {"type": "table_updated", "table_id": table_id, "location": row.location})
+    return row
 
 @router.delete(
     "/{table_id}",
@@ -95,13 +179,27 @@ def update_table(table_id: int, table_update: TableUpdate, db: Session = Depends
     summary="Удалить стол",
     description="Удаляет стол из системы"
 )
-def delete_table(table_id: int, db: Session = Depends(get_db)):
-    table = db.query(Table).filter(Table.id == table_id).first()
-    if not table:
+async def delete_table(table_id: int, db: DbSession = Depends(get_db)):
+    await run_and_publish(db, _delete_table, table_id)
+
+def _delete_table(db: Session, table_id: int):
+    try:
+        row = db.execute(
+            delete(Table)
+            .where(Table.id == table_id)
+            .returning(Table.location)
+            .execution_options(synchronize_session="evaluate")
+        ).first()
+    except IntegrityError:
+        # Внешний ключ броней (PostgreSQL) не дает удалить стол с бронями
+        db.rollback()
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Стол с ID {table_id} не найден"
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"У стола с ID {table_id} есть бронирования"
         )
-    
-    db.delete(table)
+    if row is None:
+        raise_table_not_found(table_id)
     db.commit()
+    versions.bump("tables", "reservations")
+    occupancy_cache.invalidate_table(table_id)
+    queue_event(db, {"type": "table_deleted", "table_id": table_id, "location": row.location})
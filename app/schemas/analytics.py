@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+from datetime import date
+from typing import List, Union
+
+class UtilizationBucket(BaseModel):
+    key: Union[int, str] = Field(..., description="ID стола, расположение, час суток (0–23) или день (YYYY-MM-DD)")
+    occupied_minutes: float = Field(..., description="Занято броней, минут")
+    available_minutes: float = Field(..., description="Доступно за период, минут (круглые сутки)")
+    utilization: float = Field(..., description="Доля занятого времени, 0–1")
+
+class UtilizationReport(BaseModel):
+    date_from: date = Field(..., alias="from", description="Первый день периода (UTC)")
+    date_to: date = Field(..., alias="to", description="Последний день периода (UTC), включительно")
+    group_by: str = Field(..., description="Группировка: table, location, hour или day")
+    buckets: List[UtilizationBucket] = Field(..., description="Занятость по группам")
+
+    class Config:
+        allow_population_by_field_name = True
+        schema_extra = {
+            "example": {
+                "from": "2024-04-01",
+                "to": "2024-04-07",
+                "group_by": "location",
+                "buckets": [
+                    {"key": "Зал 1", "occupied_minutes": 2520.0, "available_minutes": 40320.0, "utilization": 0.0625}
+                ]
+            }
+        }
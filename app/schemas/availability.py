@@ -0,0 +1,37 @@
+from pydantic import BaseModel, Field, validator
+from datetime import datetime, timezone
+from typing import List
+
+class FreeSlot(BaseModel):
+    start: datetime = Field(..., description="Начало свободного промежутка (UTC)")
+    end: datetime = Field(..., description="Конец свободного промежутка (UTC)")
+
+    @validator('start', 'end')
+    def as_utc(cls, v):
+        # В базе время хранится в UTC без зоны
+        return v if v.tzinfo else v.replace(tzinfo=timezone.utc)
+
+class TableAvailability(BaseModel):
+    table_id: int = Field(..., description="ID стола")
+    name: str = Field(..., description="Название стола")
+    seats: int = Field(..., description="Количество мест")
+    location: str = Field(..., description="Расположение стола")
+    free_slots: List[FreeSlot] = Field(..., description="Свободные промежутки в запрошенном окне")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "table_id": 1,
+                "name": "Стол у окна",
+                "seats": 4,
+                "location": "Зал 1",
+                "free_slots": [
+                    {"start": "2024-04-08T18:00:00Z", "end": "2024-04-08T19:00:00Z"},
+                    {"start": "2024-04-08T21:00:00Z", "end": "2024-04-08T23:00:00Z"}
+                ]
+            }
+        }
+
+class AvailabilityCheck(BaseModel):
+    table_id: int = Field(..., description="ID стола")
+    available: bool = Field(..., description="Свободен ли стол на весь интервал")
@@ -0,0 +1,25 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Optional
+
+class CurrentReservation(BaseModel):
+    id: Optional[int] = Field(None, description="ID бронирования")
+    series_id: Optional[int] = Field(None, description="ID серии, если это повторение серии")
+    customer_name: str = Field(..., description="Имя клиента")
+    start: datetime = Field(..., description="Начало брони (UTC)")
+    end: datetime = Field(..., description="Конец брони (UTC)")
+
+class TableOccupancy(BaseModel):
+    table_id: int = Field(..., description="ID стола")
+    name: str = Field(..., description="Название стола")
+    seats: int = Field(..., description="Количество мест")
+    status: str = Field(..., description="occupied — занят сейчас, reserved — ожидает брони, free — свободен")
+    reservation: Optional[CurrentReservation] = Field(None, description="Текущая или ближайшая бронь")
+
+class LocationOccupancy(BaseModel):
+    location: str = Field(..., description="Расположение")
+    tables: List[TableOccupancy] = Field(..., description="Столы расположения")
+
+class FloorOccupancy(BaseModel):
+    at: datetime = Field(..., description="Момент снимка (UTC, с точностью до секунды)")
+    locations: List[LocationOccupancy] = Field(..., description="Столы, сгруппированные по расположению")
@@ -1,10 +1,9 @@
 from pydantic import BaseModel, Field, validator
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import List, Optional
 
-class ReservationBase(BaseModel):
+class ReservationTiming(BaseModel):
     customer_name: str = Field(..., description="Имя клиента", min_length=1, max_length=100)
-    table_id: int = Field(..., description="ID стола", gt=0)
     reservation_time: datetime = Field(..., description="Время бронирования")
     duration_minutes: int = Field(..., description="Длительность бронирования в минутах", gt=0, le=240)
 
@@ -34,18 +33,48 @@ class ReservationBase(BaseModel):
             raise ValueError('Максимальная длительность бронирования - 4 часа')
         return v
 
+class ReservationBase(ReservationTiming):
+    table_id: int = Field(..., description="ID стола", gt=0)
+
 class ReservationCreate(ReservationBase):
     pass
 
+class ReservationAutoCreate(ReservationTiming):
+    party_size: int = Field(..., description="Количество гостей", gt=0)
+    location: Optional[str] = Field(None, description="Только столы этого расположения")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "customer_name": "Иван Иванов",
+                "party_size": 3,
+                "reservation_time": "2024-04-08T19:00:00",
+                "duration_minutes": 120,
+                "location": "Зал 1"
+            }
+        }
+
 class ReservationUpdate(BaseModel):
     customer_name: Optional[str] = Field(None, description="Имя клиента", min_length=1, max_length=100)
     table_id: Optional[int] = Field(None, description="ID стола", gt=0)
     reservation_time: Optional[datetime] = Field(None, description="Время бронирования")
     duration_minutes: Optional[int] = Field(None, description="Длительность бронирования в минутах", gt=0, le=240)
 
-class ReservationOut(ReservationBase):
+class ReservationOut(BaseModel):
+    """
+    Модель ответа без входных проверок: прошедшие брони читаются так же, как будущие
+    """
+    customer_name: str = Field(..., description="Имя клиента")
+    table_id: int = Field(..., description="ID стола")
+    reservation_time: datetime = Field(..., description="Время бронирования (UTC)")
+    duration_minutes: int = Field(..., description="Длительность бронирования в минутах")
     id: int = Field(..., description="ID бронирования")
 
+    @validator('reservation_time')
+    def as_utc(cls, v):
+        # В базе время хранится в UTC без зоны
+        return v if v.tzinfo else v.replace(tzinfo=timezone.utc)
+
     class Config:
         orm_mode = True
         schema_extra = {
@@ -57,3 +86,14 @@ class ReservationOut(ReservationBase):
                 "duration_minutes": 120
             }
         }
+
+class BulkItemResult(BaseModel):
+    index: int = Field(..., description="Позиция элемента во входном пакете")
+    status: str = Field(..., description="created, conflict или invalid")
+    id: Optional[int] = Field(None, description="ID созданного бронирования")
+    detail: Optional[str] = Field(None, description="Причина отказа")
+
+class BulkImportResult(BaseModel):
+    created: int = Field(..., description="Количество созданных бронирований")
+    rejected: int = Field(..., description="Количество отклоненных элементов")
+    items: List[BulkItemResult] = Field(..., description="Результаты в порядке входных элементов")
@@ -0,0 +1,55 @@
+from pydantic import BaseModel, Field, validator
+import datetime as dt
+from typing import List, Optional
+
+class BusyInterval(BaseModel):
+    reservation_id: Optional[int] = Field(None, description="ID бронирования")
+    series_id: Optional[int] = Field(None, description="ID серии, если это повторение серии")
+    customer_name: str = Field(..., description="Имя клиента")
+    start: dt.datetime = Field(..., description="Начало брони (UTC)")
+    end: dt.datetime = Field(..., description="Конец брони (UTC)")
+
+    @validator('start', 'end')
+    def as_utc(cls, v):
+        # В базе время хранится в UTC без зоны
+        return v if v.tzinfo else v.replace(tzinfo=dt.timezone.utc)
+
+class FreeGap(BaseModel):
+    start: dt.datetime = Field(..., description="Начало свободного промежутка (UTC)")
+    end: dt.datetime = Field(..., description="Конец свободного промежутка (UTC)")
+    max_duration_minutes: int = Field(..., description="Наибольшая длительность брони, помещающаяся в промежуток")
+
+    @validator('start', 'end')
+    def as_utc(cls, v):
+        # В базе время хранится в UTC без зоны
+        return v if v.tzinfo else v.replace(tzinfo=dt.timezone.utc)
+
+class DaySchedule(BaseModel):
+    date: dt.date = Field(..., description="День (UTC)")
+    busy: List[BusyInterval] = Field(..., description="Брони, пересекающиеся с днем, по времени начала")
+    free: List[FreeGap] = Field(..., description="Свободные промежутки не короче минимальной брони")
+
+class TableSchedule(BaseModel):
+    table_id: int = Field(..., description="ID стола")
+    days: List[DaySchedule] = Field(..., description="Расписание по дням")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "table_id": 1,
+                "days": [{
+                    "date": "2024-04-08",
+                    "busy": [{
+                        "reservation_id": 7,
+                        "series_id": None,
+                        "customer_name": "Иван Иванов",
+                        "start": "2024-04-08T19:00:00Z",
+                        "end": "2024-04-08T21:00:00Z"
+                    }],
+                    "free": [
+                        {"start": "2024-04-08T00:00:00Z", "end": "2024-04-08T19:00:00Z", "max_duration_minutes": 240},
+                        {"start": "2024-04-08T21:00:00Z", "end": "2024-04-09T00:00:00Z", "max_duration_minutes": 180}
+                    ]
+                }]
+            }
+        }
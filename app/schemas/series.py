@@ -0,0 +1,85 @@
+from pydantic import BaseModel, Field, root_validator, validator
+from datetime import date, datetime, timezone
+from typing import List, Literal, Optional
+from app.schemas.reservation import ReservationBase
+
+class SeriesRule(BaseModel):
+    frequency: Literal["daily", "weekly"] = Field("weekly", description="Повторять каждый день (daily) или неделю (weekly)")
+    interval: int = Field(1, description="Каждые N дней или недель", gt=0, le=52)
+    count: Optional[int] = Field(None, description="Количество повторений", gt=0, le=520)
+    until: Optional[date] = Field(None, description="Последний день, в который начинается повторение (UTC)")
+
+class SeriesCreate(SeriesRule, ReservationBase):
+    """
+    Серия броней: reservation_time — начало первого повторения.
+    Окончание задается ровно одним из count и until
+    """
+
+    @root_validator(skip_on_failure=True)
+    def count_or_until(cls, values):
+        if (values.get("count") is None) == (values.get("until") is None):
+            raise ValueError("Укажите ровно одно из полей count и until")
+        return values
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "customer_name": "ООО Ромашка",
+                "table_id": 1,
+                "reservation_time": "2024-04-08T13:00:00",
+                "duration_minutes": 90,
+                "frequency": "weekly",
+                "interval": 1,
+                "until": "2024-12-30"
+            }
+        }
+
+class SeriesUpdate(BaseModel):
+    customer_name: Optional[str] = Field(None, description="Имя клиента", min_length=1, max_length=100)
+    table_id: Optional[int] = Field(None, description="ID стола", gt=0)
+    reservation_time: Optional[datetime] = Field(None, description="Начало первого повторения")
+    duration_minutes: Optional[int] = Field(None, description="Длительность повторения в минутах", ge=30, le=240)
+    frequency: Optional[Literal["daily", "weekly"]] = Field(None, description="daily или weekly")
+    interval: Optional[int] = Field(None, description="Каждые N дней или недель", gt=0, le=52)
+    count: Optional[int] = Field(None, description="Количество повторений", gt=0, le=520)
+    until: Optional[date] = Field(None, description="Последний день, в который начинается повторение (UTC)")
+
+    @root_validator(skip_on_failure=True)
+    def count_or_until(cls, values):
+        if values.get("count") is not None and values.get("until") is not None:
+            raise ValueError("Укажите только одно из полей count и until")
+        return values
+
+class SeriesOut(BaseModel):
+    id: int = Field(..., description="ID серии")
+    customer_name: str = Field(..., description="Имя клиента")
+    table_id: int = Field(..., description="ID стола")
+    reservation_time: datetime = Field(..., description="Начало первого повторения (UTC)")
+    duration_minutes: int = Field(..., description="Длительность повторения в минутах")
+    frequency: str = Field(..., description="daily или weekly")
+    interval: int = Field(..., description="Каждые N дней или недель")
+    count: int = Field(..., description="Количество повторений")
+    until: date = Field(..., description="День начала последнего повторения (UTC)")
+
+    @validator('reservation_time')
+    def as_utc(cls, v):
+        # В базе время хранится в UTC без зоны
+        return v if v.tzinfo else v.replace(tzinfo=timezone.utc)
+
+class Occurrence(BaseModel):
+    index: int = Field(..., description="Номер повторения, с 0")
+    start: datetime = Field(..., description="Начало повторения (UTC)")
+    end: datetime = Field(..., description="Конец повторения (UTC)")
+
+    @validator('start', 'end')
+    def as_utc(cls, v):
+        # В базе время хранится в UTC без зоны
+        return v if v.tzinfo else v.replace(tzinfo=timezone.utc)
+
+class OccurrenceConflict(Occurrence):
+    reservation_id: Optional[int] = Field(None, description="Бронь, с которой пересекается повторение")
+    series_id: Optional[int] = Field(None, description="Серия, с повторением которой оно пересекается")
+
+class SeriesConflictResponse(BaseModel):
+    detail: str
+    conflicts: List[OccurrenceConflict] = Field(..., description="Повторения, пересекающиеся с занятостью стола")
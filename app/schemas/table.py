@@ -20,7 +20,13 @@ class TableUpdate(BaseModel):
     seats: Optional[int] = Field(None, description="Количество мест", gt=0, le=20)
     location: Optional[str] = Field(None, description="Расположение стола", min_length=1, max_length=100)
 
-class TableOut(TableBase):
+class TableOut(BaseModel):
+    """
+    Модель ответа без входных проверок
+    """
+    name: str = Field(..., description="Название стола")
+    seats: int = Field(..., description="Количество мест")
+    location: str = Field(..., description="Расположение стола")
     id: int = Field(..., description="ID стола")
 
     class Config:
@@ -0,0 +1,199 @@
+"""
+Аналитика занятости столов по часам.
+
+Агрегаты utilization_hourly (стол × час) обновляются в той же транзакции, что
+и запись брони: одним UPSERT с приращениями по всем затронутым часам. Отчеты
+читают только агрегаты диапазона и сворачивают их массивами numpy.
+Серии учитываются всеми повторениями при создании, изменении и удалении.
+Перенос броней в архив агрегаты не меняет: история занятости сохраняется.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Sequence, Tuple
+import numpy as np
+from sqlalchemy import delete, insert, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.analytics import UtilizationHourly
+from app.models.reservation import Reservation, ReservationArchive, ReservationSeries
+from app.models.table import Table
+from app.services.reservation_service import MAX_DURATION_MINUTES
+
+HOUR = 3600
+# Бронь не длиннее MAX_DURATION_MINUTES задевает не больше стольких часов
+MAX_SLOTS = MAX_DURATION_MINUTES // 60 + 2
+GROUPS = ("table", "location", "hour", "day")
+REBUILD_CHUNK = 100_000
+
+def to_epoch(values: Sequence[datetime]) -> np.ndarray:
+    return np.array(values, dtype="datetime64[s]").astype(np.int64)
+
+def hour_starts(hours: np.ndarray) -> List[datetime]:
+    return (hours * HOUR).astype("datetime64[s]").tolist()
+
+def split_by_hour(table_ids: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Разбивает интервалы [start, end) (секунды эпохи) на части по часам.
+    Возвращает массивы (стол, номер часа от эпохи, секунды) без пустых частей.
+    """
+    first_hour = starts // HOUR
+    slots = first_hour[:, None] + np.arange(MAX_SLOTS)
+    slot_start = slots * HOUR
+    seconds = np.minimum(ends[:, None], slot_start + HOUR) - np.maximum(starts[:, None], slot_start)
+    mask = seconds > 0
+    return np.broadcast_to(table_ids[:, None], slots.shape)[mask], slots[mask], seconds[mask]
+
+def aggregate(table_ids: np.ndarray, hours: np.ndarray, seconds: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Сумма секунд по парам (стол, час).
+    """
+    if not len(table_ids):
+        return table_ids, hours, seconds
+    keys = np.stack([table_ids, hours], axis=1)
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    totals = np.bincount(inverse.ravel(), weights=seconds, minlength=len(unique)).astype(np.int64)
+    return unique[:, 0], unique[:, 1], totals
+
+def expand_series(rows) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Все повторения серий массивами (стол, начало, конец) в секундах эпохи;
+    rows — (table_id, reservation_time, duration_minutes, period_seconds, occurrence_count).
+    """
+    table_ids, firsts, durations, periods, counts = zip(*rows)
+    counts = np.array(counts, dtype=np.int64)
+    # Номер повторения внутри своей серии для каждого элемента результата
+    index = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    starts = np.repeat(to_epoch(firsts), counts) + index * np.repeat(np.array(periods, dtype=np.int64), counts)
+    ends = starts + np.repeat(np.array(durations, dtype=np.int64) * 60, counts)
+    return np.repeat(np.array(table_ids, dtype=np.int64), counts), starts, ends
+
+def upsert(db: Session):
+    return (postgresql if db.get_bind().dialect.name == "postgresql" else sqlite).insert(UtilizationHourly)
+
+def record_occupancy(db: Session, changes: Iterable[Tuple[int, datetime, datetime, int]]):
+    """
+    Применяет приращения занятости: changes — (стол, начало, конец, +1 или -1).
+    Один запрос на все часы; вызывается до commit записи брони.
+    """
+    # Брони без стола или времени (строки до миграции end_time) не учитываются
+    changes = [c for c in changes if None not in c]
+    if not changes:
+        return
+    table_ids = np.array([c[0] for c in changes], dtype=np.int64)
+    signs = np.array([c[3] for c in changes], dtype=np.int64)
+    parts = split_by_hour(
+        np.arange(len(changes)), to_epoch([c[1] for c in changes]), to_epoch([c[2] for c in changes])
+    )
+    owners, hours, seconds = parts
+    table_ids, hours, deltas = aggregate(table_ids[owners], hours, seconds * signs[owners])
+    nonzero = deltas != 0
+    if not nonzero.any():
+        return
+    rows = [
+        {"table_id": int(table_id), "hour_start": start, "occupied_seconds": int(delta)}
+        for table_id, start, delta in zip(
+            table_ids[nonzero], hour_starts(hours[nonzero]), deltas[nonzero]
+        )
+    ]
+    statement = upsert(db).values(rows)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[UtilizationHourly.table_id, UtilizationHourly.hour_start],
+        set_={"occupied_seconds": UtilizationHourly.occupied_seconds + statement.excluded.occupied_seconds},
+    ))
+
+def rebuild_utilization(db: Session, chunk_size: int = REBUILD_CHUNK) -> int:
+    """
+    Полный пересчет агрегатов по броням, архиву и повторениям серий. Запускать без параллельных
+    записей броней: их приращения, сделанные во время пересчета, потеряются.
+    Возвращает число строк агрегатов.
+    """
+    def columns(model):
+        return select(model.table_id, model.reservation_time, model.end_time).where(
+            model.table_id.isnot(None), model.reservation_time.isnot(None), model.end_time.isnot(None)
+        )
+
+    source = union_all(columns(Reservation), columns(ReservationArchive))
+    parts = []
+    result = db.execute(source.execution_options(yield_per=chunk_size))
+    for chunk in result.partitions():
+        table_ids, starts, ends = zip(*chunk)
+        parts.append(split_by_hour(np.array(table_ids, dtype=np.int64), to_epoch(starts), to_epoch(ends)))
+    series = select(
+        ReservationSeries.table_id,
+        ReservationSeries.reservation_time,
+        ReservationSeries.duration_minutes,
+        ReservationSeries.period_seconds,
+        ReservationSeries.occurrence_count,
+    ).where(ReservationSeries.table_id.isnot(None))
+    for chunk in db.execute(series.execution_options(yield_per=chunk_size)).partitions():
+        parts.append(split_by_hour(*expand_series(chunk)))
+    db.execute(delete(UtilizationHourly))
+    if not parts:
+        db.commit()
+        return 0
+    table_ids, hours, seconds = aggregate(*(np.concatenate(arrays) for arrays in zip(*parts)))
+    starts = hour_starts(hours)
+    for offset in range(0, len(table_ids), chunk_size):
+        db.execute(insert(UtilizationHourly), [
+            {"table_id": int(table_ids[i]), "hour_start": starts[i], "occupied_seconds": int(seconds[i])}
+            for i in range(offset, min(offset + chunk_size, len(table_ids)))
+        ])
+    db.commit()
+    return len(table_ids)
+
+def utilization_report(db: Session, start: datetime, end: datetime, group_by: str) -> List[Dict]:
+    """
+    Занятость за [start, end) (границы — целые часы UTC) по столам, расположениям,
+    часам суток или дням. Доступное время — все часы диапазона для каждого стола.
+    """
+    tables = db.execute(select(Table.id, Table.location).order_by(Table.id)).all()
+    rows = db.execute(
+        select(UtilizationHourly.table_id, UtilizationHourly.hour_start, UtilizationHourly.occupied_seconds)
+        .where(UtilizationHourly.hour_start >= start, UtilizationHourly.hour_start < end)
+    ).all()
+
+    table_ids = np.array([t.id for t in tables], dtype=np.int64)
+    if rows:
+        agg_tables, agg_starts, agg_seconds = zip(*rows)
+        agg_tables = np.array(agg_tables, dtype=np.int64)
+        agg_hours = to_epoch(agg_starts) // HOUR
+        agg_seconds = np.array(agg_seconds, dtype=np.int64)
+    else:
+        agg_tables = agg_hours = agg_seconds = np.zeros(0, dtype=np.int64)
+    # Удаленные столы с историей занятости тоже попадают в отчет
+    table_ids = np.union1d(table_ids, agg_tables)
+    locations = {t.id: t.location for t in tables}
+    range_hours = np.arange(to_epoch([start])[0] // HOUR, to_epoch([end])[0] // HOUR)
+
+    if group_by == "table":
+        keys = table_ids.tolist()
+        occupied = np.bincount(np.searchsorted(table_ids, agg_tables), weights=agg_seconds, minlength=len(keys))
+        available = np.full(len(keys), len(range_hours) * HOUR)
+    elif group_by == "location":
+        names = np.array([locations.get(int(t)) or "" for t in table_ids])
+        keys, codes = np.unique(names, return_inverse=True)
+        keys = keys.tolist()
+        occupied = np.bincount(codes[np.searchsorted(table_ids, agg_tables)], weights=agg_seconds, minlength=len(keys))
+        available = np.bincount(codes, minlength=len(keys)) * len(range_hours) * HOUR
+    elif group_by == "hour":
+        keys = list(range(24))
+        occupied = np.bincount(agg_hours % 24, weights=agg_seconds, minlength=24)
+        available = np.bincount(range_hours % 24, minlength=24) * len(table_ids) * HOUR
+    else:
+        first_day = range_hours[0] // 24 if len(range_hours) else 0
+        day_count = (range_hours[-1] // 24 - first_day + 1) if len(range_hours) else 0
+        keys = [(start.date() + timedelta(days=i)).isoformat() for i in range(int(day_count))]
+        occupied = np.bincount(agg_hours // 24 - first_day, weights=agg_seconds, minlength=len(keys))
+        available = np.bincount(range_hours // 24 - first_day, minlength=len(keys)) * len(table_ids) * HOUR
+
+    occupied_minutes = occupied / 60
+    available_minutes = available / 60
+    ratio = np.divide(occupied, available, out=np.zeros(len(keys)), where=available > 0)
+    return [
+        {
+            "key": key,
+            "occupied_minutes": round(float(occupied_minutes[i]), 2),
+            "available_minutes": float(available_minutes[i]),
+            "utilization": round(float(ratio[i]), 4),
+        }
+        for i, key in enumerate(keys)
+    ]
@@ -0,0 +1,136 @@
+"""
+Обслуживание таблицы броней: месячные секции (PostgreSQL) и перенос прошедших
+броней в архив.
+
+В PostgreSQL reservations секционирована по reservation_time (миграция 0004):
+секция reservations_pYYYYMM на каждый месяц и reservations_default для
+остального. Проверка пересечений и списки с диапазоном времени читают только
+нужные секции; после переноса в архив опустевшие старые секции удаляются.
+В SQLite секций нет, перенос в архив работает так же.
+"""
+from datetime import date, datetime
+from typing import List, Optional
+from sqlalchemy import delete, insert, literal, select, text
+from sqlalchemy.orm import Session
+from app.models.reservation import Reservation, ReservationArchive
+from app.services.events import notify_event
+
+PARTITION_PREFIX = "reservations_p"
+OVERLAP_EXCLUSION = "EXCLUDE USING gist (table_id WITH =, tsrange(reservation_time, end_time) WITH &&)"
+ARCHIVE_BATCH_SIZE = 10000
+ARCHIVE_FIELDS = ("id", "customer_name", "table_id", "reservation_time", "duration_minutes", "end_time")
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+def next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return bool(db.scalar(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'reservations')"
+    )))
+
+def add_overlap_exclusion(db: Session, name: str):
+    # Ограничение исключения действует только в пределах секции; пересечения
+    # через границу месяца исключает FOR UPDATE на строку стола при записи
+    db.execute(text(f"ALTER TABLE {name} ADD CONSTRAINT {name}_no_overlap {OVERLAP_EXCLUSION}"))
+
+def ensure_partitions(db: Session, months_ahead: int = 3, today: Optional[date] = None) -> List[str]:
+    """
+    Создает недостающие месячные секции с текущего месяца на months_ahead вперед.
+    Запускается заранее (cron): строки месяца без секции попадают в reservations_default,
+    и создать секцию поверх них уже нельзя. Возвращает имена созданных секций.
+    """
+    if not is_partitioned(db):
+        return []
+    existing = set(db.scalars(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = 'reservations'"
+    )))
+    created = []
+    month = month_start(today or date.today())
+    for _ in range(months_ahead + 1):
+        name = partition_name(month)
+        if name not in existing:
+            db.execute(text(
+                f"CREATE TABLE {name} PARTITION OF reservations "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+            ))
+            add_overlap_exclusion(db, name)
+            created.append(name)
+        month = next_month(month)
+    db.commit()
+    return created
+
+def drop_empty_partitions(db: Session, before: date) -> List[str]:
+    """
+    Удаляет пустые секции месяцев, целиком закончившихся до before.
+    """
+    if not is_partitioned(db):
+        return []
+    names = db.scalars(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'reservations' AND c.relname LIKE :prefix ORDER BY c.relname"
+    ), {"prefix": PARTITION_PREFIX + "%"}).all()
+    dropped = []
+    for name in names:
+        month = datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m").date()
+        if next_month(month) > before:
+            break
+        if not db.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {name})")):
+            db.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    db.commit()
+    return dropped
+
+def archive_reservations(db: Session, cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """
+    Переносит брони, закончившиеся до cutoff, в reservations_archive, где они
+    по-прежнему находятся по id. Каждая пачка — отдельная транзакция и публикует
+    событие reservations_archived (notify_event): воркеры API сбрасывают версии
+    ETag и кэш занятости. Возвращает число перенесенных броней.
+    """
+    columns = [getattr(Reservation, field) for field in ARCHIVE_FIELDS]
+    moved = 0
+    while True:
+        # Условие по reservation_time ограничивает поиск старыми секциями
+        ids = db.scalars(
+            select(Reservation.id)
+            .where(
+                Reservation.reservation_time < cutoff,
+                Reservation.end_time < cutoff,
+            )
+            .order_by(Reservation.id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        archived_at = datetime.utcnow()
+        db.execute(
+            insert(ReservationArchive).from_select(
+                (*ARCHIVE_FIELDS, "archived_at"),
+                select(*columns, literal(archived_at)).where(Reservation.id.in_(ids)),
+            )
+        )
+        db.execute(
+            delete(Reservation)
+            .where(Reservation.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        notify_event(db, {"type": "reservations_archived", "count": len(ids)})
+        db.commit()
+        moved += len(ids)
+    return moved
+
+def find_archived(db: Session, reservation_id: int) -> Optional[ReservationArchive]:
+    return db.get(ReservationArchive, reservation_id)
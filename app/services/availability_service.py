@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Optional
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+from app.models.reservation import Reservation
+from app.models.table import Table
+from app.services.intervals import free_gaps, to_utc_naive
+from app.services.recurrence import series_busy
+from app.services.reservation_service import overlap_filter
+
+def find_free_slots(
+    db: Session,
+    party_size: int,
+    window_start: datetime,
+    window_end: datetime,
+    slot_minutes: int,
+    location: Optional[str] = None
+) -> list:
+    """
+    Свободные промежутки всех подходящих по вместимости столов в окне.
+
+    Один запрос: столы с seats >= party_size, к которым LEFT JOIN-ом присоединены
+    брони, пересекающиеся с окном (та же семантика, что у is_table_available).
+    Строки приходят отсортированными по (стол, начало брони), поэтому свободные
+    промежутки считаются одним проходом по каждому столу. Повторения серий
+    столов добавляются вторым запросом.
+    """
+    window_start = to_utc_naive(window_start)
+    window_end = to_utc_naive(window_end)
+
+    query = (
+        select(
+            Table.id, Table.name, Table.seats, Table.location,
+            Reservation.reservation_time, Reservation.end_time
+        )
+        .outerjoin(
+            Reservation,
+            and_(Reservation.table_id == Table.id, *overlap_filter(window_start, window_end))
+        )
+        .where(Table.seats >= party_size)
+        .order_by(Table.seats, Table.id, Reservation.reservation_time)
+    )
+    if location is not None:
+        query = query.where(Table.location == location)
+
+    rows = db.execute(query).all()
+    # Повторения серий подходящих столов — вторым запросом по диапазону серий
+    series = series_busy(db, {row.id for row in rows}, window_start, window_end)
+
+    min_length = timedelta(minutes=slot_minutes)
+    result = []
+    for (table_id, name, seats, table_location), table_rows in groupby(rows, key=lambda row: row[:4]):
+        busy = [(row.reservation_time, row.end_time) for row in table_rows if row.reservation_time is not None]
+        if table_id in series:
+            busy = sorted(busy + [(start, end) for start, end, _, _ in series[table_id]])
+        gaps = free_gaps(busy, window_start, window_end, min_length)
+        if gaps:
+            result.append({
+                "table_id": table_id,
+                "name": name,
+                "seats": seats,
+                "location": table_location,
+                "free_slots": [{"start": start, "end": end} for start, end in gaps],
+            })
+    return result
@@ -0,0 +1,123 @@
+from collections import defaultdict
+from datetime import timedelta
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from app.models.reservation import Reservation
+from app.schemas.reservation import ReservationCreate
+from app.services.intervals import to_utc_naive
+from app.services.recurrence import series_busy
+from app.services.reservation_service import lock_tables, overlap_filter
+
+def find_batch_conflicts(candidates: list, existing: list) -> set:
+    """
+    Сортировка и проход по одному столу.
+
+    candidates — (start, end, index) новых броней, existing — (start, end) уже
+    сохраненных, отсортированные по началу. Кандидаты принимаются в порядке
+    начала (при равенстве — в порядке в пакете); кандидат отклоняется, если
+    пересекается с сохраненной бронью или с уже принятым кандидатом.
+    Возвращает индексы отклоненных кандидатов.
+    """
+    rejected = set()
+    position = 0
+    existing_end = None  # максимальный конец сохраненных броней, начавшихся не позже кандидата
+    accepted_end = None  # конец последнего принятого кандидата
+    for start, end, index in sorted(candidates, key=lambda c: (c[0], c[2])):
+        while position < len(existing) and existing[position][0] <= start:
+            if existing_end is None or existing[position][1] > existing_end:
+                existing_end = existing[position][1]
+            position += 1
+        if (
+            (existing_end is not None and existing_end > start)
+            or (position < len(existing) and existing[position][0] < end)
+            or (accepted_end is not None and accepted_end > start)
+        ):
+            rejected.add(index)
+            continue
+        accepted_end = end
+    return rejected
+
+def bulk_create_reservations(db: Session, items: list) -> tuple:
+    """
+    Пакетное создание броней. Возвращает результаты в порядке входных элементов
+    и интервалы (table_id, начало, конец) созданных броней.
+
+    Все затронутые столы блокируются одним запросом, сохраненные брони этих
+    столов в общем интервале пакета загружаются одним запросом (и еще одним —
+    серии этих столов), конфликты ищутся
+    в памяти, принятые строки вставляются одним пакетным INSERT.
+    """
+    results = [None] * len(items)
+    by_table = defaultdict(list)
+    for index, item in enumerate(items):
+        try:
+            reservation = ReservationCreate.parse_obj(item)
+        except ValidationError as exc:
+            results[index] = {
+                "index": index,
+                "status": "invalid",
+                "detail": "; ".join(error["msg"] for error in exc.errors())
+            }
+            continue
+        start = to_utc_naive(reservation.reservation_time)
+        by_table[reservation.table_id].append(
+            (start, start + timedelta(minutes=reservation.duration_minutes), index, reservation)
+        )
+
+    tables = lock_tables(db, list(by_table))
+    for table_id in [t for t in by_table if t not in tables]:
+        for _, _, index, _ in by_table.pop(table_id):
+            results[index] = {"index": index, "status": "invalid", "detail": f"Стол с ID {table_id} не найден"}
+
+    rows = []
+    if by_table:
+        window_start = min(c[0] for candidates in by_table.values() for c in candidates)
+        window_end = max(c[1] for candidates in by_table.values() for c in candidates)
+        existing = defaultdict(list)
+        for table_id, start, end in db.execute(
+            select(Reservation.table_id, Reservation.reservation_time, Reservation.end_time)
+            .where(Reservation.table_id.in_(list(by_table)), *overlap_filter(window_start, window_end))
+            .order_by(Reservation.table_id, Reservation.reservation_time)
+        ):
+            existing[table_id].append((start, end))
+        # Повторения серий тех же столов — одним запросом, вычисляются в окне пакета
+        for table_id, busy in series_busy(db, by_table, window_start, window_end).items():
+            existing[table_id] = sorted(existing[table_id] + [(start, end) for start, end, _, _ in busy])
+
+        for table_id, candidates in by_table.items():
+            rejected = find_batch_conflicts([c[:3] for c in candidates], existing[table_id])
+            for start, end, index, reservation in candidates:
+                if index in rejected:
+                    results[index] = {
+                        "index": index,
+                        "status": "conflict",
+                        "detail": "Стол уже забронирован на указанное время"
+                    }
+                else:
+                    rows.append((index, {
+                        "customer_name": reservation.customer_name,
+                        "table_id": table_id,
+                        "reservation_time": start,
+                        "duration_minutes": reservation.duration_minutes,
+                        "end_time": end,
+                    }))
+
+    if rows:
+        # Один пакетный INSERT. Принятые брони одного стола не пересекаются, поэтому
+        # (table_id, reservation_time) однозначно сопоставляет возвращенные id элементам
+        # и не требует RETURNING с сохранением порядка, который SQLite выполняет построчно.
+        # Вставка на уровне Core минует построчную обработку ORM
+        table = Reservation.__table__
+        created = db.execute(
+            insert(table).returning(table.c.id, table.c.table_id, table.c.reservation_time),
+            [row for _, row in rows]
+        )
+        ids = {(table_id, start): reservation_id for reservation_id, table_id, start in created}
+        for index, row in rows:
+            results[index] = {
+                "index": index,
+                "status": "created",
+                "id": ids[(row["table_id"], row["reservation_time"])]
+            }
+    return results, [(row["table_id"], row["reservation_time"], row["end_time"]) for _, row in rows]
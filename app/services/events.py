@@ -0,0 +1,230 @@
+"""
+Рассылка событий об изменениях броней подписчикам потока (SSE).
+
+Обработчики публикуют события после commit; Broadcaster раздает их подписчикам
+своего процесса через ограниченные очереди. Чтобы события видели все воркеры,
+публикация идет через бэкенд: InMemoryBackend — в пределах процесса (тесты,
+один воркер), PostgresBackend — через LISTEN/NOTIFY.
+
+Кроме подписчиков, каждое событие получают слушатели процесса (add_listener),
+например счетчики версий для ETag. События столов (table_*) идут только
+слушателям: поток SSE передает изменения броней.
+
+Настройки окружения:
+    EVENTS_BACKEND       — memory (по умолчанию) или postgres
+    EVENTS_DATABASE_URL  — URL для LISTEN/NOTIFY (по умолчанию DATABASE_URL)
+    EVENTS_QUEUE_SIZE    — размер очереди подписчика (100)
+    EVENTS_MAX_SUBSCRIBERS — предел подписчиков на процесс (1000)
+"""
+import asyncio
+import logging
+import os
+from typing import Callable, List, Optional, Set
+import orjson
+from sqlalchemy import text
+from app.core.serialization import ORJSON_OPTIONS
+from app.database import run_db
+
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory").lower()
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "1000"))
+EVENTS_CHANNEL = "reservation_events"
+
+logger = logging.getLogger("app.events")
+
+def reservation_payload(reservation) -> dict:
+    return {
+        "id": reservation.id,
+        "customer_name": reservation.customer_name,
+        "table_id": reservation.table_id,
+        "reservation_time": reservation.reservation_time,
+        "duration_minutes": reservation.duration_minutes,
+    }
+
+class Subscription:
+    """
+    Подписка с фильтром по столу или расположению. Переполнение очереди
+    означает, что клиент не успевает читать: подписка закрывается, в очередь
+    кладется None, и клиент должен переподключиться и перечитать состояние.
+    """
+
+    def __init__(self, table_id: Optional[int] = None, location: Optional[str] = None, queue_size: int = EVENTS_QUEUE_SIZE):
+        self.table_id = table_id
+        self.location = location
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+    def matches(self, event: dict) -> bool:
+        if event.get("type", "").startswith("table_"):
+            return False
+        if self.table_id is not None and self.table_id not in (event.get("table_id"), event.get("previous_table_id")):
+            return False
+        if self.location is not None and self.location not in (event.get("location"), event.get("previous_location")):
+            return False
+        return True
+
+    def deliver(self, message: bytes) -> bool:
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+class InMemoryBackend:
+    """
+    События остаются в пределах процесса.
+    """
+
+    async def start(self, deliver: Callable[[bytes], None]):
+        self.deliver = deliver
+
+    async def publish(self, message: bytes):
+        self.deliver(message)
+
+    async def stop(self):
+        pass
+
+class PostgresBackend:
+    """
+    Общая шина для воркеров через NOTIFY/LISTEN PostgreSQL (asyncpg).
+    Размер сообщения NOTIFY ограничен 8000 байт; события броней много меньше.
+    """
+
+    def __init__(self, url: str):
+        # asyncpg принимает только схему postgresql://
+        scheme, _, rest = url.partition("://")
+        self.url = "postgresql://" + rest if scheme.startswith("postgresql") else url
+        self._listener = None
+        self._publisher = None
+        self._lock = asyncio.Lock()
+
+    async def start(self, deliver: Callable[[bytes], None]):
+        import asyncpg
+
+        self.deliver = deliver
+        self._listener = await asyncpg.connect(self.url)
+        self._publisher = await asyncpg.connect(self.url)
+        await self._listener.add_listener(EVENTS_CHANNEL, self._on_notify)
+
+    def _on_notify(self, connection, pid, channel, payload: str):
+        self.deliver(payload.encode())
+
+    async def publish(self, message: bytes):
+        # Одно соединение публикации на процесс; запросы на нем выполняются по очереди
+        async with self._lock:
+            await self._publisher.execute("SELECT pg_notify($1, $2)", EVENTS_CHANNEL, message.decode())
+
+    async def stop(self):
+        for connection in (self._listener, self._publisher):
+            if connection is not None:
+                await connection.close()
+        self._listener = self._publisher = None
+
+def make_backend():
+    if EVENTS_BACKEND == "postgres":
+        return PostgresBackend(os.getenv("EVENTS_DATABASE_URL") or os.getenv("DATABASE_URL"))
+    return InMemoryBackend()
+
+class Broadcaster:
+    def __init__(self, backend=None, max_subscribers: int = EVENTS_MAX_SUBSCRIBERS):
+        self.backend = backend or InMemoryBackend()
+        self.max_subscribers = max_subscribers
+        self.subscribers: Set[Subscription] = set()
+        self.listeners: List[Callable[[dict], None]] = []
+        self.dropped = 0
+        self._started = False
+
+    async def start(self):
+        if not self._started:
+            await self.backend.start(self._dispatch)
+            self._started = True
+
+    async def stop(self):
+        if self._started:
+            await self.backend.stop()
+            self._started = False
+        for subscription in self.subscribers:
+            subscription.deliver(None)
+        self.subscribers.clear()
+
+    def subscribe(self, table_id: Optional[int] = None, location: Optional[str] = None) -> Optional[Subscription]:
+        """
+        Новая подписка или None, если достигнут предел подписчиков.
+        """
+        if len(self.subscribers) >= self.max_subscribers:
+            return None
+        subscription = Subscription(table_id, location)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    def add_listener(self, listener: Callable[[dict], None]):
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    async def publish(self, event: dict):
+        if not self._started:
+            return
+        message = orjson.dumps(event, option=ORJSON_OPTIONS)
+        try:
+            await self.backend.publish(message)
+        except Exception:
+            # Сбой шины не должен ломать уже выполненную запись
+            logger.exception("Не удалось опубликовать событие %s", event.get("type"))
+
+    def _dispatch(self, message: bytes):
+        if not self.subscribers and not self.listeners:
+            return
+        event = orjson.loads(message)
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("Ошибка слушателя события %s", event.get("type"))
+        for subscription in list(self.subscribers):
+            if subscription.matches(event) and not subscription.deliver(message):
+                self.subscribers.discard(subscription)
+                self.dropped += 1
+                logger.warning("Подписчик потока событий отключен: очередь переполнена")
+
+broadcaster = Broadcaster(make_backend())
+
+# События копятся в session.info и публикуются обработчиком после run_db:
+# синхронные функции работы с базой выполняются вне цикла событий
+PENDING_EVENTS_KEY = "pending_events"
+
+def queue_event(db, event: dict):
+    db.info.setdefault(PENDING_EVENTS_KEY, []).append(event)
+
+async def publish_pending(db):
+    for event in db.info.pop(PENDING_EVENTS_KEY, ()):
+        await broadcaster.publish(event)
+
+def notify_event(db, event: dict) -> bool:
+    """
+    Публикация из процесса без шины (команды обслуживания): NOTIFY в транзакции
+    db доставляется воркерам при commit. Только при EVENTS_BACKEND=postgres и шине
+    в той же базе; иначе возвращает False — событие другим процессам не передать.
+    """
+    if EVENTS_BACKEND != "postgres":
+        return False
+    db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": EVENTS_CHANNEL, "payload": orjson.dumps(event, option=ORJSON_OPTIONS).decode()},
+    )
+    return True
+
+async def run_and_publish(db, fn, *args):
+    """
+    run_db и публикация событий, накопленных функцией после успешного commit.
+    """
+    try:
+        return await run_db(db, fn, *args)
+    finally:
+        await publish_pending(db)
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Optional
+import orjson
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+from app.core.serialization import ORJSON_OPTIONS
+from app.models.reservation import Reservation
+from app.models.table import Table
+from app.services.recurrence import series_busy
+from app.services.reservation_service import MAX_DURATION_MINUTES
+
+# Снимок зала на одну и ту же секунду переиспользуется в течение TTL секунд
+FLOOR_SNAPSHOT_TTL = float(os.getenv("FLOOR_SNAPSHOT_TTL", "1"))
+FLOOR_SNAPSHOT_ENTRIES = 64
+
+def floor_occupancy(db: Session, at: datetime, horizon: timedelta) -> list:
+    """
+    Все столы, сгруппированные по расположению, с текущей или ближайшей бронью.
+
+    Один запрос: брони, которые не закончились к моменту at и начинаются не позже
+    at + horizon, нумеруются row_number() в пределах стола по времени начала;
+    к столам LEFT JOIN-ом присоединяется первая из них. Повторения серий в том же
+    окне читаются вторым запросом, и из брони и повторения берется более раннее.
+    """
+    ranked = (
+        select(
+            Reservation.table_id,
+            Reservation.id,
+            Reservation.customer_name,
+            Reservation.reservation_time,
+            Reservation.end_time,
+            func.row_number().over(
+                partition_by=Reservation.table_id,
+                order_by=Reservation.reservation_time
+            ).label("position"),
+        )
+        .where(
+            Reservation.end_time > at,
+            # Бронь длится не дольше MAX_DURATION_MINUTES: нижняя граница для индекса
+            Reservation.reservation_time > at - timedelta(minutes=MAX_DURATION_MINUTES),
+            Reservation.reservation_time < at + horizon,
+        )
+        .subquery()
+    )
+    query = (
+        select(
+            Table.id, Table.name, Table.seats, Table.location,
+            ranked.c.id.label("reservation_id"), ranked.c.customer_name,
+            ranked.c.reservation_time, ranked.c.end_time,
+        )
+        .outerjoin(ranked, and_(ranked.c.table_id == Table.id, ranked.c.position == 1))
+        .order_by(Table.location, Table.id)
+    )
+
+    rows = db.execute(query).all()
+    series = series_busy(db, [row.id for row in rows], at, at + horizon)
+
+    locations = []
+    for location, group in groupby(rows, key=lambda row: row.location):
+        tables = []
+        for row in group:
+            reservation = None
+            if row.reservation_id is not None:
+                reservation = {
+                    "id": row.reservation_id,
+                    "series_id": None,
+                    "customer_name": row.customer_name,
+                    "start": row.reservation_time,
+                    "end": row.end_time,
+                }
+            if series.get(row.id):
+                start, end, series_id, customer_name = series[row.id][0]
+                if reservation is None or start < reservation["start"]:
+                    reservation = {
+                        "id": None,
+                        "series_id": series_id,
+                        "customer_name": customer_name,
+                        "start": start,
+                        "end": end,
+                    }
+            status = "free"
+            if reservation is not None:
+                status = "occupied" if reservation["start"] <= at else "reserved"
+            tables.append({
+                "table_id": row.id,
+                "name": row.name,
+                "seats": row.seats,
+                "status": status,
+                "reservation": reservation,
+            })
+        locations.append({"location": location, "tables": tables})
+    return locations
+
+class SnapshotCache:
+    """
+    Готовые JSON-тела снимков по ключу (секунда, горизонт) на ttl секунд.
+    """
+
+    def __init__(self, ttl: float = FLOOR_SNAPSHOT_TTL, max_entries: int = FLOOR_SNAPSHOT_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def put(self, key, body: bytes):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Сначала выбрасываются истекшие, затем самый старый снимок
+                for stale in [k for k, (expires, _) in self._entries.items() if expires < now]:
+                    del self._entries[stale]
+                if len(self._entries) >= self.max_entries:
+                    del self._entries[min(self._entries, key=lambda k: self._entries[k][0])]
+            self._entries[key] = (now + self.ttl, body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+snapshot_cache = SnapshotCache()
+
+def floor_snapshot(db: Session, at: datetime, horizon: timedelta) -> bytes:
+    """
+    JSON снимка зала на момент at (с точностью до секунды), из кэша или из базы.
+    """
+    at = at.replace(microsecond=0)
+    key = (at, horizon)
+    if snapshot_cache.ttl > 0:
+        body = snapshot_cache.get(key)
+        if body is not None:
+            return body
+    body = orjson.dumps(
+        {"at": at, "locations": floor_occupancy(db, at, horizon)},
+        option=ORJSON_OPTIONS
+    )
+    if snapshot_cache.ttl > 0:
+        snapshot_cache.put(key, body)
+    return body
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import time
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+# Результат проверки базы переиспользуется TTL секунд: частые пробы балансировщика
+# не превращаются в такой же поток запросов к базе
+HEALTH_CACHE_TTL = float(os.getenv("HEALTH_CACHE_TTL", "2"))
+HEALTH_PING_TIMEOUT = float(os.getenv("HEALTH_PING_TIMEOUT", "2"))
+
+class DatabaseProbe:
+    """
+    Кэшируемая проверка доступности базы (SELECT 1).
+    Одновременные пробы после истечения TTL ждут одну общую проверку.
+    Движки передаются фабриками и создаются при первой проверке.
+    """
+
+    def __init__(self, get_engine, get_async_engine=None, ttl: float = HEALTH_CACHE_TTL, timeout: float = HEALTH_PING_TIMEOUT):
+        self.get_engine = get_engine
+        self.get_async_engine = get_async_engine or (lambda: None)
+        self.ttl = ttl
+        self.timeout = timeout
+        self._result: Optional[dict] = None
+        self._checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _ping_sync(self):
+        with self.get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    async def _ping(self):
+        async_engine = self.get_async_engine()
+        if async_engine is not None:
+            async with async_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        else:
+            await run_in_threadpool(self._ping_sync)
+
+    async def _run(self) -> dict:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._ping(), self.timeout)
+        except asyncio.TimeoutError:
+            return {"ok": False, "error": f"Нет ответа от базы за {self.timeout} с"}
+        except Exception as exc:
+            return {"ok": False, "error": type(exc).__name__}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    async def check(self) -> dict:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if self._result is None or time.monotonic() - self._checked_at >= self.ttl:
+            async with self._lock:
+                # Пока ждали блокировку, проверку мог выполнить другой запрос
+                if self._result is None or time.monotonic() - self._checked_at >= self.ttl:
+                    self._result = await self._run()
+                    self._checked_at = time.monotonic()
+                    return {**self._result, "cached": False}
+        return {**self._result, "cached": True, "age_s": round(time.monotonic() - self._checked_at, 3)}
+
+    def reset(self):
+        self._result = None
+        self._checked_at = 0.0
+        self._lock = None
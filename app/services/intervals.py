@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+
+Interval = Tuple[datetime, datetime]
+
+def to_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Приводит время к наивному UTC — в таком виде оно хранится в базе.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def free_gaps(
+    busy: Iterable[Interval],
+    window_start: datetime,
+    window_end: datetime,
+    min_length: timedelta = timedelta(0)
+) -> List[Interval]:
+    """
+    Свободные промежутки окна [window_start, window_end) за один проход по занятым интервалам.
+    Интервалы должны быть отсортированы по началу; пересекающиеся и смежные сливаются.
+    Промежутки короче min_length отбрасываются.
+    """
+    gaps = []
+    cursor = window_start
+    for start, end in busy:
+        if start >= window_end:
+            break
+        if start > cursor and start - cursor >= min_length:
+            gaps.append((cursor, start))
+        if end > cursor:
+            cursor = end
+    if cursor < window_end and window_end - cursor >= min_length:
+        gaps.append((cursor, window_end))
+    return gaps
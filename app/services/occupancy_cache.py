@@ -0,0 +1,153 @@
+import math
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.reservation import Reservation
+from app.services.intervals import to_utc_naive
+from app.services.recurrence import series_busy
+from app.services.reservation_service import overlap_filter
+
+DAY = timedelta(days=1)
+
+class OccupancyCache:
+    """
+    Занятость столов по дням в памяти процесса с вытеснением LRU.
+
+    Запись (table_id, день) — плоский массив array('i') пар [начало, конец) в
+    секундах от начала дня (около 8 байт на бронь). Брони, переходящие через
+    полночь, попадают в записи обоих дней, повторения серий — как брони.
+    Объем ограничен числом записей.
+
+    Кэш отвечает на проверки, не ведущие к записи: запись брони проверяет
+    пересечения в базе тем же запросом, что и вставка. После commit обработчики
+    сбрасывают затронутые записи, а записи других воркеров приходят событиями
+    шины (on_event), поэтому при нескольких воркерах кэш требует
+    EVENTS_BACKEND=postgres; иначе gunicorn.conf.py выключает его.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Увеличивается при каждом сбросе: загрузка, начатая до сброса, не попадет в кэш
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _load_day(self, db: Session, table_id: int, day: date) -> array:
+        key = (table_id, day)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            generation = self._generation
+
+        day_start = datetime.combine(day, time.min)
+        busy = db.execute(
+            select(Reservation.reservation_time, Reservation.end_time)
+            .where(Reservation.table_id == table_id, *overlap_filter(day_start, day_start + DAY))
+            .order_by(Reservation.reservation_time)
+        ).all()
+        series = series_busy(db, [table_id], day_start, day_start + DAY)[table_id]
+        if series:
+            busy = sorted(busy + [(start, end) for start, end, _, _ in series])
+        entry = array("i")
+        for start, end in busy:
+            # Округление наружу: кэш может только перестраховаться, но не пропустить конфликт
+            entry.append(math.floor((start - day_start).total_seconds()))
+            entry.append(math.ceil((end - day_start).total_seconds()))
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return entry
+
+    def is_free(self, db: Session, table_id: int, start_time: datetime, end_time: datetime) -> bool:
+        start_time, end_time = to_utc_naive(start_time), to_utc_naive(end_time)
+        day = start_time.date()
+        while datetime.combine(day, time.min) < end_time:
+            day_start = datetime.combine(day, time.min)
+            start = (start_time - day_start).total_seconds()
+            end = (end_time - day_start).total_seconds()
+            entry = self._load_day(db, table_id, day)
+            for i in range(0, len(entry), 2):
+                if entry[i] >= end:
+                    break
+                if entry[i + 1] > start:
+                    return False
+            day += DAY
+        return True
+
+    def invalidate(self, table_id: int, start_time: datetime, end_time: datetime):
+        """
+        Сбрасывает дни стола, которые задевает интервал [start_time, end_time).
+        """
+        start_time, end_time = to_utc_naive(start_time), to_utc_naive(end_time)
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            day = start_time.date()
+            while datetime.combine(day, time.min) < end_time:
+                self._entries.pop((table_id, day), None)
+                day += DAY
+
+    def invalidate_table(self, table_id: int):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            for key in [key for key in self._entries if key[0] == table_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "approx_bytes": sum(
+                    entry.buffer_info()[1] * entry.itemsize for entry in self._entries.values()
+                ),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+# Размер кэша в записях (стол, день); 0 отключает кэш
+occupancy_cache = OccupancyCache(int(os.getenv("OCCUPANCY_CACHE_SIZE", "10000")))
+
+def on_event(event: dict):
+    """
+    Слушатель шины событий: изменения броней, серий и столов (в том числе из
+    других воркеров) сбрасывают записи затронутых столов, перенос в архив — весь кэш.
+    """
+    if event.get("type") == "reservations_archived":
+        occupancy_cache.clear()
+        return
+    for key in ("table_id", "previous_table_id"):
+        table_id = event.get(key)
+        if table_id is not None:
+            occupancy_cache.invalidate_table(table_id)
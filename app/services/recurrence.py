@@ -0,0 +1,145 @@
+"""
+Повторения серий броней без строк на каждое повторение.
+
+Повторение k (0 <= k < occurrence_count) начинается в reservation_time + k * period и
+длится duration_minutes. Повторения в окне находятся арифметически, поэтому
+чтение и проверка занятости стоят одинаково для серии на месяц и на годы.
+В SQL пересечение интервала с повторениями серии проверяется целочисленной
+арифметикой по секундам эпохи — одинаково в PostgreSQL и SQLite.
+
+Повторения считаются в UTC: местное время повторений сдвигается при переходе
+на летнее время.
+"""
+import math
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import case, select
+from sqlalchemy.orm import Session
+from app.models.reservation import ReservationSeries
+from app.services.intervals import to_utc_naive
+
+EPOCH = datetime(1970, 1, 1)
+FREQUENCY_DAYS = {"daily": 1, "weekly": 7}
+# Наибольшее число повторений серии (10 лет еженедельно)
+MAX_OCCURRENCES = 520
+
+def epoch_seconds(value: datetime) -> float:
+    return (to_utc_naive(value) - EPOCH).total_seconds()
+
+def series_bounds(
+    reservation_time: datetime, duration_minutes: int, frequency: str, interval: int, occurrence_count: int
+) -> dict:
+    """
+    Производные колонки серии для проверок в SQL.
+    """
+    period = FREQUENCY_DAYS[frequency] * interval * 86400
+    start = math.floor(epoch_seconds(reservation_time))
+    return {
+        "start_epoch": start,
+        "end_epoch": math.ceil(epoch_seconds(reservation_time)) + (occurrence_count - 1) * period + duration_minutes * 60,
+        "period_seconds": period,
+    }
+
+def count_until(reservation_time: datetime, frequency: str, interval: int, until: date) -> int:
+    """
+    Число повторений, начинающихся не позже дня until (включительно, UTC).
+    """
+    limit = datetime.combine(until + timedelta(days=1), time.min)
+    if limit <= reservation_time:
+        return 0
+    period = timedelta(days=FREQUENCY_DAYS[frequency] * interval)
+    return (limit - reservation_time - timedelta(microseconds=1)) // period + 1
+
+def last_start(series) -> datetime:
+    return series.reservation_time + timedelta(seconds=series.period_seconds * (series.occurrence_count - 1))
+
+def occurrence_range(series, window_start: Optional[datetime] = None, window_end: Optional[datetime] = None) -> range:
+    """
+    Номера повторений, пересекающихся с окном [window_start, window_end); None — без границы.
+    """
+    first = epoch_seconds(series.reservation_time)
+    period = series.period_seconds
+    low = 0
+    if window_start is not None:
+        # Первое повторение, которое заканчивается позже начала окна
+        lag = epoch_seconds(window_start) - series.duration_minutes * 60 - first
+        low = max(0, math.floor(lag / period) + 1)
+    high = series.occurrence_count
+    if window_end is not None:
+        # Повторения, которые начинаются раньше конца окна
+        high = min(high, math.ceil((epoch_seconds(window_end) - first) / period))
+    return range(low, max(low, high))
+
+def occurrences(
+    series, window_start: Optional[datetime] = None, window_end: Optional[datetime] = None
+) -> Iterator[Tuple[int, datetime, datetime]]:
+    """
+    Повторения серии в окне: (номер, начало, конец), по возрастанию.
+    """
+    step = timedelta(seconds=series.period_seconds)
+    length = timedelta(minutes=series.duration_minutes)
+    for index in occurrence_range(series, window_start, window_end):
+        start = series.reservation_time + step * index
+        yield index, start, start + length
+
+def series_window_filter(window_start: datetime, window_end: datetime):
+    """
+    Серии, повторения которых могут пересекаться с окном (по индексу диапазона серии).
+    """
+    return (
+        ReservationSeries.start_epoch < math.ceil(epoch_seconds(window_end)),
+        ReservationSeries.end_epoch > math.floor(epoch_seconds(window_start)),
+    )
+
+def series_conflict_clause(table_id, start_time: datetime, duration_minutes: int, exclude_series_id: int = None):
+    """
+    EXISTS(...) по сериям стола, одно из повторений которых пересекается с
+    [start_time, start_time + duration_minutes). Проверяется только первое
+    повторение, заканчивающееся позже start_time: остальные начинаются еще позже.
+    Границы интервала округляются наружу до секунд.
+    """
+    start = math.floor(epoch_seconds(start_time))
+    end = math.ceil(epoch_seconds(start_time + timedelta(minutes=duration_minutes)))
+    series = ReservationSeries
+    lag = start - series.start_epoch - series.duration_minutes * 60
+    first_index = case((lag < 0, 0), else_=lag // series.period_seconds + 1)
+    query = select(series.id).where(
+        series.table_id == table_id,
+        series.start_epoch < end,
+        series.end_epoch > start,
+        first_index < series.occurrence_count,
+        series.start_epoch + first_index * series.period_seconds < end,
+    )
+    if exclude_series_id:
+        query = query.where(series.id != exclude_series_id)
+    return query.exists()
+
+def series_busy(
+    db: Session,
+    table_ids: Iterable[int],
+    window_start: datetime,
+    window_end: datetime,
+    exclude_series_id: int = None
+) -> Dict[int, List[tuple]]:
+    """
+    Повторения серий указанных столов в окне одним запросом:
+    {table_id: [(начало, конец, series_id, customer_name), ...]} по возрастанию начала.
+    """
+    table_ids = list(table_ids)
+    result = defaultdict(list)
+    if not table_ids:
+        return result
+    query = select(ReservationSeries).where(
+        ReservationSeries.table_id.in_(table_ids), *series_window_filter(window_start, window_end)
+    )
+    if exclude_series_id:
+        query = query.where(ReservationSeries.id != exclude_series_id)
+    for series in db.scalars(query):
+        result[series.table_id].extend(
+            (start, end, series.id, series.customer_name)
+            for _, start, end in occurrences(series, window_start, window_end)
+        )
+    for busy in result.values():
+        busy.sort()
+    return result
@@ -1,8 +1,92 @@
-from sqlalchemy import text
+from typing import Optional
+from sqlalchemy import literal_column, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.reservation import Reservation
+from app.models.table import Table
+from app.services.recurrence import series_conflict_clause
 from datetime import timedelta
 
+# Пределы длительности брони (см. ReservationBase); максимум ограничивает диапазон сканирования индекса снизу
+MIN_DURATION_MINUTES = 30
+MAX_DURATION_MINUTES = 240
+
+def overlap_filter(start_time, end_time):
+    """
+    Условие пересечения брони с интервалом [start_time, end_time).
+    Нижняя граница по reservation_time делает диапазон индекса конечным с обеих сторон.
+    """
+    return (
+        Reservation.reservation_time < end_time,
+        Reservation.reservation_time > start_time - timedelta(minutes=MAX_DURATION_MINUTES),
+        Reservation.end_time > start_time,
+    )
+
+def conflict_clause(
+    table_id,
+    start_time,
+    duration_minutes: int,
+    exclude_reservation_id: int = None
+):
+    """
+    EXISTS(...) по броням и повторениям серий стола, пересекающимся с интервалом;
+    table_id может быть и выражением. Встраивается в условие INSERT/UPDATE записи брони.
+    """
+    end_time = start_time + timedelta(minutes=duration_minutes)
+
+    query = select(Reservation.id).where(
+        Reservation.table_id == table_id,
+        *overlap_filter(start_time, end_time)
+    )
+
+    if exclude_reservation_id:
+        query = query.where(Reservation.id != exclude_reservation_id)
+
+    # EXISTS останавливается на первой найденной записи
+    return or_(query.exists(), series_conflict_clause(table_id, start_time, duration_minutes))
+
+def conflict_exists(
+    table_id: int,
+    start_time,
+    duration_minutes: int,
+    exclude_reservation_id: int = None
+):
+    """
+    SELECT EXISTS(...) по броням и сериям стола, пересекающимся с интервалом.
+    Общий для синхронной и асинхронной проверки.
+    """
+    return select(conflict_clause(table_id, start_time, duration_minutes, exclude_reservation_id))
+
+def best_fit_tables(party_size: int, start_time, duration_minutes: int, location: Optional[str] = None):
+    """
+    Свободные на интервал столы не меньше party_size мест, от наименьшего
+    (индексы ix_tables_seats_id и ix_tables_location_seats_id). Пересечения
+    всех кандидатов проверяет один коррелированный NOT EXISTS. Строки столов не
+    блокируются: внешние ключи параллельных броней держат на них FOR KEY SHARE,
+    и SKIP LOCKED пропускал бы свободные столы. Выбранный стол блокирует
+    lock_table_row перед вставкой; если его успели занять, подбор повторяется.
+    Возвращает select(Table.id); колонки заменяются для INSERT ... SELECT.
+    """
+    query = select(Table.id).where(
+        Table.seats >= party_size,
+        ~conflict_clause(Table.id, start_time, duration_minutes),
+    )
+    if location is not None:
+        query = query.where(Table.location == location)
+    return query.order_by(Table.seats, Table.id)
+
+def returned_location(table: str = "reservations"):
+    """
+    Расположение стола записанной строки (брони или серии) для RETURNING. Ссылка
+    на таблицу задается текстом: SQLAlchemy не коррелирует подзапросы внутри RETURNING.
+    """
+    return (
+        select(Table.location)
+        .where(Table.id == literal_column(f"{table}.table_id"))
+        .scalar_subquery()
+        .label("location")
+    )
+
 def is_table_available(
     db: Session,
     table_id: int,
@@ -10,18 +94,55 @@ def is_table_available(
     duration_minutes: int,
     exclude_reservation_id: int = None
 ) -> bool:
+    return not db.scalar(conflict_exists(table_id, start_time, duration_minutes, exclude_reservation_id))
 
-    end_time = start_time + timedelta(minutes=duration_minutes)
-    
-    
-    query = db.query(Reservation).filter(
-        Reservation.table_id == table_id,
-        Reservation.reservation_time < end_time,
-        text("(reservation_time + (interval '1 minute' * duration_minutes)) > :start_time")
-    ).params(start_time=start_time)
-    
-    if exclude_reservation_id:
-        query = query.filter(Reservation.id != exclude_reservation_id)
-    
-    conflicts = query.all()
-    return len(conflicts) == 0
+async def is_table_available_async(
+    db: AsyncSession,
+    table_id: int,
+    start_time,
+    duration_minutes: int,
+    exclude_reservation_id: int = None
+) -> bool:
+    return not await db.scalar(conflict_exists(table_id, start_time, duration_minutes, exclude_reservation_id))
+
+def lock_table(db: Session, table_id: int) -> Optional[Table]:
+    """
+    Блокирует строку стола до конца транзакции.
+    Запись броней одного стола выполняется последовательно, разные столы не мешают друг другу.
+    Возвращает стол или None, если его нет.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        # В SQLite нет SELECT ... FOR UPDATE: пустой UPDATE сразу захватывает блокировку записи
+        db.execute(update(Table).where(Table.id == table_id).values(id=Table.id))
+    return db.query(Table).filter(Table.id == table_id).with_for_update().first()
+
+def lock_table_row(db: Session, table_id: int):
+    """
+    FOR UPDATE на строку стола отдельным запросом перед записью одной брони.
+    Все записи броней стола (одиночные, пакетные, серии) ждут друг друга, и
+    следующая за блокировкой вставка берет новый снимок с уже записанными бронями,
+    в том числе из других секций таблицы.
+    В SQLite не нужна: запись одним запросом идет под блокировкой записи всей базы.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return
+    db.execute(select(Table.id).where(Table.id == table_id).with_for_update())
+
+def lock_tables(db: Session, table_ids) -> dict:
+    """
+    Блокирует несколько столов одним запросом, в порядке id, чтобы параллельные
+    пакетные записи не взаимоблокировались. Возвращает найденные столы по id.
+    """
+    table_ids = sorted(set(table_ids))
+    if not table_ids:
+        return {}
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(update(Table).where(Table.id.in_(table_ids)).values(id=Table.id))
+    tables = (
+        db.query(Table)
+        .filter(Table.id.in_(table_ids))
+        .order_by(Table.id)
+        .with_for_update()
+        .all()
+    )
+    return {table.id: table for table in tables}
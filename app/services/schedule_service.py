@@ -0,0 +1,85 @@
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+from app.models.reservation import Reservation
+from app.models.table import Table
+from app.services.intervals import free_gaps
+from app.services.recurrence import series_busy
+from app.services.reservation_service import MAX_DURATION_MINUTES, MIN_DURATION_MINUTES, overlap_filter
+
+def table_schedule(db: Session, table_id: int, first_day: date, days: int = 1) -> Optional[dict]:
+    """
+    Расписание стола по дням (UTC): занятые интервалы и свободные промежутки.
+
+    Один запрос по индексу (table_id, reservation_time, end_time): стол LEFT JOIN
+    брони, пересекающиеся с диапазоном дней, и повторения серий стола. None — стола нет.
+    Промежутки короче минимальной длительности брони не возвращаются; для каждого
+    указана наибольшая длительность брони, которая в него помещается.
+    """
+    range_start = datetime.combine(first_day, time.min)
+    range_end = range_start + timedelta(days=days)
+
+    query = (
+        select(
+            Table.id, Reservation.id.label("reservation_id"), Reservation.customer_name,
+            Reservation.reservation_time, Reservation.end_time
+        )
+        .outerjoin(
+            Reservation,
+            and_(Reservation.table_id == Table.id, *overlap_filter(range_start, range_end))
+        )
+        .where(Table.id == table_id)
+        .order_by(Reservation.reservation_time)
+    )
+    rows = db.execute(query).all()
+    if not rows:
+        return None
+    bookings = [
+        (row.reservation_time, row.end_time, row.reservation_id, None, row.customer_name)
+        for row in rows if row.reservation_time is not None
+    ]
+    # Повторения серий стола в диапазоне вычисляются без строк на каждое
+    bookings.extend(
+        (start, end, None, series_id, customer_name)
+        for start, end, series_id, customer_name in series_busy(db, [table_id], range_start, range_end)[table_id]
+    )
+    bookings.sort(key=lambda booking: booking[0])
+    starts = [booking[0] for booking in bookings]
+
+    min_length = timedelta(minutes=MIN_DURATION_MINUTES)
+    longest = timedelta(minutes=MAX_DURATION_MINUTES)
+    result = []
+    for offset in range(days):
+        day_start = range_start + timedelta(days=offset)
+        day_end = day_start + timedelta(days=1)
+        # Бронь длится не дольше MAX_DURATION_MINUTES: с днем пересекаются только
+        # брони, начавшиеся не раньше чем за столько минут до его начала
+        day_bookings = [
+            booking for booking in bookings[bisect_left(starts, day_start - longest):bisect_left(starts, day_end)]
+            if booking[1] > day_start
+        ]
+        busy = [(start, end) for start, end, _, _, _ in day_bookings]
+        result.append({
+            "date": day_start.date(),
+            "busy": [
+                {
+                    "reservation_id": reservation_id,
+                    "series_id": series_id,
+                    "customer_name": customer_name,
+                    "start": start,
+                    "end": end,
+                }
+                for start, end, reservation_id, series_id, customer_name in day_bookings
+            ],
+            "free": [
+                {
+                    "start": start,
+                    "end": end,
+                    "max_duration_minutes": int(min(end - start, longest).total_seconds() // 60),
+                }
+                for start, end in free_gaps(busy, day_start, day_end, min_length)
+            ],
+        })
+    return {"table_id": table_id, "days": result}
@@ -0,0 +1,88 @@
+"""
+Проверка серии броней: все повторения сверяются с бронями и другими сериями
+стола одним запросом по диапазону серии и одним проходом в памяти.
+"""
+from datetime import datetime, timedelta
+from typing import List, Tuple
+from sqlalchemy import Integer, literal, null, select, union_all
+from sqlalchemy.orm import Session
+from app.models.reservation import Reservation, ReservationSeries
+from app.services.recurrence import occurrences, series_window_filter
+from app.services.reservation_service import MAX_DURATION_MINUTES, overlap_filter
+
+class SeriesConflictError(Exception):
+    """
+    Повторения серии пересекаются с существующими бронями; conflicts — по одному
+    на каждое такое повторение.
+    """
+
+    def __init__(self, conflicts: list):
+        super().__init__(f"{len(conflicts)} conflicting occurrences")
+        self.conflicts = conflicts
+
+def busy_intervals(
+    db: Session, table_id: int, window_start: datetime, window_end: datetime, exclude_series_id: int = None
+) -> List[Tuple]:
+    """
+    Занятые интервалы стола в окне: (начало, конец, reservation_id, series_id)
+    по возрастанию начала. Брони и серии читаются одним запросом UNION ALL;
+    бронь — серия из одного повторения.
+    """
+    reservations = select(
+        Reservation.id.label("reservation_id"),
+        null().label("series_id"),
+        Reservation.reservation_time,
+        Reservation.duration_minutes,
+        literal(1, Integer).label("period_seconds"),
+        literal(1, Integer).label("occurrence_count"),
+    ).where(Reservation.table_id == table_id, *overlap_filter(window_start, window_end))
+    series = select(
+        null().label("reservation_id"),
+        ReservationSeries.id.label("series_id"),
+        ReservationSeries.reservation_time,
+        ReservationSeries.duration_minutes,
+        ReservationSeries.period_seconds,
+        ReservationSeries.occurrence_count,
+    ).where(ReservationSeries.table_id == table_id, *series_window_filter(window_start, window_end))
+    if exclude_series_id:
+        series = series.where(ReservationSeries.id != exclude_series_id)
+
+    busy = [
+        (start, end, row.reservation_id, row.series_id)
+        for row in db.execute(union_all(reservations, series))
+        for _, start, end in occurrences(row, window_start, window_end)
+    ]
+    busy.sort(key=lambda interval: interval[0])
+    return busy
+
+def find_series_conflicts(
+    db: Session, table_id: int, planned: List[Tuple[int, datetime, datetime]], exclude_series_id: int = None
+) -> list:
+    """
+    Повторения planned — (номер, начало, конец) по возрастанию, — пересекающиеся
+    с занятостью стола. Для каждого возвращается первая мешающая бронь или серия.
+    """
+    if not planned:
+        return []
+    busy = busy_intervals(db, table_id, planned[0][1], planned[-1][2], exclude_series_id)
+    # Занятый интервал длится не дольше MAX_DURATION_MINUTES: начавшиеся раньше
+    # start - longest уже закончились, и указатель по ним не возвращается
+    longest = timedelta(minutes=MAX_DURATION_MINUTES)
+    conflicts = []
+    position = 0
+    for index, start, end in planned:
+        while position < len(busy) and busy[position][0] <= start - longest:
+            position += 1
+        for busy_start, busy_end, reservation_id, series_id in busy[position:]:
+            if busy_start >= end:
+                break
+            if busy_end > start:
+                conflicts.append({
+                    "index": index,
+                    "start": start,
+                    "end": end,
+                    "reservation_id": reservation_id,
+                    "series_id": series_id,
+                })
+                break
+    return conflicts
@@ -0,0 +1,134 @@
+"""
+Запросы в секунду при высокой конкурентности: синхронный и асинхронный режимы базы.
+
+    python -m benchmarks.bench_async_mode [--requests 3000] [--concurrency 256] [--url ...]
+
+Синхронный режим держит поток пула Starlette на все время обращения к базе,
+асинхронный (DB_ASYNC=1) выполняет запросы через AsyncSession без потоков.
+Оба режима обслуживаются одним и тем же приложением: переключается только
+зависимость get_db.
+"""
+import argparse
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from benchmarks.common import Timer, dispose_engine, make_engine, make_sessionmaker, report, summarize
+from app.database import get_db, to_async_url
+from app.main import app
+from app.models.reservation import Reservation
+from app.models.table import Table
+
+TABLES = 100
+RESERVATIONS = 5000
+
+
+def seed(engine):
+    base = datetime(2030, 1, 1, 12, 0)
+    with engine.begin() as conn:
+        conn.execute(insert(Table), [
+            {"id": i, "name": f"T{i}", "seats": 4, "location": "Зал"} for i in range(1, TABLES + 1)
+        ])
+        conn.execute(insert(Reservation), [
+            {
+                "customer_name": f"Гость {i}",
+                "table_id": i % TABLES + 1,
+                "reservation_time": base + timedelta(hours=2 * (i // TABLES)),
+                "duration_minutes": 90,
+                "end_time": base + timedelta(hours=2 * (i // TABLES), minutes=90),
+            }
+            for i in range(RESERVATIONS)
+        ])
+
+
+async def drive(requests: int, concurrency: int):
+    rng = random.Random(3)
+    paths = [
+        f"/api/reservations/{rng.randint(1, RESERVATIONS)}" if rng.random() < 0.8
+        else f"/api/tables/{rng.randint(1, TABLES)}"
+        for _ in range(requests)
+    ]
+    samples, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def call(path):
+            nonlocal errors
+            async with semaphore:
+                with Timer() as t:
+                    response = await client.get(path)
+                samples.append(t.ms)
+                errors += response.status_code != 200
+
+        with Timer() as total:
+            await asyncio.gather(*(call(p) for p in paths))
+    return samples, errors, total.elapsed
+
+
+def run_sync_mode(engine, requests, concurrency):
+    session_factory = make_sessionmaker(engine)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        return asyncio.run(drive(requests, concurrency))
+    finally:
+        app.dependency_overrides.clear()
+
+
+def run_async_mode(url, requests, concurrency):
+    async def scenario():
+        async_engine = create_async_engine(
+            to_async_url(url), poolclass=AsyncAdaptedQueuePool, pool_size=50, max_overflow=0
+        )
+        session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+        async def override_get_db():
+            async with session_factory() as db:
+                yield db
+
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            return await drive(requests, concurrency)
+        finally:
+            app.dependency_overrides.clear()
+            await async_engine.dispose()
+
+    return asyncio.run(scenario())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--url", default=None, help="URL базы (по умолчанию временный SQLite)")
+    args = parser.parse_args()
+
+    engine = make_engine(args.url, pool_size=50, max_overflow=0)
+    seed(engine)
+    url = engine.url.render_as_string(hide_password=False)
+
+    results = []
+    for mode, runner in (
+        ("sync", lambda: run_sync_mode(engine, args.requests, args.concurrency)),
+        ("async", lambda: run_async_mode(url, args.requests, args.concurrency)),
+    ):
+        samples, errors, elapsed = runner()
+        results.append(summarize(samples, elapsed, mode=mode, concurrency=args.concurrency, errors=errors))
+    dispose_engine(engine)
+    report("async_mode", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Пропускная способность пакетного импорта POST /api/reservations/bulk.
+
+    python -m benchmarks.bench_bulk_import [--rows 20000] [--tables 500] [--ndjson] [--url ...]
+
+Около 5% элементов намеренно пересекаются с соседями по пакету.
+"""
+import argparse
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, insert, select
+
+from benchmarks.common import Timer, dispose_engine, make_engine, make_sessionmaker, report
+from app.database import get_db
+from app.main import app
+from app.models.reservation import Reservation
+from app.models.table import Table
+
+
+def make_items(rows: int, tables: int):
+    rng = random.Random(5)
+    base = (datetime.now(timezone.utc) + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+    items = []
+    for i in range(rows):
+        slot = i // tables
+        if rng.random() < 0.05:
+            slot = max(0, slot - 1)
+        items.append({
+            "customer_name": f"Гость {i}",
+            "table_id": i % tables + 1,
+            "reservation_time": (base + timedelta(hours=2 * slot)).isoformat(),
+            "duration_minutes": 90,
+        })
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--tables", type=int, default=500)
+    parser.add_argument("--ndjson", action="store_true")
+    parser.add_argument("--url", default=None, help="URL базы (по умолчанию временный SQLite)")
+    args = parser.parse_args()
+
+    engine = make_engine(args.url)
+    with engine.begin() as conn:
+        conn.execute(insert(Table), [
+            {"id": i, "name": f"T{i}", "seats": 4, "location": "Зал"} for i in range(1, args.tables + 1)
+        ])
+    session_factory = make_sessionmaker(engine)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    items = make_items(args.rows, args.tables)
+    if args.ndjson:
+        body = "\n".join(json.dumps(item) for item in items)
+        headers = {"Content-Type": "application/x-ndjson"}
+    else:
+        body = json.dumps(items)
+        headers = {"Content-Type": "application/json"}
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as client:
+        with Timer() as t:
+            response = client.post("/api/reservations/bulk", content=body, headers=headers)
+    app.dependency_overrides.clear()
+    response.raise_for_status()
+    data = response.json()
+
+    with engine.connect() as conn:
+        stored = conn.execute(select(func.count()).select_from(Reservation)).scalar()
+    dispose_engine(engine)
+
+    report("bulk_import", {
+        "rows": args.rows,
+        "tables": args.tables,
+        "format": "ndjson" if args.ndjson else "json",
+        "elapsed_ms": round(t.ms, 2),
+        "rows_per_s": round(args.rows / t.elapsed, 2),
+        "created": data["created"],
+        "rejected": data["rejected"],
+        "stored": stored,
+    })
+
+
+if __name__ == "__main__":
+    main()
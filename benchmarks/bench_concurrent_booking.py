@@ -0,0 +1,102 @@
+"""
+Конкурентные бронирования: N одновременных POST /api/reservations по K столам.
+
+    python -m benchmarks.bench_concurrent_booking [--requests 400] [--tables 8] [--slots 4] [--url ...]
+
+Запросы идут через ASGI-приложение в процессе; синхронные обработчики
+выполняются в пуле потоков, поэтому проверка и вставка действительно
+конкурируют. Счетчик double_bookings обязан быть равен нулю.
+"""
+import argparse
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import insert, text
+
+from benchmarks.common import Timer, dispose_engine, make_engine, make_sessionmaker, report, summarize
+from app.database import get_db
+from app.main import app
+from app.models.table import Table
+
+DOUBLE_BOOKINGS_SQL = """
+    SELECT count(*) FROM reservations a
+    JOIN reservations b
+      ON a.table_id = b.table_id AND a.id < b.id
+     AND a.reservation_time < b.end_time AND b.reservation_time < a.end_time
+"""
+
+
+async def run(requests: int, tables: int, slots: int, session_factory):
+    rng = random.Random(1)
+    base = (datetime.now(timezone.utc) + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+    payloads = [
+        {
+            "customer_name": f"Гость {i}",
+            "table_id": rng.randint(1, tables),
+            # Слоты частично пересекаются, чтобы конфликты были частыми
+            "reservation_time": (base + timedelta(minutes=45 * rng.randrange(slots))).isoformat(),
+            "duration_minutes": 60,
+        }
+        for i in range(requests)
+    ]
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    samples, statuses = [], {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def book(payload):
+            with Timer() as t:
+                response = await client.post("/api/reservations/", json=payload)
+            samples.append(t.ms)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        with Timer() as total:
+            await asyncio.gather(*(book(p) for p in payloads))
+    app.dependency_overrides.clear()
+    return samples, statuses, total.elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--tables", type=int, default=8)
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--url", default=None, help="URL базы (по умолчанию временный SQLite)")
+    args = parser.parse_args()
+
+    # Пул больше пула потоков Starlette (40): иначе потоки, ждущие соединение,
+    # блокируют закрытие сессий и запросы зависают
+    engine = make_engine(args.url, pool_size=50, max_overflow=0)
+    with engine.begin() as conn:
+        conn.execute(insert(Table), [
+            {"id": i, "name": f"T{i}", "seats": 4, "location": "Зал"} for i in range(1, args.tables + 1)
+        ])
+    samples, statuses, elapsed = asyncio.run(
+        run(args.requests, args.tables, args.slots, make_sessionmaker(engine))
+    )
+    with engine.connect() as conn:
+        double_bookings = conn.execute(text(DOUBLE_BOOKINGS_SQL)).scalar()
+    dispose_engine(engine)
+
+    report("concurrent_booking", summarize(
+        samples,
+        elapsed,
+        tables=args.tables,
+        statuses={str(k): v for k, v in sorted(statuses.items())},
+        double_bookings=double_bookings,
+    ))
+    if double_bookings:
+        raise SystemExit("Обнаружено двойное бронирование")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Задержка проверки конфликтов в зависимости от числа броней.
+
+    python -m benchmarks.bench_conflict_check [--sizes 1000 10000 100000] [--url postgresql://...]
+
+Для каждого размера база заполняется заново; при индексируемой проверке
+p50/p99 не должны расти вместе с числом строк.
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from benchmarks.common import Timer, dispose_engine, make_engine, make_sessionmaker, report, summarize
+from app.models.reservation import Reservation
+from app.models.table import Table
+from app.services.reservation_service import is_table_available
+
+TABLES = 200
+PROBES = 500
+
+
+def seed(engine, rows: int):
+    rng = random.Random(42)
+    base = datetime(2030, 1, 1, 12, 0)
+    with engine.begin() as conn:
+        conn.execute(insert(Table), [
+            {"id": i, "name": f"T{i}", "seats": 4, "location": "Зал"} for i in range(1, TABLES + 1)
+        ])
+        batch = []
+        for i in range(rows):
+            start = base + timedelta(minutes=30 * (i // TABLES))
+            duration = rng.choice((30, 60, 90))
+            batch.append({
+                "customer_name": f"Гость {i}",
+                "table_id": i % TABLES + 1,
+                "reservation_time": start,
+                "duration_minutes": duration,
+                "end_time": start + timedelta(minutes=duration),
+            })
+            if len(batch) == 10000:
+                conn.execute(insert(Reservation), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Reservation), batch)
+    return base, timedelta(minutes=30 * (rows // TABLES + 1))
+
+
+def measure(session_factory, check, base, span):
+    rng = random.Random(7)
+    samples = []
+    with session_factory() as db:
+        for _ in range(PROBES):
+            start = base + timedelta(minutes=rng.randrange(int(span.total_seconds() // 60)))
+            with Timer() as t:
+                check(db, rng.randint(1, TABLES), start, 90)
+            samples.append(t.ms)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--url", default=None, help="URL базы (по умолчанию временный SQLite)")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        engine = make_engine(args.url)
+        base, span = seed(engine, size)
+        session_factory = make_sessionmaker(engine)
+        results.append(summarize(measure(session_factory, is_table_available, base, span), rows=size))
+        dispose_engine(engine)
+    report("conflict_check", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Стоимость вызова логгера на потоке запроса: прямые обработчики (консоль и
+RotatingFileHandler) против очереди с фоновым слушателем.
+
+    python -m benchmarks.bench_logging [--calls 20000] [--format text|json]
+
+Вывод консольного обработчика уходит в os.devnull, файл — во временный каталог.
+Сценарий health показывает вызов, отброшенный ограничением частоты.
+"""
+import argparse
+import logging
+import os
+import tempfile
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from benchmarks.common import Timer, report, summarize
+from app.core.logger import RateLimitFilter, build_pipeline, make_formatter
+
+
+def make_handlers(directory: Path, fmt: str):
+    formatter = make_formatter(fmt)
+    console = logging.StreamHandler(open(os.devnull, "w", encoding="utf-8"))
+    file_handler = RotatingFileHandler(
+        directory / "bench.log", maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8"
+    )
+    for handler in (console, file_handler):
+        handler.setFormatter(formatter)
+    return [console, file_handler]
+
+
+def close_handlers(handlers):
+    for handler in handlers:
+        handler.flush()
+        handler.close()
+
+
+def measure(logger, calls: int):
+    samples = []
+    with Timer() as total:
+        for i in range(calls):
+            with Timer() as t:
+                logger.info("Бронирование %s для стола %s создано", i, i % 50)
+            samples.append(t.ms)
+    return samples, total.elapsed
+
+
+def make_logger(name: str, handlers):
+    logger = logging.getLogger(name)
+    logger.handlers = list(handlers)
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+
+        handlers = make_handlers(directory, args.format)
+        samples, elapsed = measure(make_logger("bench.direct", handlers), args.calls)
+        results.append(summarize(samples, elapsed, mode="direct"))
+        close_handlers(handlers)
+
+        handlers = make_handlers(directory, args.format)
+        queue_handler, listener = build_pipeline(handlers, queue_size=args.calls + 1)
+        listener.start()
+        samples, elapsed = measure(make_logger("bench.queued", [queue_handler]), args.calls)
+        with Timer() as drain:
+            # Время, за которое слушатель дописывает очередь на диск
+            listener.stop()
+        results.append(summarize(samples, elapsed, mode="queued", drain_ms=round(drain.ms, 2)))
+        close_handlers(handlers)
+
+        handlers = make_handlers(directory, args.format)
+        queue_handler, listener = build_pipeline(
+            handlers, [RateLimitFilter({"bench.health": (1, 60)})], queue_size=args.calls + 1
+        )
+        listener.start()
+        samples, elapsed = measure(make_logger("bench.health", [queue_handler]), args.calls)
+        listener.stop()
+        results.append(summarize(samples, elapsed, mode="queued_rate_limited"))
+        close_handlers(handlers)
+
+    report("logging", results)
+
+
+if __name__ == "__main__":
+    main()
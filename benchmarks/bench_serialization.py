@@ -0,0 +1,85 @@
+"""
+Сериализация списка броней в тело ответа: прежняя модель с входными валидаторами,
+облегченная ReservationOut и кортежи колонок с orjson.
+
+    python -m benchmarks.bench_serialization [--rows 10000] [--repeat 20]
+
+Замеряется только путь от строк к байтам ответа, без запроса к базе.
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import Field
+
+from benchmarks.common import Timer, report, summarize
+from app.core.serialization import rows_response
+from app.models.reservation import Reservation
+from app.routers.reservations import LIST_FIELDS
+from app.schemas.reservation import ReservationBase, ReservationOut
+
+
+class LegacyReservationOut(ReservationBase):
+    # Модель ответа до разделения: наследует входные валидаторы
+    id: int = Field(..., description="ID бронирования")
+
+    class Config:
+        orm_mode = True
+
+
+def make_rows(count: int):
+    # Даты в будущем, иначе прежняя модель отклонит строки
+    base = datetime.now().replace(microsecond=0) + timedelta(days=30)
+    objects, tuples = [], []
+    for i in range(count):
+        values = (f"Гость {i}", i % 200 + 1, base + timedelta(minutes=30 * i), 90, i + 1)
+        objects.append(Reservation(**dict(zip(LIST_FIELDS, values))))
+        tuples.append(values)
+    return objects, tuples
+
+
+def fastapi_path(model):
+    # То же, что делает FastAPI для response_model=list[model]
+    field = create_response_field("response", List[model])
+
+    def run(rows):
+        content = asyncio.run(serialize_response(field=field, response_content=rows))
+        return JSONResponse(content).body
+
+    return run
+
+
+def measure(fn, rows, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        with Timer() as t:
+            body = fn(rows)
+        samples.append(t.ms)
+    return samples, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    objects, tuples = make_rows(args.rows)
+    scenarios = (
+        ("legacy_model", fastapi_path(LegacyReservationOut), objects),
+        ("lean_model", fastapi_path(ReservationOut), objects),
+        ("orjson_rows", lambda rows: rows_response(rows, LIST_FIELDS).body, tuples),
+    )
+    results = []
+    for name, fn, rows in scenarios:
+        samples, size = measure(fn, rows, args.repeat)
+        results.append(summarize(samples, mode=name, rows=args.rows, body_bytes=size))
+    report("serialization", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Холодный старт: время импорта app.main, запуска lifespan и первых запросов
+в новом процессе интерпретатора.
+
+    python -m benchmarks.bench_startup [--runs 5] [--url postgresql://...]
+
+Каждый прогон — отдельный процесс, поэтому кэши модулей и соединения
+не переживают замер.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.common import ROOT, dispose_engine, make_engine, report, summarize
+
+CHILD = r"""
+import json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    started = time.perf_counter()
+    client.get("/api/tables/")
+    first = time.perf_counter()
+    client.get("/api/tables/")
+    second = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "lifespan_ms": (started - imported) * 1000,
+    "first_request_ms": (first - started) * 1000,
+    "second_request_ms": (second - first) * 1000,
+}))
+"""
+
+
+def run_once(url: str) -> dict:
+    env = {**os.environ, "DATABASE_URL": url, "LOG_FILE": "", "METRICS_DIR": ""}
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--url", default=None, help="URL базы (по умолчанию временный SQLite)")
+    args = parser.parse_args()
+
+    engine = make_engine(args.url)
+    url = engine.url.render_as_string(hide_password=False)
+    runs = [run_once(url) for _ in range(args.runs)]
+    dispose_engine(engine)
+
+    results = [
+        summarize([run[phase] for run in runs], phase=phase)
+        for phase in ("import_ms", "lifespan_ms", "first_request_ms", "second_request_ms")
+    ]
+    report("startup", results)
+
+
+if __name__ == "__main__":
+    main()
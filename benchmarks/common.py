@@ -0,0 +1,96 @@
+"""
+Общие утилиты бенчмарков: временная база, замер задержек и вывод результатов в JSON.
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Бенчмарки запускаются из корня репозитория: python -m benchmarks.<name>
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.database import Base  # noqa: E402
+import app.models.table  # noqa: E402,F401
+import app.models.reservation  # noqa: E402,F401
+
+
+# Логи каждого запроса httpx искажают замеры и засоряют logs/app.log
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def make_engine(url: str = None, **engine_kwargs):
+    """
+    Создает движок для бенчмарка. Без url — временный файл SQLite.
+    """
+    if url is None:
+        fd, path = tempfile.mkstemp(prefix="bench_", suffix=".db")
+        os.close(fd)
+        url = f"sqlite:///{path}"
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    engine = create_engine(url, connect_args=connect_args, **engine_kwargs)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def dispose_engine(engine):
+    """
+    Закрывает соединения и удаляет временный файл SQLite, если он создавался make_engine.
+    """
+    engine.dispose()
+    path = engine.url.database
+    if engine.url.get_backend_name() == "sqlite" and path and Path(path).name.startswith("bench_"):
+        Path(path).unlink(missing_ok=True)
+
+
+def make_sessionmaker(engine):
+    return sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples_ms, elapsed_s=None, **extra):
+    """
+    Сводка по задержкам в миллисекундах: p50/p90/p99/max и пропускная способность.
+    """
+    result = {
+        "count": len(samples_ms),
+        "p50_ms": round(percentile(samples_ms, 50), 4),
+        "p90_ms": round(percentile(samples_ms, 90), 4),
+        "p99_ms": round(percentile(samples_ms, 99), 4),
+        "max_ms": round(max(samples_ms), 4) if samples_ms else 0.0,
+    }
+    if elapsed_s:
+        result["throughput_per_s"] = round(len(samples_ms) / elapsed_s, 2)
+    result.update(extra)
+    return result
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        self.ms = self.elapsed * 1000
+
+
+def report(name: str, results):
+    print(json.dumps({"benchmark": name, "results": results}, ensure_ascii=False, indent=2))
@@ -0,0 +1,134 @@
+"""
+Генератор реалистичного набора данных для бенчмарков.
+
+    python -m benchmarks.datagen --preset large --url sqlite:///bench.db
+
+Столы распределены по залам, вместимость 2–8 мест. Брони идут каждый день с
+пиками в обед (12–14) и ужин (18–21), не пересекаются в пределах стола и
+укладываются в часы работы 10:00–23:30.
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from benchmarks.common import Timer, make_engine, report
+from app.models.reservation import Reservation
+from app.models.table import Table
+
+PRESETS = {
+    "small": {"tables": 200, "reservations": 20_000},
+    "medium": {"tables": 1_000, "reservations": 200_000},
+    "large": {"tables": 5_000, "reservations": 1_000_000},
+}
+LOCATIONS = ["Зал 1", "Зал 2", "Терраса", "Веранда", "VIP", "Бар", "Второй этаж", "Патио"]
+OPENING_MINUTE = 10 * 60
+CLOSING_MINUTE = 23 * 60 + 30
+# Смесь (центр, разброс в минутах, вес): обед, ужин и равномерный фон
+PEAKS = ((13 * 60, 45, 0.3), (19 * 60 + 30, 60, 0.55), (None, None, 0.15))
+BOOKINGS_PER_TABLE_DAY = 4
+BATCH_SIZE = 20_000
+
+
+def sample_start_minute(rng: random.Random) -> int:
+    roll, acc = rng.random(), 0.0
+    for center, spread, weight in PEAKS:
+        acc += weight
+        if roll <= acc:
+            if center is None:
+                return rng.randrange(OPENING_MINUTE, CLOSING_MINUTE - 30)
+            return int(rng.gauss(center, spread))
+    return rng.randrange(OPENING_MINUTE, CLOSING_MINUTE - 30)
+
+
+def table_day_schedule(rng: random.Random, bookings: int) -> list:
+    """
+    До bookings непересекающихся броней (минута начала, длительность) за день стола.
+    """
+    starts = sorted(
+        max(OPENING_MINUTE, min(CLOSING_MINUTE - 30, sample_start_minute(rng))) // 15 * 15
+        for _ in range(bookings)
+    )
+    schedule, free_from = [], OPENING_MINUTE
+    for start in starts:
+        start = max(start, free_from)
+        duration = rng.choice((60, 90, 90, 120, 120, 150, 180))
+        if start + duration > CLOSING_MINUTE:
+            duration = (CLOSING_MINUTE - start) // 30 * 30
+        if duration < 30:
+            break
+        schedule.append((start, duration))
+        free_from = start + duration + rng.choice((0, 15, 15, 30))
+    return schedule
+
+
+def generate(engine, tables: int, reservations: int, start_day: datetime = None, seed: int = 42) -> dict:
+    """
+    Заполняет базу и возвращает параметры набора (первый день, число дней, столы).
+    """
+    rng = random.Random(seed)
+    start_day = (start_day or datetime.now() + timedelta(days=1)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    with engine.begin() as conn:
+        conn.execute(insert(Table), [
+            {
+                "id": i,
+                "name": f"Стол {i}",
+                "seats": rng.choice((2, 2, 4, 4, 4, 6, 8)),
+                "location": LOCATIONS[i % len(LOCATIONS)],
+            }
+            for i in range(1, tables + 1)
+        ])
+
+        batch, total, days = [], 0, 0
+        while total < reservations:
+            day_start = start_day + timedelta(days=days)
+            days += 1
+            for table_id in range(1, tables + 1):
+                count = min(BOOKINGS_PER_TABLE_DAY + rng.randint(-2, 2), reservations - total)
+                for start, duration in table_day_schedule(rng, count):
+                    begin = day_start + timedelta(minutes=start)
+                    batch.append({
+                        "customer_name": f"Гость {total}",
+                        "table_id": table_id,
+                        "reservation_time": begin,
+                        "duration_minutes": duration,
+                        "end_time": begin + timedelta(minutes=duration),
+                    })
+                    total += 1
+                if len(batch) >= BATCH_SIZE:
+                    conn.execute(insert(Reservation.__table__), batch)
+                    batch = []
+                if total >= reservations:
+                    break
+        if batch:
+            conn.execute(insert(Reservation.__table__), batch)
+
+    return {"start_day": start_day, "days": days, "tables": tables, "reservations": total}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--preset", choices=PRESETS, default="small")
+    parser.add_argument("--tables", type=int)
+    parser.add_argument("--reservations", type=int)
+    parser.add_argument("--url", default=None, help="URL базы (по умолчанию временный SQLite)")
+    args = parser.parse_args()
+
+    preset = PRESETS[args.preset]
+    engine = make_engine(args.url)
+    with Timer() as t:
+        info = generate(engine, args.tables or preset["tables"], args.reservations or preset["reservations"])
+    engine.dispose()
+    report("datagen", {
+        **info,
+        "start_day": info["start_day"].isoformat(),
+        "url": engine.url.render_as_string(hide_password=True),
+        "elapsed_s": round(t.elapsed, 2),
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Набор сценариев нагрузки против приложения в процессе.
+
+    python -m benchmarks.run [--preset small|medium|large] [--url postgresql://...]
+                             [--scenarios list_pagination availability ...]
+                             [--requests 1000] [--concurrency 32]
+                             [--out result.json] [--compare previous.json]
+
+Без --url данные генерируются во временный SQLite (benchmarks.datagen).
+Каждый сценарий выдает пропускную способность, перцентили задержки и
+распределение статусов; --compare добавляет относительные изменения
+к сохраненному ранее результату.
+"""
+import argparse
+import asyncio
+import json
+import random
+from datetime import timedelta
+
+import httpx
+
+from benchmarks.common import Timer, dispose_engine, make_engine, make_sessionmaker, report, summarize
+from benchmarks.datagen import PRESETS, generate
+from app.database import get_db
+from app.main import app
+from app.services.occupancy_cache import occupancy_cache
+
+
+class Dataset:
+    def __init__(self, info: dict, rng: random.Random):
+        self.start_day = info["start_day"]
+        self.days = info["days"]
+        self.tables = info["tables"]
+        self.reservations = info["reservations"]
+        self.rng = rng
+
+    def random_time(self, day_offset: int = None):
+        day = self.rng.randrange(self.days) if day_offset is None else day_offset
+        minute = self.rng.randrange(10 * 60, 22 * 60, 15)
+        return self.start_day + timedelta(days=day, minutes=minute)
+
+
+def scenario_create_burst(ds: Dataset, n: int):
+    # День после набора данных: в основном свободные слоты, коллизии внутри всплеска
+    return [
+        ("POST", "/api/reservations/", {
+            "customer_name": f"Всплеск {i}",
+            "table_id": ds.rng.randint(1, ds.tables),
+            "reservation_time": ds.random_time(ds.days).isoformat(),
+            "duration_minutes": 90,
+        })
+        for i in range(n)
+    ]
+
+
+def scenario_conflict_updates(ds: Dataset, n: int):
+    # Сдвиг существующих броней на соседние слоты того же стола: большинство упирается в 409
+    return [
+        ("PUT", f"/api/reservations/{ds.rng.randint(1, ds.reservations)}", {
+            "reservation_time": ds.random_time().isoformat(),
+            "duration_minutes": ds.rng.choice((90, 120, 150)),
+        })
+        for _ in range(n)
+    ]
+
+
+def scenario_availability(ds: Dataset, n: int):
+    requests = []
+    for _ in range(n):
+        start = ds.random_time()
+        requests.append(("GET", "/api/availability/", {
+            "party_size": ds.rng.choice((2, 4, 6)),
+            "from": start.isoformat(),
+            "to": (start + timedelta(hours=3)).isoformat(),
+            "slot_minutes": 90,
+            "location": "Зал 1",
+        }))
+    return requests
+
+
+def scenario_availability_check(ds: Dataset, n: int):
+    return [
+        ("GET", "/api/availability/check", {
+            "table_id": ds.rng.randint(1, min(ds.tables, 50)),
+            "reservation_time": ds.random_time(ds.rng.randrange(min(ds.days, 3))).isoformat(),
+            "duration_minutes": 90,
+        })
+        for _ in range(n)
+    ]
+
+
+SCENARIOS = {
+    "list_pagination": None,
+    "availability": scenario_availability,
+    "availability_check": scenario_availability_check,
+    "create_burst": scenario_create_burst,
+    "conflict_updates": scenario_conflict_updates,
+}
+
+
+async def execute(client, requests, concurrency):
+    samples, statuses = [], {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(method, path, payload):
+        async with semaphore:
+            kwargs = {"params": payload} if method == "GET" else {"json": payload}
+            with Timer() as t:
+                response = await client.request(method, path, **kwargs)
+            samples.append(t.ms)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    with Timer() as total:
+        await asyncio.gather(*(call(*r) for r in requests))
+    return samples, statuses, total.elapsed
+
+
+async def execute_pagination(client, ds: Dataset, n: int, concurrency: int):
+    """
+    concurrency обходчиков листают /api/reservations по курсору, всего n страниц;
+    половина обходчиков фильтрует по столу.
+    """
+    samples, statuses = [], {}
+    pages_per_walker = max(1, n // concurrency)
+
+    async def walk(filtered: bool):
+        params = {"limit": 100}
+        if filtered:
+            params["table_id"] = ds.rng.randint(1, ds.tables)
+        for _ in range(pages_per_walker):
+            with Timer() as t:
+                response = await client.get("/api/reservations/", params=params)
+            samples.append(t.ms)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            params["cursor"] = cursor
+
+    with Timer() as total:
+        await asyncio.gather(*(walk(i % 2 == 1) for i in range(concurrency)))
+    return samples, statuses, total.elapsed
+
+
+async def run_suite(ds: Dataset, scenarios, n: int, concurrency: int):
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name in scenarios:
+            if name == "list_pagination":
+                samples, statuses, elapsed = await execute_pagination(client, ds, n, concurrency)
+            else:
+                samples, statuses, elapsed = await execute(client, SCENARIOS[name](ds, n), concurrency)
+            results[name] = summarize(
+                samples, elapsed, statuses={str(k): v for k, v in sorted(statuses.items())}
+            )
+    return results
+
+
+def compare(current: dict, previous: dict) -> dict:
+    """
+    Относительные изменения (доли) к предыдущему прогону по общим сценариям.
+    """
+    deltas = {}
+    for name, result in current.items():
+        before = previous.get(name)
+        if not before:
+            continue
+        deltas[name] = {
+            key: round(result[key] / before[key] - 1, 4)
+            for key in ("throughput_per_s", "p50_ms", "p99_ms")
+            if before.get(key)
+        }
+    return deltas
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--preset", choices=PRESETS, default="small")
+    parser.add_argument("--tables", type=int)
+    parser.add_argument("--reservations", type=int)
+    parser.add_argument("--url", default=None, help="URL базы (по умолчанию временный SQLite)")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="Сохранить результат в JSON-файл")
+    parser.add_argument("--compare", help="JSON-файл предыдущего прогона для сравнения")
+    args = parser.parse_args()
+
+    preset = PRESETS[args.preset]
+    # Пул больше пула потоков Starlette, см. bench_concurrent_booking
+    engine = make_engine(args.url, pool_size=50, max_overflow=0)
+    with Timer() as t:
+        info = generate(
+            engine,
+            args.tables or preset["tables"],
+            args.reservations or preset["reservations"],
+            seed=args.seed
+        )
+    session_factory = make_sessionmaker(engine)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    occupancy_cache.clear()
+    try:
+        scenarios = asyncio.run(run_suite(
+            Dataset(info, random.Random(args.seed)), args.scenarios, args.requests, args.concurrency
+        ))
+    finally:
+        app.dependency_overrides.clear()
+        dispose_engine(engine)
+
+    result = {
+        "dataset": {
+            "backend": engine.url.get_backend_name(),
+            "tables": info["tables"],
+            "reservations": info["reservations"],
+            "days": info["days"],
+            "generate_s": round(t.elapsed, 2),
+        },
+        "settings": {"requests": args.requests, "concurrency": args.concurrency, "seed": args.seed},
+        "scenarios": scenarios,
+        "cache": occupancy_cache.stats(),
+    }
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            result["comparison"] = compare(scenarios, json.load(f)["results"]["scenarios"])
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"benchmark": "suite", "results": result}, f, ensure_ascii=False, indent=2)
+    report("suite", result)
+
+
+if __name__ == "__main__":
+    main()
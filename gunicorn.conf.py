@@ -0,0 +1,54 @@
+"""
+Продакшен-запуск: gunicorn с воркерами uvicorn.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Код приложения импортируется один раз в мастер-процессе (preload_app) и
+разделяется воркерами после fork; соединения с базой, логи и фоновые потоки
+создаются в каждом воркере при старте (lifespan).
+"""
+import os
+import shutil
+import tempfile
+
+
+def cpu_count() -> int:
+    # Учитывает ограничение CPU контейнера через affinity, если оно доступно
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+timeout = int(os.getenv("WORKER_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+# Перезапуск воркера после N запросов ограничивает рост памяти; 0 — без перезапуска
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+# Метрики всех воркеров объединяются через общий каталог снимков
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), "restaurant_metrics"))
+
+# Версии для ETag и кэш занятости согласуются между воркерами только через общую
+# шину событий; без нее воркер не узнает о чужих записях и мог бы ответить
+# устаревшим 304 или устаревшей доступностью
+if workers > 1 and os.getenv("EVENTS_BACKEND", "memory").lower() != "postgres":
+    os.environ.setdefault("CONDITIONAL_GET", "0")
+    os.environ.setdefault("OCCUPANCY_CACHE_SIZE", "0")
+
+
+def on_starting(server):
+    # Снимки предыдущего запуска не должны попасть в счетчики
+    shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
+
+
+def post_fork(server, worker):
+    from app.database import reset_after_fork
+
+    reset_after_fork()
@@ -1,12 +1,17 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 from app.main import app
 from app.database import Base, get_db
 from app.core.logger import app_logger
+from app.core.idempotency import idempotency_store
+from app.core.rate_limit import rate_limiter
+from app.services.floor_service import snapshot_cache
+from app.services.occupancy_cache import occupancy_cache
 
 # Тестовая база данных в памяти
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -43,9 +48,42 @@ def db_session(test_db):
     transaction.rollback()
     connection.close()
 
+@pytest.fixture(autouse=True)
+def reset_caches():
+    # Тестовые транзакции откатываются, а кэш процесса — нет
+    occupancy_cache.clear()
+    snapshot_cache.clear()
+    idempotency_store.clear()
+    rate_limiter.reset()
+    yield
+
 @pytest.fixture(scope="function")
 def client(db_session):
     app.dependency_overrides[get_db] = lambda: db_session
     with TestClient(app) as test_client:
         yield test_client
-    app.dependency_overrides.clear() 
\ No newline at end of file
+    app.dependency_overrides.clear()
+
+@pytest.fixture(scope="function")
+def async_engine(tmp_path):
+    # Асинхронный режим проверяется на aiosqlite; файл нужен, чтобы схему
+    # можно было создать синхронно, а соединения не переживали цикл событий
+    db_path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    yield engine
+
+@pytest.fixture(scope="function")
+def async_client(async_engine):
+    AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_async_db
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
@@ -0,0 +1,92 @@
+from datetime import datetime
+import numpy as np
+from app.models.analytics import UtilizationHourly
+from app.services.analytics_service import HOUR, rebuild_utilization, split_by_hour
+
+DAY = "2030-01-07"
+
+def create_table(client, name="Стол", location="Зал"):
+    response = client.post("/api/tables/", json={"name": name, "seats": 4, "location": location})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+def utilization(client, group_by, date_from=DAY, date_to=DAY):
+    response = client.get("/api/analytics/utilization", params={"from": date_from, "to": date_to, "group_by": group_by})
+    assert response.status_code == 200, response.text
+    return {bucket["key"]: bucket for bucket in response.json()["buckets"]}
+
+def aggregates(db_session):
+    return sorted(
+        (row.table_id, row.hour_start, row.occupied_seconds)
+        for row in db_session.query(UtilizationHourly).filter(UtilizationHourly.occupied_seconds != 0)
+    )
+
+def test_split_by_hour():
+    start = 18 * HOUR + 30 * 60
+    tables, hours, seconds = split_by_hour(np.array([7, 8]), np.array([start, 0]), np.array([start + 90 * 60, 600]))
+    assert tables.tolist() == [7, 7, 8]
+    assert hours.tolist() == [18, 19, 0]
+    assert seconds.tolist() == [1800, 3600, 600]
+
+def test_incremental_updates(client):
+    table_id = create_table(client)
+    payload = {"customer_name": "Иван", "table_id": table_id, "reservation_time": f"{DAY}T18:30:00", "duration_minutes": 90}
+    url = f"/api/reservations/{client.post('/api/reservations/', json=payload).json()['id']}"
+
+    by_hour = utilization(client, "hour")
+    assert by_hour[18]["occupied_minutes"] == 30
+    assert by_hour[19]["occupied_minutes"] == 60
+    assert by_hour[19]["available_minutes"] == 60
+    table = utilization(client, "table")[table_id]
+    assert table["occupied_minutes"] == 90
+    assert table["available_minutes"] == 24 * 60
+    assert table["utilization"] == round(90 / (24 * 60), 4)
+
+    # Перенос вычитает прежний интервал и добавляет новый
+    assert client.put(url, json={"reservation_time": f"{DAY}T20:00:00", "duration_minutes": 60}).status_code == 200
+    by_hour = utilization(client, "hour")
+    assert (by_hour[18]["occupied_minutes"], by_hour[19]["occupied_minutes"], by_hour[20]["occupied_minutes"]) == (0, 0, 60)
+
+    assert client.delete(url).status_code == 204
+    assert utilization(client, "table")[table_id]["occupied_minutes"] == 0
+
+    bulk = [
+        {"customer_name": "Анна", "table_id": table_id, "reservation_time": f"{DAY}T12:00:00", "duration_minutes": 60},
+        {"customer_name": "Олег", "table_id": table_id, "reservation_time": f"{DAY}T13:00:00", "duration_minutes": 30},
+    ]
+    assert client.post("/api/reservations/bulk", json=bulk).json()["created"] == 2
+    assert utilization(client, "table")[table_id]["occupied_minutes"] == 90
+
+def test_rebuild_matches_incremental(client, db_session):
+    first = create_table(client, "Стол 1", "Терраса")
+    second = create_table(client, "Стол 2", "Зал")
+    for table_id, start, duration in (
+        (first, f"{DAY}T23:30:00", 120),
+        (first, f"{DAY}T10:00:00", 45),
+        (second, f"{DAY}T10:15:00", 240),
+    ):
+        payload = {"customer_name": "Гость", "table_id": table_id, "reservation_time": start, "duration_minutes": duration}
+        assert client.post("/api/reservations/", json=payload).status_code == 201
+
+    incremental = aggregates(db_session)
+    assert rebuild_utilization(db_session) == len(incremental)
+    assert aggregates(db_session) == incremental
+
+    # Бронь через полночь делится между днями
+    by_day = utilization(client, "day", DAY, "2030-01-08")
+    assert by_day[DAY]["occupied_minutes"] == 30 + 45 + 240
+    assert by_day["2030-01-08"]["occupied_minutes"] == 90
+    assert by_day[DAY]["available_minutes"] == 2 * 24 * 60
+    by_location = utilization(client, "location")
+    assert by_location["Терраса"]["occupied_minutes"] == 75
+    assert by_location["Зал"]["occupied_minutes"] == 240
+    assert incremental[0][1] == datetime(2030, 1, 7, 10)
+
+def test_utilization_validation(client):
+    url = "/api/analytics/utilization"
+    assert client.get(url, params={"from": "2030-01-08", "to": "2030-01-07"}).status_code == 400
+    assert client.get(url, params={"from": "2020-01-01", "to": "2030-01-07"}).status_code == 400
+    assert client.get(url, params={"group_by": "week"}).status_code == 422
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.json()["group_by"] == "table"
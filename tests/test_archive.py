@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+from app.models.reservation import Reservation, ReservationArchive
+from app.models.table import Table
+from app.services.archive_service import archive_reservations, ensure_partitions, next_month
+
+def add_reservations(db_session):
+    table = Table(name="Тестовый стол", seats=4, location="Тестовый зал")
+    db_session.add(table)
+    db_session.commit()
+    now = datetime.utcnow().replace(microsecond=0)
+    old = Reservation(customer_name="Давний гость", table_id=table.id, reservation_time=now - timedelta(days=400), duration_minutes=60)
+    recent = Reservation(customer_name="Недавний гость", table_id=table.id, reservation_time=now - timedelta(days=1), duration_minutes=60)
+    db_session.add_all([old, recent])
+    db_session.commit()
+    return now, old.id, recent.id
+
+def test_archive_and_read_path(client, db_session):
+    now, old_id, recent_id = add_reservations(db_session)
+
+    assert archive_reservations(db_session, now - timedelta(days=180), batch_size=1) == 1
+    assert db_session.query(Reservation).count() == 1
+    assert db_session.get(ReservationArchive, old_id).archived_at is not None
+
+    # Перенесенная бронь по-прежнему доступна по id, но не попадает в список
+    response = client.get(f"/api/reservations/{old_id}")
+    assert response.status_code == 200
+    assert response.json()["customer_name"] == "Давний гость"
+    assert [r["id"] for r in client.get("/api/reservations/").json()] == [recent_id]
+    assert client.get("/api/reservations/999").status_code == 404
+
+def test_archive_publishes_event(client, db_session, monkeypatch):
+    import orjson
+    from app.services import archive_service
+    from app.services.events import broadcaster, notify_event
+
+    now, _, _ = add_reservations(db_session)
+    # Без EVENTS_BACKEND=postgres передать событие другим процессам нельзя
+    assert notify_event(db_session, {"type": "reservations_archived", "count": 0}) is False
+
+    sent = []
+    monkeypatch.setattr(archive_service, "notify_event", lambda db, event: sent.append(event))
+    etag = client.get("/api/reservations/").headers["etag"]
+    archive_reservations(db_session, now - timedelta(days=180))
+    assert sent == [{"type": "reservations_archived", "count": 1}]
+
+    # Воркер API получает событие через NOTIFY и перестает отвечать 304
+    assert client.get("/api/reservations/", headers={"If-None-Match": etag}).status_code == 304
+    broadcaster._dispatch(orjson.dumps(sent[0]))
+    assert client.get("/api/reservations/", headers={"If-None-Match": etag}).status_code == 200
+
+def test_partitions_only_on_postgres(db_session):
+    assert ensure_partitions(db_session) == []
+    assert next_month(datetime(2026, 12, 15).date()).isoformat() == "2027-01-01"
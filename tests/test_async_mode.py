@@ -0,0 +1,93 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.table import Table
+from app.models.reservation import Reservation
+from app.services.reservation_service import is_table_available_async
+
+def test_async_table_and_reservation_flow(async_client):
+    response = async_client.post(
+        "/api/tables",
+        json={"name": "Стол у окна", "seats": 4, "location": "Зал 1"}
+    )
+    assert response.status_code == 201
+    table_id = response.json()["id"]
+
+    reservation_time = datetime.now() + timedelta(hours=1)
+    response = async_client.post(
+        "/api/reservations",
+        json={
+            "customer_name": "Иван Иванов",
+            "table_id": table_id,
+            "reservation_time": reservation_time.isoformat(),
+            "duration_minutes": 120
+        }
+    )
+    assert response.status_code == 201
+    reservation_id = response.json()["id"]
+
+    # Конфликт определяется так же, как в синхронном режиме
+    response = async_client.post(
+        "/api/reservations",
+        json={
+            "customer_name": "Петр Петров",
+            "table_id": table_id,
+            "reservation_time": (reservation_time + timedelta(minutes=30)).isoformat(),
+            "duration_minutes": 60
+        }
+    )
+    assert response.status_code == 409
+
+    response = async_client.put(
+        f"/api/reservations/{reservation_id}",
+        json={"customer_name": "Петр Петров"}
+    )
+    assert response.status_code == 200
+    assert response.json()["customer_name"] == "Петр Петров"
+
+    response = async_client.get("/api/reservations")
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == [reservation_id]
+
+    response = async_client.delete(f"/api/reservations/{reservation_id}")
+    assert response.status_code == 204
+    response = async_client.get(f"/api/reservations/{reservation_id}")
+    assert response.status_code == 404
+
+def test_is_table_available_async(async_engine):
+    start = datetime.now(timezone.utc) + timedelta(hours=1)
+
+    async def scenario():
+        async with AsyncSession(async_engine, expire_on_commit=False) as db:
+            table = Table(name="Тестовый стол", seats=4, location="Тестовый зал")
+            db.add(table)
+            await db.flush()
+            db.add(Reservation(
+                customer_name="Иван Иванов",
+                table_id=table.id,
+                reservation_time=start,
+                duration_minutes=60
+            ))
+            await db.commit()
+            return (
+                await is_table_available_async(db, table.id, start + timedelta(minutes=30), 60),
+                await is_table_available_async(db, table.id, start + timedelta(minutes=60), 60),
+            )
+
+    assert asyncio.run(scenario()) == (False, True)
+
+def test_check_availability_async(async_client, monkeypatch):
+    from app.services.occupancy_cache import occupancy_cache
+
+    # Без кэша занятости проверка выполняется асинхронным запросом
+    monkeypatch.setattr(occupancy_cache, "max_entries", 0)
+    table_id = async_client.post("/api/tables", json={"name": "Стол", "seats": 4, "location": "Зал"}).json()["id"]
+    start = datetime.now() + timedelta(hours=1)
+    async_client.post("/api/reservations", json={
+        "customer_name": "Иван Иванов", "table_id": table_id,
+        "reservation_time": start.isoformat(), "duration_minutes": 60,
+    })
+    params = {"table_id": table_id, "duration_minutes": 60}
+    busy = async_client.get("/api/availability/check", params={**params, "reservation_time": (start + timedelta(minutes=30)).isoformat()})
+    free = async_client.get("/api/availability/check", params={**params, "reservation_time": (start + timedelta(minutes=60)).isoformat()})
+    assert (busy.json()["available"], free.json()["available"]) == (False, True)
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+from app.models.table import Table
+from app.models.reservation import Reservation
+
+def test_get_availability(client, db_session):
+    # Создаем столы разной вместимости
+    small = Table(name="Маленький стол", seats=2, location="Зал 1")
+    large = Table(name="Большой стол", seats=6, location="Зал 1")
+    db_session.add_all([small, large])
+    db_session.commit()
+
+    window_start = (datetime.now() + timedelta(days=1)).replace(hour=18, minute=0, second=0, microsecond=0)
+    window_end = window_start + timedelta(hours=4)
+
+    # Бронь посередине окна делит его на два свободных промежутка
+    db_session.add(Reservation(
+        customer_name="Иван Иванов",
+        table_id=large.id,
+        reservation_time=window_start + timedelta(hours=1),
+        duration_minutes=120
+    ))
+    db_session.commit()
+
+    response = client.get(
+        "/api/availability",
+        params={"party_size": 4, "from": window_start.isoformat(), "to": window_end.isoformat()}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    # Маленький стол не вмещает компанию
+    assert [item["table_id"] for item in data] == [large.id]
+    assert data[0]["free_slots"] == [
+        {"start": window_start.isoformat() + "Z", "end": (window_start + timedelta(hours=1)).isoformat() + "Z"},
+        {"start": (window_start + timedelta(hours=3)).isoformat() + "Z", "end": window_end.isoformat() + "Z"},
+    ]
+
+    # Промежутки короче slot_minutes не возвращаются
+    response = client.get(
+        "/api/availability",
+        params={
+            "party_size": 4,
+            "from": window_start.isoformat(),
+            "to": window_end.isoformat(),
+            "slot_minutes": 90
+        }
+    )
+    assert response.status_code == 200
+    assert response.json() == []
+
+def test_get_availability_validation(client):
+    window_start = datetime.now() + timedelta(days=1)
+    response = client.get(
+        "/api/availability",
+        params={
+            "party_size": 2,
+            "from": window_start.isoformat(),
+            "to": (window_start - timedelta(hours=1)).isoformat()
+        }
+    )
+    assert response.status_code == 400
+
+def test_check_availability_cache(client, db_session):
+    table = Table(name="Тестовый стол", seats=4, location="Тестовый зал")
+    db_session.add(table)
+    db_session.commit()
+
+    start = (datetime.now() + timedelta(days=1)).replace(hour=19, minute=0, second=0, microsecond=0)
+    params = {"table_id": table.id, "reservation_time": start.isoformat(), "duration_minutes": 60}
+
+    before = client.get("/api/availability/cache").json()
+    response = client.get("/api/availability/check", params=params)
+    assert response.json() == {"table_id": table.id, "available": True}
+    # Повторная проверка того же дня обслуживается из кэша
+    client.get("/api/availability/check", params=params)
+    stats = client.get("/api/availability/cache").json()
+    assert stats["hits"] - before["hits"] == 1
+    assert stats["misses"] - before["misses"] == 1
+    assert stats["entries"] == 1
+
+    # Создание брони сбрасывает запись дня
+    response = client.post(
+        "/api/reservations",
+        json={
+            "customer_name": "Иван Иванов",
+            "table_id": table.id,
+            "reservation_time": (start + timedelta(minutes=30)).isoformat(),
+            "duration_minutes": 60
+        }
+    )
+    assert response.status_code == 201
+    assert client.get("/api/availability/check", params=params).json()["available"] is False
+
+    # Удаление тоже
+    client.delete(f"/api/reservations/{response.json()['id']}")
+    assert client.get("/api/availability/check", params=params).json()["available"] is True
+
+def test_availability_cache_follows_events(client, db_session):
+    import orjson
+    from app.services.events import broadcaster
+
+    table = Table(name="Тестовый стол", seats=4, location="Тестовый зал")
+    db_session.add(table)
+    db_session.commit()
+
+    start = (datetime.now() + timedelta(days=1)).replace(hour=19, minute=0, second=0, microsecond=0)
+    params = {"table_id": table.id, "reservation_time": start.isoformat(), "duration_minutes": 60}
+    assert client.get("/api/availability/check", params=params).json()["available"] is True
+
+    # Бронь записал другой воркер: кэш процесса о ней не знает до события шины
+    db_session.add(Reservation(customer_name="Иван Иванов", table_id=table.id,
+                               reservation_time=start, duration_minutes=60))
+    db_session.commit()
+    assert client.get("/api/availability/check", params=params).json()["available"] is True
+    broadcaster._dispatch(orjson.dumps({"type": "created", "table_id": table.id, "location": "Тестовый зал"}))
+    assert client.get("/api/availability/check", params=params).json()["available"] is False
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+from app.core.conditional import etag_matches, on_event
+from app.models.table import Table
+
+def test_tables_not_modified(client):
+    first = client.get("/api/tables/")
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+    assert first.headers["cache-control"] == "public, max-age=60"
+    assert "last-modified" in first.headers
+
+    cached = client.get("/api/tables/", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    # Запись меняет версию: старый ETag больше не совпадает
+    created = client.post("/api/tables/", json={"name": "Стол", "seats": 4, "location": "Зал"})
+    fresh = client.get("/api/tables/", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert len(fresh.json()) == 1
+    assert fresh.headers["etag"] != etag
+
+    table_url = f"/api/tables/{created.json()['id']}"
+    etag = client.get(table_url).headers["etag"]
+    assert client.get(table_url, headers={"If-None-Match": etag}).status_code == 304
+
+def test_reservations_not_modified(client, db_session):
+    table = Table(name="Тестовый стол", seats=4, location="Тестовый зал")
+    db_session.add(table)
+    db_session.commit()
+    created = client.post("/api/reservations/", json={
+        "customer_name": "Иван",
+        "table_id": table.id,
+        "reservation_time": (datetime.now() + timedelta(hours=1)).isoformat(),
+        "duration_minutes": 60
+    }).json()
+
+    url = f"/api/reservations/{created['id']}"
+    response = client.get(url)
+    assert response.headers["cache-control"] == "private, no-cache"
+    etag = response.headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/reservations/", headers={"If-None-Match": etag}).status_code == 304
+
+    client.delete(url)
+    assert client.get("/api/reservations/", headers={"If-None-Match": etag}).status_code == 200
+
+def test_etag_matches():
+    etag = 'W/"a.1"'
+    assert etag_matches('"a.1"', etag)
+    assert etag_matches('W/"b.2", W/"a.1"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"a.2"', etag)
+    assert not etag_matches(None, etag)
+
+def test_versions_follow_events(client):
+    # Запись в другом воркере приходит только событием шины
+    etag = client.get("/api/tables/").headers["etag"]
+    on_event({"type": "table_updated", "table_id": 1, "location": "Зал"})
+    assert client.get("/api/tables/", headers={"If-None-Match": etag}).status_code == 200
+
+    etag = client.get("/api/reservations/").headers["etag"]
+    created = client.post("/api/tables/", json={"name": "Стол", "seats": 4, "location": "Зал"})
+    assert client.get("/api/reservations/", headers={"If-None-Match": etag}).status_code == 304
+    client.delete(f"/api/tables/{created.json()['id']}")
+    assert client.get("/api/reservations/", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import pytest
+from datetime import datetime, timedelta
+from app.models.table import Table
+from app.routers.events import event_stream
+from app.services.events import Broadcaster, broadcaster
+
+def drain(subscription) -> list:
+    events = []
+    while not subscription.queue.empty():
+        events.append(json.loads(subscription.queue.get_nowait()))
+    return events
+
+def test_reservation_events(client, db_session):
+    hall = Table(name="Стол у окна", seats=4, location="Зал 1")
+    terrace = Table(name="Стол на веранде", seats=4, location="Веранда")
+    db_session.add_all([hall, terrace])
+    db_session.commit()
+
+    everything = broadcaster.subscribe()
+    by_table = broadcaster.subscribe(table_id=hall.id)
+    by_location = broadcaster.subscribe(location="Веранда")
+    try:
+        response = client.post("/api/reservations", json={
+            "customer_name": "Иван Иванов",
+            "table_id": hall.id,
+            "reservation_time": (datetime.now() + timedelta(hours=1)).isoformat(),
+            "duration_minutes": 60
+        })
+        reservation_id = response.json()["id"]
+        # Перенос на другой стол виден подписчикам обоих столов
+        client.put(f"/api/reservations/{reservation_id}", json={"table_id": terrace.id})
+        client.delete(f"/api/reservations/{reservation_id}")
+        # Изменения столов идут только слушателям процесса, не в поток броней
+        client.put(f"/api/tables/{hall.id}", json={"seats": 6})
+        # Отклоненная запись событий не порождает
+        client.post("/api/reservations", json={
+            "customer_name": "Иван Иванов", "table_id": 999,
+            "reservation_time": (datetime.now() + timedelta(hours=1)).isoformat(), "duration_minutes": 60
+        })
+
+        events = drain(everything)
+        assert [e["type"] for e in events] == ["created", "updated", "deleted"]
+        assert events[0]["location"] == "Зал 1"
+        assert events[0]["reservation"]["id"] == reservation_id
+        assert events[1]["previous_table_id"] == hall.id and events[1]["table_id"] == terrace.id
+        assert [e["type"] for e in drain(by_table)] == ["created", "updated"]
+        assert [e["type"] for e in drain(by_location)] == ["updated", "deleted"]
+    finally:
+        for subscription in (everything, by_table, by_location):
+            broadcaster.unsubscribe(subscription)
+
+def test_slow_subscriber_dropped():
+    async def scenario():
+        local = Broadcaster(max_subscribers=2)
+        await local.start()
+        slow = local.subscribe()
+        slow.queue = asyncio.Queue(maxsize=2)
+        fast = local.subscribe(table_id=1)
+        assert local.subscribe() is None
+
+        for i in range(3):
+            await local.publish({"type": "created", "table_id": 2, "reservation": {"id": i}})
+        # Очередь медленного подписчика переполнена: он отключен и получает None
+        assert slow.dropped and slow not in local.subscribers
+        assert slow.queue.get_nowait() is None
+        # Фильтр по столу: событий для стола 2 нет
+        assert fast.queue.empty() and fast in local.subscribers
+        await local.stop()
+        assert fast.queue.get_nowait() is None
+
+    asyncio.run(scenario())
+
+def test_sse_stream():
+    async def scenario():
+        subscription = broadcaster.subscribe(table_id=1)
+        stream = event_stream(subscription)
+        assert (await stream.__anext__()).startswith(b"retry:")
+        subscription.deliver(b'{"type":"created","table_id":1}')
+        assert await stream.__anext__() == b'event: reservation\ndata: {"type":"created","table_id":1}\n\n'
+        # Переполнение или остановка: клиенту отправляется reset, поток завершается
+        subscription.deliver(None)
+        assert await stream.__anext__() == b"event: reset\ndata: {}\n\n"
+        with pytest.raises(StopAsyncIteration):
+            await stream.__anext__()
+        assert subscription not in broadcaster.subscribers
+
+    asyncio.run(scenario())
+
+def test_sse_subscriber_limit(client, monkeypatch):
+    monkeypatch.setattr(broadcaster, "max_subscribers", 0)
+    response = client.get("/api/events/reservations")
+    assert response.status_code == 503
@@ -0,0 +1,67 @@
+import pytest
+from app.routers.health import database_probe
+
+@pytest.fixture(autouse=True)
+def reset_probe(monkeypatch, test_db):
+    # Проба обращается к тестовой базе, а не к движку из DATABASE_URL
+    monkeypatch.setattr(database_probe, "get_engine", lambda: test_db)
+    monkeypatch.setattr(database_probe, "get_async_engine", lambda: None)
+    database_probe.reset()
+    yield
+    database_probe.reset()
+
+def test_health(client):
+    assert client.get("/api/health").json() == {"status": "ok"}
+    assert client.get("/api/health/live").json() == {"status": "ok"}
+
+def test_readiness_cached(client):
+    response = client.get("/api/health/ready")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ok"
+    assert data["database"]["ok"] is True
+    assert data["database"]["cached"] is False
+    assert "primary" in data["pools"]
+
+    # Повторная проба в пределах TTL не обращается к базе
+    calls = []
+    original = database_probe._ping
+
+    async def counting_ping():
+        calls.append(1)
+        await original()
+
+    database_probe._ping = counting_ping
+    try:
+        data = client.get("/api/health/ready").json()
+    finally:
+        del database_probe._ping
+    assert data["database"]["cached"] is True
+    assert calls == []
+
+def test_readiness_database_down(client):
+    async def failing_ping():
+        raise ConnectionError("база недоступна")
+
+    database_probe._ping = failing_ping
+    try:
+        response = client.get("/api/health/ready")
+    finally:
+        del database_probe._ping
+    assert response.status_code == 503
+    data = response.json()
+    assert data["status"] == "unavailable"
+    assert data["database"] == {"ok": False, "error": "ConnectionError", "cached": False}
+
+def test_pool_status():
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import QueuePool
+    from app.database import pool_status
+
+    engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=2, max_overflow=2)
+    with engine.connect(), engine.connect(), engine.connect():
+        status = pool_status(engine.pool)
+    assert status["checked_out"] == 3
+    assert status["capacity"] == 4
+    assert status["saturation"] == 0.75
+    engine.dispose()
@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime, timedelta
+import httpx
+from app.core.idempotency import IdempotencyStore, StoredResponse, idempotency_store
+from app.database import get_db
+from app.main import app
+from app.models.reservation import Reservation
+from app.models.table import Table
+
+def make_payload(table_id):
+    return {
+        "customer_name": "Иван Иванов",
+        "table_id": table_id,
+        "reservation_time": (datetime.now() + timedelta(hours=1)).replace(microsecond=0).isoformat(),
+        "duration_minutes": 60
+    }
+
+def test_idempotent_create(client, db_session):
+    table = Table(name="Тестовый стол", seats=4, location="Тестовый зал")
+    db_session.add(table)
+    db_session.commit()
+    payload = make_payload(table.id)
+    headers = {"Idempotency-Key": "create-1"}
+
+    first = client.post("/api/reservations/", json=payload, headers=headers)
+    assert first.status_code == 201
+    assert "idempotent-replayed" not in first.headers
+
+    # Повтор получает тот же ответ, а не 409 и не вторую бронь
+    replay = client.post("/api/reservations/", json=payload, headers=headers)
+    assert replay.status_code == 201
+    assert replay.json() == first.json()
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert db_session.query(Reservation).count() == 1
+
+    # Тот же ключ с другим телом
+    other = client.post("/api/reservations/", json={**payload, "duration_minutes": 90}, headers=headers)
+    assert other.status_code == 422
+
+    # Без ключа — обычная проверка пересечений
+    assert client.post("/api/reservations/", json=payload).status_code == 409
+
+    # Ответ на изменение тоже сохраняется
+    update_headers = {"Idempotency-Key": "update-1"}
+    url = f"/api/reservations/{first.json()['id']}"
+    assert client.put(url, json={"customer_name": "Петр"}, headers=update_headers).status_code == 200
+    replay = client.put(url, json={"customer_name": "Петр"}, headers=update_headers)
+    assert replay.headers["idempotent-replayed"] == "true"
+
+    assert client.post("/api/reservations/", json=payload, headers={"Idempotency-Key": "x" * 300}).status_code == 400
+
+    # Тот же ключ другого клиента не получает чужой ответ
+    other_client = client.post("/api/reservations/", json=payload, headers={**headers, "X-API-Key": "partner"})
+    assert other_client.status_code == 409
+    assert "idempotent-replayed" not in other_client.headers
+
+def test_concurrent_duplicates_wait(db_session):
+    table = Table(name="Тестовый стол", seats=4, location="Тестовый зал")
+    db_session.add(table)
+    db_session.commit()
+    payload = make_payload(table.id)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[
+                client.post("/api/reservations/", json=payload, headers={"Idempotency-Key": "same"})
+                for _ in range(5)
+            ])
+
+    app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        responses = asyncio.run(scenario())
+    finally:
+        app.dependency_overrides.clear()
+
+    # Выполнился один запрос, остальные дождались его ответа
+    assert {r.status_code for r in responses} == {201}
+    assert len({r.json()["id"] for r in responses}) == 1
+    assert sum(r.headers.get("idempotent-replayed") == "true" for r in responses) == 4
+    assert db_session.query(Reservation).count() == 1
+
+def test_store_bounds():
+    store = IdempotencyStore(ttl=60, max_keys=2)
+    for i in range(3):
+        store.put(("POST", "/", str(i)), StoredResponse("f", 201, [], b"{}", float("inf")))
+    # Самый старый ключ вытеснен
+    assert store.get(("POST", "/", "0")) is None
+    assert store.get(("POST", "/", "2")) is not None
+    store.put(("POST", "/", "old"), StoredResponse("f", 201, [], b"{}", 0))
+    assert store.get(("POST", "/", "old")) is None
+    assert idempotency_store is not store
+
+    # Объем ограничен и суммарным размером тел
+    store = IdempotencyStore(ttl=60, max_keys=10, max_bytes=10)
+    for i in range(3):
+        store.put(("POST", "/", str(i)), StoredResponse("f", 201, [], b"x" * 4, float("inf")))
+    assert store.get(("POST", "/", "0")) is None
+    assert store.stored_bytes == 8
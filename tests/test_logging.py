@@ -0,0 +1,77 @@
+import json
+import logging
+from app.core.logger import (
+    DroppingQueueHandler, JsonFormatter, RateLimitFilter, SamplingFilter,
+    build_pipeline, parse_rate_limits, parse_sampling
+)
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(self.format(record))
+
+def make_record(name="app.health", level=logging.INFO, msg="проверка", args=()):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+def test_parse_rules():
+    assert parse_rate_limits("app.health=1/60, app.api=10") == {"app.health": (1, 60.0), "app.api": (10, 1.0)}
+    assert parse_sampling("app.health=0.01") == {"app.health": 0.01}
+    assert parse_sampling("") == {}
+
+def test_rate_limit_filter():
+    now = [0.0]
+    log_filter = RateLimitFilter({"app.health": (2, 60)}, clock=lambda: now[0])
+    # Правило действует и на дочерние логгеры
+    passed = [log_filter.filter(make_record("app.health.db")) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert log_filter.suppressed == {"app.health": 3}
+    # Предупреждения и другие логгеры не ограничиваются
+    assert log_filter.filter(make_record(level=logging.WARNING))
+    assert log_filter.filter(make_record("app"))
+    # Новое окно
+    now[0] = 61
+    assert log_filter.filter(make_record())
+
+def test_sampling_filter():
+    log_filter = SamplingFilter({"app.health": 0.1})
+    kept = sum(log_filter.filter(make_record()) for _ in range(10000))
+    assert 500 < kept < 1500
+    assert all(log_filter.filter(make_record("app")) for _ in range(100))
+
+def test_queue_pipeline_json():
+    target = ListHandler()
+    target.setFormatter(JsonFormatter())
+    queue_handler, listener = build_pipeline([target], [RateLimitFilter({"app.health": (1, 60)})])
+    logger = logging.getLogger("tests.pipeline")
+    logger.propagate = False
+    logger.addHandler(queue_handler)
+    listener.start()
+    try:
+        args = {"id": 1}
+        logger.info("бронь %s", args, extra={"table_id": 5})
+        # Аргументы подставлены на вызывающем потоке
+        args["id"] = 2
+        try:
+            raise ValueError("ошибка")
+        except ValueError:
+            logger.exception("сбой")
+    finally:
+        listener.stop()
+        logger.removeHandler(queue_handler)
+
+    first, second = (json.loads(line) for line in target.records)
+    assert first["message"] == "бронь {'id': 1}"
+    assert first["logger"] == "tests.pipeline"
+    assert first["table_id"] == 5
+    assert second["level"] == "ERROR"
+    assert "ValueError" in second["exc"]
+
+def test_dropping_queue_handler():
+    queue_handler, _ = build_pipeline([], queue_size=1)
+    assert isinstance(queue_handler, DroppingQueueHandler)
+    queue_handler.handle(make_record("app"))
+    queue_handler.handle(make_record("app"))
+    assert queue_handler.dropped == 1
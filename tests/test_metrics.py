@@ -0,0 +1,77 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text as sql
+from sqlalchemy.pool import QueuePool
+from app.core import metrics
+from app.models.table import Table
+
+def sample(text, name, **labels):
+    # Значение ряда с указанными метками или 0, если ряда нет
+    expected = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    prefix = f"{name}{{{expected}}} " if labels else f"{name} "
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return 0.0
+
+def test_metrics_endpoint(client, db_session):
+    table = Table(name="Тестовый стол", seats=4, location="Тестовый зал")
+    db_session.add(table)
+    db_session.commit()
+
+    before = client.get("/api/metrics").text
+    payload = {
+        "customer_name": "Иван Иванов",
+        "table_id": table.id,
+        "reservation_time": (datetime.now() + timedelta(hours=1)).isoformat(),
+        "duration_minutes": 60
+    }
+    assert client.post("/api/reservations", json=payload).status_code == 201
+    assert client.post("/api/reservations", json=payload).status_code == 409
+    assert client.get(f"/api/tables/{table.id}").status_code == 200
+
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+
+    # Маршрут записывается шаблоном, без конкретного ID
+    assert sample(text, "http_requests_total", method="POST", route="/api/reservations/", status="201") \
+        - sample(before, "http_requests_total", method="POST", route="/api/reservations/", status="201") == 1
+    assert f"/api/tables/{table.id}" not in text
+    assert sample(text, "reservation_conflicts_total", operation="create") \
+        - sample(before, "reservation_conflicts_total", operation="create") == 1
+    assert 'http_request_duration_seconds_bucket{method="POST",route="/api/reservations/",le="+Inf"}' in text
+
+def test_merge_snapshots():
+    counter = metrics.Counter("jobs_total", "Задачи", ("kind",))
+    gauge = metrics.Gauge("workers", "Воркеры")
+    registry = metrics.Registry()
+    registry.register(counter)
+    registry.register(gauge)
+    counter.inc(("a",), 2)
+    gauge.inc()
+    snapshot = registry.snapshot()
+
+    # Счетчики умершего воркера сохраняются, gauge — нет
+    merged = metrics._merge([(True, snapshot), (False, snapshot)])
+    assert merged["jobs_total"]["values"] == {("a",): 4}
+    assert merged["workers"]["values"] == {(): 1}
+
+@pytest.fixture
+def test_engine():
+    engine = create_engine("sqlite://", poolclass=QueuePool)
+    yield engine
+    # Движок не остается в реестрах метрик и после упавшего теста
+    metrics._engines.pop("test", None)
+    metrics._instrumented.discard(engine)
+    engine.dispose()
+
+def test_instrument_engine(test_engine):
+    engine = test_engine
+    metrics.instrument_engine(engine, name="test")
+    before = metrics.DB_STATEMENTS.collect().get(("SELECT",), 0)
+    with engine.connect() as conn:
+        conn.execute(sql("SELECT 1"))
+    assert metrics.DB_STATEMENTS.collect()[("SELECT",)] - before == 1
+    assert ("test", "checkedout") in metrics.DB_POOL.collect()
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+from app.models.table import Table
+from app.models.reservation import Reservation
+
+def test_get_occupancy(client, db_session):
+    window = Table(name="Стол у окна", seats=2, location="Веранда")
+    hall = Table(name="Большой стол", seats=6, location="Зал 1")
+    corner = Table(name="Угловой стол", seats=4, location="Зал 1")
+    db_session.add_all([window, hall, corner])
+    db_session.commit()
+
+    at = datetime(2030, 5, 1, 19, 30)
+    db_session.add_all([
+        Reservation(customer_name="Сейчас", table_id=hall.id,
+                    reservation_time=at - timedelta(minutes=30), duration_minutes=120),
+        Reservation(customer_name="После", table_id=hall.id,
+                    reservation_time=at + timedelta(hours=2), duration_minutes=60),
+        Reservation(customer_name="Позже", table_id=corner.id,
+                    reservation_time=at + timedelta(hours=1), duration_minutes=60),
+        # Уже закончилась
+        Reservation(customer_name="Раньше", table_id=window.id,
+                    reservation_time=at - timedelta(hours=2), duration_minutes=60),
+    ])
+    db_session.commit()
+
+    response = client.get("/api/occupancy", params={"at": "2030-05-01T19:30:00.250"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["at"] == "2030-05-01T19:30:00Z"
+    assert [group["location"] for group in data["locations"]] == ["Веранда", "Зал 1"]
+
+    veranda, main_hall = data["locations"]
+    assert veranda["tables"] == [{
+        "table_id": window.id, "name": "Стол у окна", "seats": 2, "status": "free", "reservation": None
+    }]
+    statuses = {t["table_id"]: (t["status"], t["reservation"]["customer_name"]) for t in main_hall["tables"]}
+    assert statuses == {hall.id: ("occupied", "Сейчас"), corner.id: ("reserved", "Позже")}
+
+    # Ближайшая бронь дальше горизонта не показывается
+    response = client.get("/api/occupancy", params={"at": "2030-05-01T17:00:00", "horizon_hours": 1})
+    main_hall = response.json()["locations"][1]
+    assert [t["status"] for t in main_hall["tables"]] == ["free", "free"]
+
+def test_occupancy_snapshot_cache(client, db_session):
+    table = Table(name="Стол у окна", seats=2, location="Веранда")
+    db_session.add(table)
+    db_session.commit()
+
+    params = {"at": "2030-05-01T19:30:00"}
+    first = client.get("/api/occupancy", params=params).json()
+    db_session.add(Reservation(customer_name="Новый гость", table_id=table.id,
+                               reservation_time=datetime(2030, 5, 1, 19), duration_minutes=60))
+    db_session.commit()
+
+    # В пределах той же секунды снимок берется из кэша
+    assert client.get("/api/occupancy", params={"at": "2030-05-01T19:30:00.900"}).json() == first
+    second = client.get("/api/occupancy", params={"at": "2030-05-01T19:30:01"}).json()
+    assert second["locations"][0]["tables"][0]["status"] == "occupied"
@@ -0,0 +1,56 @@
+import ipaddress
+from app.core.rate_limit import RateLimiter, client_address, client_id, parse_rules, rate_limiter
+
+def test_token_bucket():
+    now = [0.0]
+    limiter = RateLimiter(parse_rules("* /api/health=off,POST /api=2/10,* /api=5/1"), max_clients=2, clock=lambda: now[0])
+    assert limiter.acquire("POST", "/api/reservations/", "a") == 0
+    assert limiter.acquire("POST", "/api/reservations/", "a") == 0
+    # Корзина пуста: токен появится через period / N секунд
+    assert limiter.acquire("POST", "/api/reservations/", "a") == 5
+    # У другого клиента и другого правила свои корзины
+    assert limiter.acquire("POST", "/api/reservations/", "b") == 0
+    assert limiter.acquire("GET", "/api/reservations/", "a") == 0
+    now[0] = 5
+    assert limiter.acquire("POST", "/api/reservations/", "a") == 0
+    assert all(limiter.acquire("GET", "/api/health", "a") == 0 for _ in range(10))
+    # Память ограничена числом корзин
+    assert len(limiter._buckets) == 2
+
+def test_rate_limit_response(client, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "rules", parse_rules("GET /api/tables=2/60"))
+    assert client.get("/api/tables/").status_code == 200
+    assert client.get("/api/tables/").status_code == 200
+    response = client.get("/api/tables/")
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "30"
+    # Клиент с API-ключом считается отдельно
+    assert client.get("/api/tables/", headers={"X-API-Key": "partner"}).status_code == 200
+    assert client.get("/api/reservations/").status_code == 200
+    assert 'http_rejected_total{reason="rate_limit"}' in client.get("/api/metrics").text
+
+def test_write_concurrency_cap(client, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "write_concurrency", 1)
+    payload = {"name": "Стол", "seats": 4, "location": "Зал"}
+    assert client.post("/api/tables/", json=payload).status_code == 201
+    assert rate_limiter.writes_in_flight == 0
+    # Слот записи занят другим запросом: запись отклоняется, чтение проходит
+    rate_limiter.writes_in_flight = 1
+    response = client.post("/api/tables/", json=payload)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert client.get("/api/tables/").status_code == 200
+
+def test_client_identity():
+    proxies = [ipaddress.ip_network("10.0.0.0/8")]
+
+    def scope(address, *headers):
+        return {"client": (address, 5000), "headers": [(name.encode(), value.encode()) for name, value in headers]}
+
+    assert client_id(scope("203.0.113.5", ("x-api-key", "partner"))) == "key:partner"
+    assert client_id(scope("203.0.113.5")) == "203.0.113.5"
+    # Заголовок прокси учитывается только от доверенного адреса, справа налево
+    forwarded = ("x-forwarded-for", "198.51.100.1, 203.0.113.7, 10.0.0.2")
+    assert client_address(scope("10.0.0.1", forwarded), proxies) == "203.0.113.7"
+    assert client_address(scope("203.0.113.9", forwarded), proxies) == "203.0.113.9"
+    assert client_address(scope("10.0.0.1"), proxies) == "10.0.0.1"
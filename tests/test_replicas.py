@@ -0,0 +1,61 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import database
+from app.core import metrics
+from app.database import Base, READ_PRIMARY_COOKIE, get_db
+from app.main import app
+
+@pytest.fixture
+def replica_client(tmp_path, monkeypatch):
+    # Основная база и реплика — два файла SQLite; реплика не получает записей
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}", connect_args={"check_same_thread": False})
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    replica = create_engine(replica_url)
+    Base.metadata.create_all(bind=primary)
+    Base.metadata.create_all(bind=replica)
+    replica.dispose()
+    PrimarySession = sessionmaker(bind=primary, autoflush=False)
+
+    def override_get_db():
+        db = PrimarySession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(database, "REPLICA_DATABASE_URLS", [replica_url])
+    monkeypatch.setattr(database, "_replica_engines", None)
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as client:
+        yield client
+    app.dependency_overrides.clear()
+    for engine in database._replica_engines:
+        engine.dispose()
+    metrics._engines.pop("replica0", None)
+    primary.dispose()
+
+def test_reads_go_to_replica(replica_client):
+    response = replica_client.post("/api/tables/", json={"name": "Стол", "seats": 4, "location": "Зал"})
+    assert response.status_code == 201
+    assert READ_PRIMARY_COOKIE in response.cookies
+
+    # Сразу после записи клиент читает свою запись с основной базы
+    assert len(replica_client.get("/api/tables/").json()) == 1
+    table_id = response.json()["id"]
+    assert replica_client.get(f"/api/tables/{table_id}").status_code == 200
+
+    # Без cookie чтение идет на реплику, которая запись еще не получила
+    replica_client.cookies.clear()
+    response = replica_client.get("/api/tables/")
+    assert response.json() == []
+    # Версия изменилась недавно: ответ реплики без ETag
+    assert "etag" not in response.headers
+    assert response.headers["cache-control"] == "no-store"
+    assert replica_client.get(f"/api/tables/{table_id}").status_code == 404
+
+    # Ошибка записи cookie не ставит
+    conflict = replica_client.post("/api/tables/", json={"name": "Стол", "seats": 4, "location": "Зал"})
+    assert conflict.status_code == 409
+    assert READ_PRIMARY_COOKIE not in conflict.cookies
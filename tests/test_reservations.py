@@ -1,3 +1,4 @@
+import json
 import pytest
 from datetime import datetime, timedelta
 from app.models.table import Table
@@ -191,4 +192,319 @@ def test_reservation_conflict(client, db_session):
             "duration_minutes": 120
         }
     )
-    assert response.status_code == 409 
\ No newline at end of file
+    assert response.status_code == 409 
+
+def test_reservation_adjacent_slots(client, db_session):
+    # Создаем тестовый стол
+    table = Table(name="Тестовый стол", seats=4, location="Тестовый зал")
+    db_session.add(table)
+    db_session.commit()
+
+    reservation_time = datetime.now() + timedelta(hours=1)
+    response = client.post(
+        "/api/reservations",
+        json={
+            "customer_name": "Иван Иванов",
+            "table_id": table.id,
+            "reservation_time": reservation_time.isoformat(),
+            "duration_minutes": 60
+        }
+    )
+    assert response.status_code == 201
+
+    # Время окончания сохраняется вместе с бронированием
+    reservation = db_session.get(Reservation, response.json()["id"])
+    assert reservation.end_time == reservation.reservation_time + timedelta(minutes=60)
+
+    # Бронь, начинающаяся ровно в момент окончания предыдущей, не конфликтует
+    response = client.post(
+        "/api/reservations",
+        json={
+            "customer_name": "Петр Петров",
+            "table_id": table.id,
+            "reservation_time": (reservation_time + timedelta(minutes=60)).isoformat(),
+            "duration_minutes": 60
+        }
+    )
+    assert response.status_code == 201
+
+def test_reservation_unknown_table(client, db_session):
+    response = client.post(
+        "/api/reservations",
+        json={
+            "customer_name": "Иван Иванов",
+            "table_id": 999,
+            "reservation_time": (datetime.now() + timedelta(hours=1)).isoformat(),
+            "duration_minutes": 60
+        }
+    )
+    assert response.status_code == 404
+
+def test_get_reservations_pagination(client, db_session):
+    # Создаем два стола и несколько бронирований
+    first = Table(name="Первый стол", seats=4, location="Тестовый зал")
+    second = Table(name="Второй стол", seats=4, location="Тестовый зал")
+    db_session.add_all([first, second])
+    db_session.commit()
+
+    start = datetime.now() + timedelta(days=1)
+    for i in range(4):
+        for table in (first, second):
+            db_session.add(Reservation(
+                customer_name=f"Гость {i}",
+                table_id=table.id,
+                reservation_time=start + timedelta(hours=3 * i),
+                duration_minutes=120
+            ))
+    db_session.commit()
+
+    response = client.get("/api/reservations", params={"table_id": first.id, "limit": 3})
+    assert response.status_code == 200
+    page = response.json()
+    assert [item["customer_name"] for item in page] == ["Гость 0", "Гость 1", "Гость 2"]
+    assert all(item["table_id"] == first.id for item in page)
+
+    response = client.get(
+        "/api/reservations",
+        params={"table_id": first.id, "limit": 3, "cursor": response.headers["X-Next-Cursor"]}
+    )
+    assert [item["customer_name"] for item in response.json()] == ["Гость 3"]
+    assert "X-Next-Cursor" not in response.headers
+
+    # Фильтр по диапазону времени начала
+    response = client.get(
+        "/api/reservations",
+        params={
+            "from": (start + timedelta(hours=3)).isoformat(),
+            "to": (start + timedelta(hours=6)).isoformat()
+        }
+    )
+    assert [item["customer_name"] for item in response.json()] == ["Гость 1", "Гость 1"]
+
+def test_bulk_create_reservations(client, db_session):
+    # Создаем тестовый стол с существующим бронированием
+    table = Table(name="Тестовый стол", seats=4, location="Тестовый зал")
+    db_session.add(table)
+    db_session.commit()
+
+    start = (datetime.now() + timedelta(days=1)).replace(hour=12, minute=0, second=0, microsecond=0)
+    db_session.add(Reservation(
+        customer_name="Иван Иванов",
+        table_id=table.id,
+        reservation_time=start,
+        duration_minutes=60
+    ))
+    db_session.commit()
+
+    def item(name, offset_minutes, duration=60, table_id=table.id):
+        return {
+            "customer_name": name,
+            "table_id": table_id,
+            "reservation_time": (start + timedelta(minutes=offset_minutes)).isoformat(),
+            "duration_minutes": duration
+        }
+
+    response = client.post(
+        "/api/reservations/bulk",
+        json=[
+            item("Гость 0", 60),                  # сразу после существующей брони
+            item("Гость 1", 30),                  # пересекается с существующей
+            item("Гость 2", 90),                  # пересекается с элементом 0
+            item("Гость 3", 120, duration=10),    # слишком короткая
+            item("Гость 4", 240, table_id=999),   # несуществующий стол
+            item("Гость 5", 180),
+        ]
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["status"] for r in data["items"]] == [
+        "created", "conflict", "conflict", "invalid", "invalid", "created"
+    ]
+    assert data["created"] == 2 and data["rejected"] == 4
+
+    created = db_session.get(Reservation, data["items"][5]["id"])
+    assert created.customer_name == "Гость 5"
+    assert created.end_time == created.reservation_time + timedelta(minutes=60)
+
+    # NDJSON
+    response = client.post(
+        "/api/reservations/bulk",
+        content="\n".join(json.dumps(i) for i in [item("Гость 6", 300), item("Гость 7", 300)]),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert [r["status"] for r in response.json()["items"]] == ["created", "conflict"]
+
+    response = client.post("/api/reservations/bulk", json={"customer_name": "Гость"})
+    assert response.status_code == 400
+
+def test_read_past_reservation(client, db_session):
+    # Прошедшие брони читаются: проверка «не в прошлом» действует только на входе
+    table = Table(name="Тестовый стол", seats=4, location="Тестовый зал")
+    db_session.add(table)
+    db_session.commit()
+    past = Reservation(
+        customer_name="Иван Иванов",
+        table_id=table.id,
+        reservation_time=datetime(2020, 1, 1, 19, 0),
+        duration_minutes=90
+    )
+    db_session.add(past)
+    db_session.commit()
+
+    expected = {
+        "customer_name": "Иван Иванов",
+        "table_id": table.id,
+        "reservation_time": "2020-01-01T19:00:00Z",
+        "duration_minutes": 90,
+        "id": past.id,
+    }
+    response = client.get(f"/api/reservations/{past.id}")
+    assert response.status_code == 200
+    assert response.json() == expected
+
+    # Список сериализуется без моделей, но в том же формате
+    response = client.get("/api/reservations")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == [expected]
+
+def test_auto_assign_best_fit(client, db_session):
+    tables = [
+        Table(name="Большой", seats=6, location="Зал"),
+        Table(name="Средний", seats=4, location="Зал"),
+        Table(name="Малый", seats=2, location="Зал"),
+        Table(name="Терраса", seats=4, location="Терраса"),
+    ]
+    db_session.add_all(tables)
+    db_session.commit()
+    big, medium, _, terrace = (table.id for table in tables)
+
+    payload = {
+        "customer_name": "Иван Иванов",
+        "party_size": 3,
+        "reservation_time": (datetime.now() + timedelta(hours=1)).isoformat(),
+        "duration_minutes": 120,
+    }
+    # Наименьший подходящий стол, при равенстве мест — с меньшим id
+    response = client.post("/api/reservations/auto", json=payload)
+    assert response.status_code == 201
+    assert response.json()["table_id"] == medium
+    assert client.post("/api/reservations/auto", json={**payload, "location": "Терраса"}).json()["table_id"] == terrace
+    assert client.post("/api/reservations/auto", json=payload).json()["table_id"] == big
+
+    response = client.post("/api/reservations/auto", json=payload)
+    assert response.status_code == 409
+    assert client.post("/api/reservations/auto", json={**payload, "party_size": 10}).status_code == 404
+    assert client.post("/api/reservations/auto", json={**payload, "location": "Подвал"}).status_code == 404
+    assert client.post("/api/reservations/auto", json={**payload, "party_size": 0}).status_code == 422
+
+def test_auto_assign_concurrent(tmp_path):
+    import asyncio
+    import httpx
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.database import Base, get_db
+    from app.main import app
+
+    # Параллельные запросы идут в отдельных сессиях к файлу SQLite
+    engine = create_engine(f"sqlite:///{tmp_path / 'auto.db'}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        db.add_all([Table(name=f"Стол {i}", seats=4, location="Зал") for i in range(4)])
+        db.commit()
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    payload = {
+        "customer_name": "Гость",
+        "party_size": 2,
+        "reservation_time": (datetime.now() + timedelta(hours=1)).isoformat(),
+        "duration_minutes": 60,
+    }
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*[
+                http.post("/api/reservations/auto", json=payload)
+                for _ in range(8)
+            ])
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        responses = asyncio.run(scenario())
+    finally:
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+    created = [r.json()["table_id"] for r in responses if r.status_code == 201]
+    assert sorted(r.status_code for r in responses) == [201] * 4 + [409] * 4
+    assert len(set(created)) == 4
+
+def test_auto_assign_locked_table_still_chosen(client, db_session):
+    from sqlalchemy.dialects import postgresql
+    from app.services.reservation_service import best_fit_tables
+
+    small = Table(name="Малый", seats=2, location="Зал")
+    big = Table(name="Большой", seats=4, location="Зал")
+    db_session.add_all([small, big])
+    db_session.commit()
+
+    start = datetime.now() + timedelta(hours=1)
+    # Бронь наименьшего стола на другое время держит FOR KEY SHARE на его строке;
+    # подбор не блокирует строки и не пропускает такой стол
+    sql = str(best_fit_tables(2, start, 60).compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE" not in sql and "SKIP LOCKED" not in sql
+
+    client.post("/api/reservations", json={
+        "customer_name": "Петр Петров",
+        "table_id": small.id,
+        "reservation_time": (start + timedelta(hours=4)).isoformat(),
+        "duration_minutes": 60,
+    })
+    response = client.post("/api/reservations/auto", json={
+        "customer_name": "Иван Иванов",
+        "party_size": 2,
+        "reservation_time": start.isoformat(),
+        "duration_minutes": 60,
+    })
+    assert response.status_code == 201
+    assert response.json()["table_id"] == small.id
+
+def test_auto_assign_retries_taken_candidate(client, db_session, monkeypatch):
+    from app.routers import reservations
+
+    small = Table(name="Малый", seats=2, location="Зал")
+    big = Table(name="Большой", seats=4, location="Зал")
+    db_session.add_all([small, big])
+    db_session.commit()
+    start = datetime.now() + timedelta(hours=1)
+
+    # Параллельная запись занимает выбранный стол до блокировки: подбор берет следующий
+    locks = []
+
+    def take_table(db, table_id):
+        if not locks:
+            db.add(Reservation(
+                customer_name="Петр Петров", table_id=table_id, reservation_time=start,
+                duration_minutes=60, end_time=start + timedelta(minutes=60)
+            ))
+            db.flush()
+        locks.append(table_id)
+
+    monkeypatch.setattr(reservations, "lock_table_row", take_table)
+    response = client.post("/api/reservations/auto", json={
+        "customer_name": "Иван Иванов",
+        "party_size": 2,
+        "reservation_time": start.isoformat(),
+        "duration_minutes": 60,
+    })
+    assert response.status_code == 201
+    assert response.json()["table_id"] == big.id
+    assert locks == [small.id, big.id]
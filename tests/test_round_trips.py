@@ -0,0 +1,84 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app.models.table import Table
+
+@contextmanager
+def count_statements(db_session):
+    statements = []
+    engine = db_session.get_bind().engine
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def test_write_round_trips(client, db_session):
+    def call(method, url, expected_status, **kwargs):
+        with count_statements(db_session) as statements:
+            response = client.request(method, url, **kwargs)
+        assert response.status_code == expected_status, response.text
+        return response, len(statements)
+
+    # Каждая запись — один запрос с RETURNING, без предварительных SELECT и refresh;
+    # записи броней добавляют один UPSERT часовых агрегатов занятости
+    table, count = call("POST", "/api/tables/", 201, json={"name": "Стол", "seats": 4, "location": "Зал"})
+    assert count == 1
+    table_id = table.json()["id"]
+    assert call("PUT", f"/api/tables/{table_id}", 200, json={"seats": 6})[1] == 1
+
+    start = (datetime.now() + timedelta(days=1)).replace(microsecond=0)
+    payload = {"customer_name": "Иван", "table_id": table_id, "reservation_time": start.isoformat(), "duration_minutes": 60}
+    reservation, count = call("POST", "/api/reservations/", 201, json=payload)
+    assert count == 2
+    assert reservation.json()["reservation_time"] == start.isoformat() + "Z"
+    url = f"/api/reservations/{reservation.json()['id']}"
+
+    # Пересечение проверяется в той же вставке; причина отказа — вторым запросом
+    assert call("POST", "/api/reservations/", 409, json=payload)[1] == 2
+    assert call("POST", "/api/reservations/", 404, json={**payload, "table_id": 999})[1] == 2
+
+    # Подбор стола — выбор кандидата по местам и та же вставка
+    auto = {**payload, "reservation_time": (start + timedelta(hours=3)).isoformat(), "party_size": 2}
+    del auto["table_id"]
+    assert call("POST", "/api/reservations/auto", 201, json=auto)[1] == 3
+
+    assert call("PUT", url, 200, json={"customer_name": "Петр"})[1] == 1
+    # Перенос читает прежний интервал и обновляет строку с проверкой пересечений
+    moved, count = call("PUT", url, 200, json={"duration_minutes": 90})
+    assert count == 3
+    assert moved.json()["duration_minutes"] == 90
+
+    assert call("DELETE", url, 204)[1] == 2
+    assert call("DELETE", url, 404)[1] == 1
+    assert call("DELETE", f"/api/tables/{table_id}", 204)[1] == 1
+    # Нарушение уникальности отдается как 409 без отдельной проверки
+    # (откат ошибки отменяет и тестовую транзакцию, поэтому проверка последняя)
+    call("POST", "/api/tables/", 201, json={"name": "Стол", "seats": 4, "location": "Зал"})
+    assert call("POST", "/api/tables/", 409, json={"name": "Стол", "seats": 2, "location": "Зал"})[1] == 1
+
+def test_update_conflicts(client, db_session):
+    table = Table(name="Стол", seats=4, location="Зал")
+    db_session.add(table)
+    db_session.commit()
+    start = datetime.now() + timedelta(days=1)
+    first, second = (
+        client.post("/api/reservations/", json={
+            "customer_name": "Иван", "table_id": table.id,
+            "reservation_time": (start + timedelta(hours=offset)).isoformat(), "duration_minutes": 60
+        }).json()
+        for offset in (0, 2)
+    )
+    url = f"/api/reservations/{second['id']}"
+    assert client.put(url, json={"reservation_time": first["reservation_time"]}).status_code == 409
+    assert client.put(url, json={"table_id": 999}).status_code == 404
+    assert client.put("/api/reservations/999", json={"duration_minutes": 60}).status_code == 404
+    assert client.put("/api/reservations/999", json={"customer_name": "Петр"}).status_code == 404
+    # Продление до начала соседней брони пересечением не считается
+    response = client.put(f"/api/reservations/{first['id']}", json={"duration_minutes": 120})
+    assert response.status_code == 200
+    assert client.get(f"/api/reservations/{first['id']}").json()["duration_minutes"] == 120
@@ -0,0 +1,185 @@
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from app.models.reservation import ReservationSeries
+from app.models.table import Table
+from app.services.recurrence import occurrences, series_conflict_clause
+
+FIRST = "2030-01-07T13:00:00"
+
+def create_tables(db_session, *seats):
+    tables = [Table(name=f"Стол {i}", seats=count, location="Зал") for i, count in enumerate(seats)]
+    db_session.add_all(tables)
+    db_session.commit()
+    return [table.id for table in tables]
+
+def series_payload(table_id, **fields):
+    return {
+        "customer_name": "ООО Ромашка",
+        "table_id": table_id,
+        "reservation_time": FIRST,
+        "duration_minutes": 90,
+        "frequency": "weekly",
+        "count": 4,
+        **fields,
+    }
+
+def booking(table_id, start, duration=60):
+    return {"customer_name": "Иван", "table_id": table_id, "reservation_time": start, "duration_minutes": duration}
+
+def test_create_series_and_occurrences(client, db_session):
+    table_id, = create_tables(db_session, 4)
+    response = client.post("/api/reservations/series", json=series_payload(table_id, count=None, until="2030-01-28"))
+    assert response.status_code == 201, response.text
+    series = response.json()
+    assert (series["count"], series["until"]) == (4, "2030-01-28")
+
+    url = f"/api/reservations/series/{series['id']}"
+    assert client.get(url).json() == series
+    window = client.get(f"{url}/occurrences", params={"from": "2030-01-14T14:00:00", "to": "2030-01-21T13:00:00"}).json()
+    assert window == [{"index": 1, "start": "2030-01-14T13:00:00Z", "end": "2030-01-14T14:30:00Z"}]
+    assert len(client.get(f"{url}/occurrences").json()) == 4
+
+    assert client.post("/api/reservations/series", json=series_payload(table_id, until="2030-01-28")).status_code == 422
+    assert client.post("/api/reservations/series", json=series_payload(table_id, count=None, until="2029-01-01")).status_code == 400
+    assert client.post("/api/reservations/series", json=series_payload(999)).status_code == 404
+    assert client.get("/api/reservations/series/999").status_code == 404
+
+def test_series_blocks_single_bookings(client, db_session):
+    table_id, other_id = create_tables(db_session, 4, 6)
+    series_id = client.post("/api/reservations/series", json=series_payload(table_id)).json()["id"]
+
+    # Третье повторение: 2030-01-21 13:00–14:30
+    assert client.post("/api/reservations", json=booking(table_id, "2030-01-21T14:00:00")).status_code == 409
+    assert client.post("/api/reservations", json=booking(table_id, "2030-01-21T14:30:00")).status_code == 201
+    # После последнего повторения стол свободен
+    assert client.post("/api/reservations", json=booking(table_id, "2030-02-04T13:00:00")).status_code == 201
+
+    check = {"table_id": table_id, "reservation_time": "2030-01-14T12:30:00", "duration_minutes": 60}
+    assert client.get("/api/availability/check", params=check).json()["available"] is False
+
+    auto = {"customer_name": "Петр", "party_size": 2, "reservation_time": "2030-01-28T13:30:00", "duration_minutes": 60}
+    assert client.post("/api/reservations/auto", json=auto).json()["table_id"] == other_id
+
+    bulk = [booking(table_id, "2030-01-07T12:30:00"), booking(table_id, "2030-01-07T15:00:00")]
+    assert [item["status"] for item in client.post("/api/reservations/bulk", json=bulk).json()["items"]] == ["conflict", "created"]
+
+    day = client.get(f"/api/tables/{table_id}/schedule", params={"date": "2030-01-14"}).json()["days"][0]
+    assert [(busy["series_id"], busy["start"]) for busy in day["busy"]] == [(series_id, "2030-01-14T13:00:00Z")]
+    slots = client.get("/api/availability", params={
+        "party_size": 4, "from": "2030-01-14T12:00:00", "to": "2030-01-14T16:00:00", "slot_minutes": 30
+    }).json()
+    free = {slot["table_id"]: slot["free_slots"] for slot in slots}[table_id]
+    assert [(slot["start"], slot["end"]) for slot in free] == [
+        ("2030-01-14T12:00:00Z", "2030-01-14T13:00:00Z"), ("2030-01-14T14:30:00Z", "2030-01-14T16:00:00Z")
+    ]
+
+def test_series_conflicts_reported(client, db_session):
+    table_id, = create_tables(db_session, 4)
+    reservation_id = client.post("/api/reservations", json=booking(table_id, "2030-01-21T12:30:00")).json()["id"]
+    other = client.post("/api/reservations/series", json=series_payload(table_id, reservation_time="2030-01-28T14:00:00", frequency="daily", count=2))
+    assert other.status_code == 201
+
+    response = client.post("/api/reservations/series", json=series_payload(table_id, count=5))
+    assert response.status_code == 409
+    conflicts = response.json()["conflicts"]
+    assert [(c["index"], c["reservation_id"], c["series_id"]) for c in conflicts] == [
+        (2, reservation_id, None), (3, None, other.json()["id"])
+    ]
+    assert conflicts[0]["start"] == "2030-01-21T13:00:00Z"
+    assert db_session.query(ReservationSeries).count() == 1
+
+def test_update_and_delete_series(client, db_session):
+    table_id, other_id = create_tables(db_session, 4, 4)
+    url = f"/api/reservations/series/{client.post('/api/reservations/series', json=series_payload(table_id)).json()['id']}"
+    client.post("/api/reservations", json=booking(table_id, "2030-01-14T15:00:00"))
+
+    # Удлинение задевает бронь второй недели
+    response = client.put(url, json={"duration_minutes": 150})
+    assert response.status_code == 409
+    assert [c["index"] for c in response.json()["conflicts"]] == [1]
+
+    response = client.put(url, json={"table_id": other_id, "duration_minutes": 150, "until": "2030-01-14"})
+    assert response.status_code == 200
+    assert (response.json()["count"], response.json()["table_id"]) == (2, other_id)
+    assert client.put(url, json={"customer_name": "ООО Лютик"}).json()["customer_name"] == "ООО Лютик"
+    assert client.post("/api/reservations", json=booking(table_id, "2030-01-07T13:00:00")).status_code == 201
+
+    utilization = client.get("/api/analytics/utilization", params={"from": "2030-01-07", "to": "2030-01-31"}).json()
+    occupied = {bucket["key"]: bucket["occupied_minutes"] for bucket in utilization["buckets"]}
+    assert occupied[other_id] == 2 * 150
+
+    assert client.delete(url).status_code == 204
+    assert client.delete(url).status_code == 404
+    assert client.post("/api/reservations", json=booking(other_id, "2030-01-14T13:00:00")).status_code == 201
+    utilization = client.get("/api/analytics/utilization", params={"from": "2030-01-07", "to": "2030-01-31"}).json()
+    assert {bucket["key"]: bucket["occupied_minutes"] for bucket in utilization["buckets"]}[other_id] == 60
+
+def test_single_writes_lock_table(client, db_session, monkeypatch):
+    from types import SimpleNamespace
+    from sqlalchemy import func
+    from sqlalchemy.dialects import postgresql
+    from app.models.reservation import Reservation
+    from app.routers import reservations
+    from app.services.reservation_service import lock_table_row
+
+    # В PostgreSQL блокировка — отдельный SELECT ... FOR UPDATE
+    statements = []
+    fake = SimpleNamespace(
+        get_bind=lambda: SimpleNamespace(dialect=postgresql.dialect()),
+        execute=statements.append,
+    )
+    lock_table_row(fake, 1)
+    assert "FOR UPDATE" in str(statements[0].compile(dialect=postgresql.dialect()))
+
+    # Блокировка берется до записи брони: вставка видит брони, записанные под той же блокировкой
+    first, second = create_tables(db_session, 4, 4)
+    locks = []
+
+    def record_lock(db, table_id):
+        locks.append((table_id, db.scalar(select(func.count(Reservation.id)))))
+
+    monkeypatch.setattr(reservations, "lock_table_row", record_lock)
+    reservation_id = client.post("/api/reservations", json=booking(first, "2030-01-07T10:00:00")).json()["id"]
+    client.put(f"/api/reservations/{reservation_id}", json={"table_id": second})
+    client.put(f"/api/reservations/{reservation_id}", json={"customer_name": "Петр"})
+    assert locks == [(first, 0), (second, 1)]
+
+def test_series_arithmetic_matches_expansion(db_session):
+    # Условие в SQL и вычисление повторений совпадают с полным перебором
+    table_id, = create_tables(db_session, 4)
+    rng = random.Random(7)
+    first = datetime(2030, 1, 7, 13, 0, 30)
+    series = ReservationSeries(
+        customer_name="Серия", table_id=table_id, reservation_time=first, duration_minutes=90,
+        frequency="daily", interval=3, occurrence_count=10
+    )
+    db_session.add(series)
+    db_session.commit()
+    expanded = list(occurrences(series))
+    assert len(expanded) == 10 and expanded[-1][1] == first + timedelta(days=27)
+
+    for _ in range(300):
+        start = first + timedelta(minutes=rng.randrange(-600, 60 * 24 * 32))
+        duration = rng.choice([30, 60, 90, 240])
+        end = start + timedelta(minutes=duration)
+        expected = [index for index, s, e in expanded if s < end and e > start]
+        assert [index for index, _, _ in occurrences(series, start, end)] == expected
+        assert db_session.scalar(select(series_conflict_clause(table_id, start, duration))) == bool(expected)
+
+def test_floor_occupancy_includes_series(client, db_session):
+    near, far = create_tables(db_session, 4, 4)
+    series_id = client.post("/api/reservations/series", json=series_payload(near)).json()["id"]
+    client.post("/api/reservations/series", json=series_payload(far, reservation_time="2030-01-07T15:00:00"))
+    client.post("/api/reservations", json=booking(far, "2030-01-14T17:00:00"))
+
+    # Второе повторение идет сейчас; у второго стола повторение раньше брони
+    tables = client.get("/api/occupancy", params={"at": "2030-01-14T13:30:00"}).json()["locations"][0]["tables"]
+    current, upcoming = tables
+    assert current["status"] == "occupied"
+    assert current["reservation"] == {
+        "id": None, "series_id": series_id, "customer_name": "ООО Ромашка",
+        "start": "2030-01-14T13:00:00Z", "end": "2030-01-14T14:30:00Z",
+    }
+    assert upcoming["status"] == "reserved"
+    assert upcoming["reservation"]["start"] == "2030-01-14T15:00:00Z"
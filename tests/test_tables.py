@@ -1,6 +1,7 @@
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta
 from app.models.table import Table
+from app.models.reservation import Reservation
 
 def test_create_table(client):
     response = client.post(
@@ -107,4 +108,78 @@ def test_create_table_validation(client):
             "location": "Зал"
         }
     )
-    assert response.status_code == 422 
\ No newline at end of file
+    assert response.status_code == 422 
+
+def test_get_tables_pagination(client, db_session):
+    # Создаем столы в двух залах
+    for i in range(5):
+        db_session.add(Table(name=f"Стол {i}", seats=2 + i, location="Зал 1" if i % 2 else "Зал 2"))
+    db_session.commit()
+
+    # Обходим все страницы по курсору
+    names, cursor = [], None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/tables", params=params)
+        assert response.status_code == 200
+        names += [item["name"] for item in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert names == [f"Стол {i}" for i in range(5)]
+
+    # Фильтры по залу и вместимости
+    response = client.get("/api/tables", params={"location": "Зал 2", "min_seats": 4})
+    assert [item["name"] for item in response.json()] == ["Стол 2", "Стол 4"]
+
+    # Поврежденный курсор
+    response = client.get("/api/tables", params={"cursor": "не-курсор"})
+    assert response.status_code == 400
+
+def test_get_table_schedule(client, db_session):
+    table = Table(name="Стол у окна", seats=4, location="Зал 1")
+    db_session.add(table)
+    db_session.commit()
+
+    day = datetime(2030, 5, 1)
+    db_session.add_all([
+        # Переходит с предыдущего дня
+        Reservation(customer_name="Ночной гость", table_id=table.id,
+                    reservation_time=day - timedelta(hours=1), duration_minutes=120),
+        Reservation(customer_name="Иван Иванов", table_id=table.id,
+                    reservation_time=day.replace(hour=19), duration_minutes=120),
+        # Между бронями остается 20 минут — меньше минимальной брони
+        Reservation(customer_name="Петр Петров", table_id=table.id,
+                    reservation_time=day.replace(hour=21, minute=20), duration_minutes=60),
+        Reservation(customer_name="Завтра", table_id=table.id,
+                    reservation_time=day.replace(day=2, hour=12), duration_minutes=60),
+    ])
+    db_session.commit()
+
+    response = client.get(f"/api/tables/{table.id}/schedule", params={"date": "2030-05-01"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["table_id"] == table.id
+    assert len(data["days"]) == 1
+    schedule = data["days"][0]
+    assert schedule["date"] == "2030-05-01"
+    assert [item["customer_name"] for item in schedule["busy"]] == ["Ночной гость", "Иван Иванов", "Петр Петров"]
+    assert schedule["free"] == [
+        {"start": "2030-05-01T01:00:00Z", "end": "2030-05-01T19:00:00Z", "max_duration_minutes": 240},
+        {"start": "2030-05-01T22:20:00Z", "end": "2030-05-02T00:00:00Z", "max_duration_minutes": 100},
+    ]
+
+    # Несколько дней одним запросом
+    response = client.get(f"/api/tables/{table.id}/schedule", params={"date": "2030-05-01", "days": 3})
+    days = response.json()["days"]
+    assert [d["date"] for d in days] == ["2030-05-01", "2030-05-02", "2030-05-03"]
+    assert [item["customer_name"] for item in days[1]["busy"]] == ["Завтра"]
+    assert days[2]["busy"] == []
+    assert days[2]["free"] == [
+        {"start": "2030-05-03T00:00:00Z", "end": "2030-05-04T00:00:00Z", "max_duration_minutes": 240}
+    ]
+
+    assert client.get("/api/tables/999/schedule").status_code == 404
+    assert client.get(f"/api/tables/{table.id}/schedule", params={"days": 15}).status_code == 422